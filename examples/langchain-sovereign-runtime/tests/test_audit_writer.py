@@ -0,0 +1,174 @@
+"""
+A2.5 buffered audit writer tests.
+
+With buffered_audit=True the engine chains events in memory and a background
+thread writes them in batches. Whatever reaches the log, including after the
+process is killed mid-write, must be an unbroken SHA-256 chain from genesis.
+
+Run: python -m pytest -q examples/langchain-sovereign-runtime/tests
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from enforcement.ai_safe2_engine import AISAFE2Engine, AuditWriter
+
+RUNTIME_ROOT = Path(__file__).parent.parent
+
+
+def _read_chain(path: Path) -> list:
+    """Complete lines of an OCSF log; a torn final line from a kill is dropped."""
+    lines = path.read_text(encoding="utf-8").split("\n")[:-1]
+    return [json.loads(line) for line in lines]
+
+
+def _assert_chain(events: list) -> None:
+    previous = "0" * 64
+    for i, event in enumerate(events):
+        assert event["previous_hash"] == previous, f"chain break at event {i}"
+        canonical = json.dumps({k: v for k, v in event.items() if k != "event_hash"}, sort_keys=True)
+        assert hashlib.sha256(canonical.encode()).hexdigest() == event["event_hash"], \
+            f"event {i} hash mismatch"
+        previous = event["event_hash"]
+
+
+def _engine(tmp_path: Path, **kwargs) -> AISAFE2Engine:
+    return AISAFE2Engine(runtime_id="audit-writer-test", audit_log_dir=tmp_path, **kwargs)
+
+
+def test_flush_makes_buffered_events_visible(tmp_path):
+    engine = _engine(tmp_path, buffered_audit=True, audit_flush_interval=60, audit_batch_size=10_000)
+    for i in range(50):
+        engine.protect_memory_write(f"key-{i}", "benign value")
+    engine.flush()
+
+    events = _read_chain(engine.audit_log_path)
+    assert len(events) == 51  # ENGINE_INITIALIZED + 50 writes
+    _assert_chain(events)
+    assert events[-1]["event_hash"] == engine._last_hash
+    engine.close()
+
+
+def test_buffered_log_matches_unbuffered_shape(tmp_path):
+    buffered = _engine(tmp_path / "buffered", buffered_audit=True, audit_batch_size=7)
+    direct = _engine(tmp_path / "direct")
+    for engine in (buffered, direct):
+        for i in range(20):
+            engine.protect_memory_write(f"key-{i}", "benign value")
+    buffered.close()
+
+    b, d = _read_chain(buffered.audit_log_path), _read_chain(direct.audit_log_path)
+    _assert_chain(b)
+    _assert_chain(d)
+    assert [e["finding_info"]["title"] for e in b] == [e["finding_info"]["title"] for e in d]
+    assert [e["finding_info"]["source"] for e in b] == [e["finding_info"]["source"] for e in d]
+
+
+def test_context_manager_closes_writer(tmp_path):
+    with _engine(tmp_path, buffered_audit=True, audit_flush_interval=60) as engine:
+        engine.protect_memory_write("key", "benign value")
+        thread = engine._audit_writer._thread
+    assert not thread.is_alive()
+    events = _read_chain(engine.audit_log_path)
+    assert len(events) == 2
+    _assert_chain(events)
+
+
+def test_failed_write_raises_from_flush_until_it_recovers(tmp_path, capsys):
+    engine = _engine(tmp_path, buffered_audit=True, audit_flush_interval=0.01)
+    engine.flush()
+    log = engine.audit_log_path
+    log.rename(tmp_path / "saved.jsonl")
+    log.mkdir()  # appends fail until the directory is removed
+    for i in range(3):
+        engine.protect_memory_write(f"key-{i}", "benign value")
+    with pytest.raises(OSError, match="audit write"):
+        engine.flush()
+    time.sleep(0.05)  # several timed retries, still failing
+
+    log.rmdir()
+    (tmp_path / "saved.jsonl").rename(log)
+    engine.flush()
+    events = _read_chain(log)
+    assert len(events) == 4
+    _assert_chain(events)
+    engine.close()
+    err = capsys.readouterr().err
+    assert err.count("retrying") == 1
+    assert "recovered" in err
+
+
+def test_pending_lines_are_capped(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    log.mkdir()
+    writer = AuditWriter(log, flush_interval=60, max_pending=5)
+    for i in range(5):
+        writer.write(f"line-{i}\n")
+    with pytest.raises(OSError, match="backlog"):
+        writer.write("overflow\n")
+
+    log.rmdir()
+    assert writer.flush()
+    writer.write("after\n")
+    writer.close()
+    assert log.read_text(encoding="utf-8").split() == [f"line-{i}" for i in range(5)] + ["after"]
+
+
+def _spawn(log_dir: Path, body: str, flush_interval: float = 0.01, batch_size: int = 32) -> subprocess.Popen:
+    script = textwrap.dedent(f"""
+        import sys
+        from pathlib import Path
+        sys.path.insert(0, {str(RUNTIME_ROOT)!r})
+        from enforcement.ai_safe2_engine import AISAFE2Engine, AuditWriter
+        engine = AISAFE2Engine(
+            runtime_id="audit-writer-worker", audit_log_dir=Path({str(log_dir)!r}),
+            buffered_audit=True, audit_flush_interval={flush_interval}, audit_batch_size={batch_size},
+        )
+    """) + textwrap.dedent(body)
+    return subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, text=True)
+
+
+def test_atexit_flushes_pending_events(tmp_path):
+    proc = _spawn(tmp_path, """
+        for i in range(500):
+            engine.protect_memory_write(f"key-{i}", "benign value")
+    """, flush_interval=60, batch_size=10_000)
+    assert proc.wait(timeout=60) == 0
+    (log,) = tmp_path.glob("*.ocsf.jsonl")
+    events = _read_chain(log)
+    assert len(events) == 501
+    _assert_chain(events)
+
+
+def test_chain_intact_after_worker_killed_mid_run(tmp_path):
+    proc = _spawn(tmp_path, """
+        i = 0
+        while True:
+            engine.protect_memory_write(f"key-{i}", "benign value")
+            i += 1
+            if i % 1000 == 0:
+                engine.flush()
+                print(i + 1, flush=True)
+    """)
+    try:
+        flushed = [int(proc.stdout.readline()) for _ in range(3)]
+        time.sleep(0.05)
+    finally:
+        proc.kill()
+        proc.wait(timeout=10)
+    assert flushed == [1001, 2001, 3001]
+
+    (log,) = tmp_path.glob("*.ocsf.jsonl")
+    events = _read_chain(log)
+    assert len(events) >= flushed[-1]
+    _assert_chain(events)
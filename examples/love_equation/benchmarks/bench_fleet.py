@@ -0,0 +1,114 @@
+"""
+Love Equation Evaluator — Fleet Benchmark
+Times batched event ingestion + evaluation for 10,000 agents, comparing one
+LoveEquationEvaluator per agent (events added and evaluate() called agent by
+agent) with FleetEvaluator's columnar arrays, and compares per-agent to_dict
+JSON export with a .npz snapshot. Checks both paths end in the same state.
+
+Run: python examples/love_equation/benchmarks/bench_fleet.py [--agents 10000] [--rounds 20]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from evaluator import AgentState, AlignmentEvent, EventDirection, LoveEquationEvaluator
+from fleet import FleetEvaluator, encode_events
+
+
+def build_rounds(n_agents: int, rounds: int, seed: int = 5) -> list[tuple[list[int], list[AlignmentEvent]]]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    directions = list(EventDirection)
+    batches = []
+    for r in range(rounds):
+        agents = [rng.randrange(n_agents) for _ in range(n_agents)]
+        events = [
+            AlignmentEvent(
+                event_id=f"evt_{r}_{k}",
+                agent_id=f"agent-{a}",
+                principal_id="user:bench",
+                timestamp=now,
+                direction=rng.choice(directions),
+                weight=rng.random(),
+                category="BENCH",
+                source="bench",
+                stakes=rng.choice(["low", "medium", "high"]),
+                verifiability=rng.random(),
+                confidence=rng.random(),
+            )
+            for k, a in enumerate(agents)
+        ]
+        batches.append((agents, events))
+    return batches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--agents", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--window", type=int, default=100)
+    args = parser.parse_args()
+
+    states = [AgentState(f"agent-{i}", "user:bench", window_size=args.window) for i in range(args.agents)]
+    batches = build_rounds(args.agents, args.rounds)
+    encoded = [(np.array(agents), *encode_events(events)) for agents, events in batches]
+
+    evaluators = [LoveEquationEvaluator(AgentState(s.agent_id, s.principal_id, window_size=args.window))
+                  for s in states]
+    start = time.perf_counter()
+    for agents, events in batches:
+        for agent, event in zip(agents, events):
+            evaluators[agent].add_event(event)
+        for ev in evaluators:
+            ev.evaluate()
+    legacy_time = time.perf_counter() - start
+
+    fleet = FleetEvaluator.from_states(states)
+    start = time.perf_counter()
+    for agents, directions, weights in encoded:
+        fleet.add_events(agents, directions, weights)
+        fleet.evaluate()
+    fleet_time = time.perf_counter() - start
+
+    tol = LoveEquationEvaluator.METRIC_TOLERANCE
+    assert np.allclose(fleet.E, [ev.state.E for ev in evaluators], rtol=0, atol=tol), "E differs from per-agent path"
+    assert np.allclose(fleet.I, [ev.state.I for ev in evaluators], rtol=0, atol=tol), "I differs from per-agent path"
+
+    start = time.perf_counter()
+    exported = json.dumps([ev.export_state() for ev in evaluators])
+    json_time = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "fleet.npz"
+        start = time.perf_counter()
+        fleet.save(path)
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        FleetEvaluator.load(path)
+        load_time = time.perf_counter() - start
+        npz_size = path.stat().st_size
+
+    n_events = args.agents * args.rounds
+    print(f"Agents:                {args.agents:,} (window {args.window})")
+    print(f"Rounds:                {args.rounds} x {args.agents:,} events + evaluate all agents")
+    print(f"Per-agent evaluators:  {legacy_time:8.3f}s  ({legacy_time / n_events * 1e6:6.2f} us/event)")
+    print(f"FleetEvaluator:        {fleet_time:8.3f}s  ({fleet_time / n_events * 1e6:6.2f} us/event, "
+          f"{legacy_time / max(fleet_time, 1e-9):.0f}x faster)")
+    print(f"Export, to_dict JSON:  {json_time:8.3f}s  {len(exported) / 2**20:7.1f} MiB (last 10 events, no windows)")
+    print(f"Export, .npz snapshot: {save_time:8.3f}s  {npz_size / 2**20:7.1f} MiB (full windows), "
+          f"load {load_time:.3f}s")
+    print(f"Final state:           E, I within {tol:g} of per-agent path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Love Equation Evaluator — Sliding Window Benchmark
+Fills a 10,000-event window, then times steady-state add_event + evaluate
+calls (each one evicting an event), comparing the original list-slicing window and per-call rescans of
+C, D and N with the deque window and running sums, and checks both end in
+the same state.
+
+Run: python examples/love_equation/benchmarks/bench_window.py [--window 10000] [--events 500]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from evaluator import AgentState, AlignmentEvent, EventDirection, LoveEquationEvaluator
+
+
+class LegacyEvaluator(LoveEquationEvaluator):
+    """The original behavior: list window trimmed by slicing, metrics by full rescan."""
+
+    def __init__(self, agent_state: AgentState):
+        self.state = agent_state
+        self.state.event_window = list(agent_state.event_window)
+
+    def add_event(self, event: AlignmentEvent) -> None:
+        self.state.event_window.append(event)
+        if len(self.state.event_window) > self.state.window_size:
+            self.state.event_window = self.state.event_window[-self.state.window_size:]
+
+    def _rescan(self, direction: EventDirection) -> float:
+        window = self.state.event_window
+        matching = [e for e in window if e.direction == direction]
+        if not matching:
+            return 0.0
+        return min(1.0, sum(e.effective_weight for e in matching) / len(window))
+
+    def compute_C(self) -> float:
+        return self._rescan(EventDirection.COOPERATION)
+
+    def compute_D(self) -> float:
+        return self._rescan(EventDirection.DEFECTION)
+
+    def compute_N(self) -> float:
+        return self._rescan(EventDirection.NOVELTY)
+
+
+def build_events(n: int, seed: int = 5) -> list[AlignmentEvent]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    directions = list(EventDirection)
+    return [
+        AlignmentEvent(
+            event_id=f"evt_{i}",
+            agent_id="bench-agent",
+            principal_id="user:bench",
+            timestamp=now,
+            direction=rng.choice(directions),
+            weight=rng.random() * 0.3,
+            category="BENCH",
+            source="bench",
+            stakes=rng.choice(["low", "medium", "high"]),
+            verifiability=rng.random(),
+            confidence=rng.random(),
+        )
+        for i in range(n)
+    ]
+
+
+def run(evaluator_cls, window: int, events: list[AlignmentEvent]) -> tuple[LoveEquationEvaluator, float]:
+    evaluator = evaluator_cls(AgentState("bench-agent", "user:bench", window_size=window))
+    for event in events[:window]:
+        evaluator.add_event(event)
+    start = time.perf_counter()
+    for event in events[window:]:
+        evaluator.add_event(event)
+        evaluator.evaluate()
+    return evaluator, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--window", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=500, help="Timed calls after the window is full")
+    args = parser.parse_args()
+
+    events = build_events(args.window + args.events)
+    legacy, legacy_time = run(LegacyEvaluator, args.window, events)
+    fast, fast_time = run(LoveEquationEvaluator, args.window, events)
+    tol = LoveEquationEvaluator.METRIC_TOLERANCE
+    for attr in ("E", "I"):
+        assert abs(getattr(legacy.state, attr) - getattr(fast.state, attr)) <= tol, f"{attr} differs from legacy"
+
+    n = args.events
+    print(f"Window:                {args.window:,} events (full)")
+    print(f"Timed:                 {n:,} add_event + evaluate calls")
+    print(f"Legacy rescan:         {legacy_time:8.3f}s  ({legacy_time / n * 1e6:8.1f} us/call)")
+    print(f"Running sums:          {fast_time:8.3f}s  ({fast_time / n * 1e6:8.1f} us/call, "
+          f"{legacy_time / max(fast_time, 1e-9):.0f}x faster)")
+    print(f"Final state:           E={fast.state.E:.6f} I={fast.state.I:.6f} (within {tol:g} of legacy)")
+
+
+if __name__ == "__main__":
+    main()
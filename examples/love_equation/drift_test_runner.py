@@ -9,10 +9,21 @@ behavior against expected outcomes.
 Supports both probabilistic tests (with statistical validation) and
 deterministic tests (with exact reproducibility requirements).
 
+Probabilistic tests generate each iteration's event stream as NumPy arrays
+and run the E/I dynamics for all iterations at once (one array step per
+event). Every iteration draws from its own seed, spawned from the run seed
+with numpy.random.SeedSequence, so results for a given --seed are identical
+for any --workers count.
+
+Suites express E, I and event magnitudes on a 0-10 scale; the evaluator works
+in [0, 1], so values are divided by SCORE_SCALE on the way in and multiplied
+back for reporting.
+
 Usage:
     python drift_test_runner.py --suite probabilistic
     python drift_test_runner.py --suite deterministic
     python drift_test_runner.py --all
+    python drift_test_runner.py --all --workers 4 --seed 1234
 
 Author: Cyber Strategy Institute
 License: MIT
@@ -20,17 +31,36 @@ License: MIT
 
 import argparse
 import json
+import os
 import yaml
 import sys
 import uuid
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Any, Tuple
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 import numpy as np
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 
 # Import the evaluator
-from evaluator import LoveEquationEvaluator, AlignmentBand
+from evaluator import (
+    FLAG_MULTIPLIERS,
+    MAX_EFFECTIVE_WEIGHT,
+    NOVELTY_BASELINE,
+    REVERSIBILITY_MULTIPLIERS,
+    STAKES_MULTIPLIERS,
+    AgentState,
+    AlignmentBand,
+    AlignmentEvent,
+    EventDirection,
+    LoveEquationEvaluator,
+)
+
+# Suites use a 0-10 scale for E, I and magnitude; the evaluator uses [0, 1]
+SCORE_SCALE = 10.0
+PRINCIPAL_ID = "drift-test"
 
 
 @dataclass
@@ -51,12 +81,251 @@ class TestResult:
         return asdict(self)
 
 
+@dataclass
+class EventStream:
+    """One iteration's generated events as parallel arrays (one entry per event)."""
+    is_cooperation: np.ndarray  # bool; False = defection
+    category: np.ndarray
+    magnitude: np.ndarray       # 0-10 scale
+    stakes: np.ndarray
+    reversibility: np.ndarray
+    flags: Dict[str, np.ndarray]  # bool array per FLAG_MULTIPLIERS name
+    verifiability: np.ndarray
+    confidence: np.ndarray
+    
+    def effective_weights(self) -> np.ndarray:
+        """AlignmentEvent.effective_weight for every event, same operations in the same order."""
+        weight = self.magnitude / SCORE_SCALE
+        multiplier = _lookup(STAKES_MULTIPLIERS, self.stakes) * _lookup(REVERSIBILITY_MULTIPLIERS, self.reversibility)
+        for flag, flag_mult in FLAG_MULTIPLIERS:
+            multiplier = np.where(self.flags[flag], multiplier * flag_mult, multiplier)
+        base = np.minimum(MAX_EFFECTIVE_WEIGHT, weight * multiplier)
+        # Empirical Distrust penalty for overconfident defections
+        penalized = ~self.is_cooperation & (self.confidence > self.verifiability)
+        base = np.where(penalized, base + (self.confidence - self.verifiability) * weight, base)
+        return np.minimum(MAX_EFFECTIVE_WEIGHT, base)
+    
+    def events(self, agent_id: str) -> Iterator[AlignmentEvent]:
+        """The stream as AlignmentEvent objects, for the scalar evaluator path."""
+        now = datetime.now(timezone.utc)
+        weights = self.magnitude / SCORE_SCALE
+        for i in range(len(self.magnitude)):
+            yield AlignmentEvent(
+                event_id=f"{agent_id}-{i}",
+                agent_id=agent_id,
+                principal_id=PRINCIPAL_ID,
+                timestamp=now,
+                direction=EventDirection.COOPERATION if self.is_cooperation[i] else EventDirection.DEFECTION,
+                weight=float(weights[i]),
+                category=str(self.category[i]),
+                source="drift-test-runner",
+                stakes=str(self.stakes[i]),
+                reversibility=str(self.reversibility[i]),
+                verifiability=float(self.verifiability[i]),
+                confidence=float(self.confidence[i]),
+                **{flag: bool(values[i]) for flag, values in self.flags.items()},
+            )
+
+
+def _lookup(table: Dict[str, float], keys: np.ndarray) -> np.ndarray:
+    """Map an array of keys through a multiplier table (unknown keys -> 1.0)."""
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    return np.array([table.get(str(k), 1.0) for k in uniques])[inverse]
+
+
+def _choice(rng: np.random.Generator, dist: Dict[str, float], default: str, n: int) -> np.ndarray:
+    """n draws from a {name: probability} mapping."""
+    if not dist:
+        return np.full(n, default)
+    return np.asarray(list(dist.keys()))[rng.choice(len(dist), size=n, p=list(dist.values()))]
+
+
+def _beta_or_default(rng: np.random.Generator, dist: Dict, n: int) -> np.ndarray:
+    if dist.get("type") == "beta":
+        return rng.beta(dist["alpha"], dist["beta"], size=n)
+    return np.full(n, 0.7)
+
+
+def generate_event_stream(test_spec: Dict, event_count: int, rng: np.random.Generator) -> EventStream:
+    """Draw one iteration's events from the test's distributions."""
+    event_dist = test_spec["event_distribution"]
+    mag_dist = test_spec.get("magnitude_distribution", {})
+    ctx_dist = test_spec.get("context_distribution", {})
+    n = event_count
+    
+    is_cooperation = rng.random(n) < event_dist.get("cooperation_rate", 0.5)
+    category = np.where(
+        is_cooperation,
+        _choice(rng, event_dist.get("cooperation_categories", {}), "COOPERATION", n),
+        _choice(rng, event_dist.get("defection_categories", {}), "DEFECTION", n),
+    )
+    
+    if mag_dist.get("type") == "normal":
+        magnitude = np.clip(rng.normal(mag_dist["mean"], mag_dist["std_dev"], n), mag_dist["min"], mag_dist["max"])
+    elif mag_dist.get("type") == "uniform":
+        magnitude = rng.uniform(mag_dist["min"], mag_dist["max"], n)
+    else:
+        magnitude = np.full(n, 5.0)
+    
+    stakes = _choice(rng, ctx_dist.get("stakes", {}), "low", n)
+    reversibility = _choice(rng, ctx_dist.get("reversibility", {}), "reversible", n)
+    flags = {flag: rng.random(n) < ctx_dist.get(f"{flag}_rate", 0.0) for flag, _ in FLAG_MULTIPLIERS}
+    
+    return EventStream(
+        is_cooperation=is_cooperation,
+        category=category,
+        magnitude=magnitude,
+        stakes=stakes,
+        reversibility=reversibility,
+        flags=flags,
+        verifiability=_beta_or_default(rng, event_dist.get("verifiability_distribution", {}), n),
+        confidence=_beta_or_default(rng, event_dist.get("confidence_distribution", {}), n),
+    )
+
+
+def initial_agent_state(test_spec: Dict, defaults: Dict) -> AgentState:
+    """AgentState for a test, with suite E/I values converted from the 0-10 scale."""
+    initial_state = test_spec.get("initial_state", {})
+    return AgentState(
+        agent_id=f"test-{test_spec['name']}",
+        principal_id=PRINCIPAL_ID,
+        E=initial_state.get("E_initial", defaults.get("E_initial", 5.0)) / SCORE_SCALE,
+        I=initial_state.get("I_initial", defaults.get("I_initial", 5.0)) / SCORE_SCALE,
+        beta=defaults.get("beta", AgentState.beta),
+        gamma=defaults.get("gamma", AgentState.gamma),
+        kappa=defaults.get("kappa", AgentState.kappa),
+        Imax=defaults.get("Imax", AgentState.Imax),
+        window_size=defaults.get("window_size", AgentState.window_size),
+    )
+
+
+def _result_row(E: float, I: float, C_cumulative: float, D_cumulative: float) -> Dict:
+    band = replace(AgentState("", ""), E=E).get_band()
+    return {
+        "E_final": E * SCORE_SCALE,
+        "I_final": I * SCORE_SCALE,
+        "C_cumulative": C_cumulative,
+        "D_cumulative": D_cumulative,
+        "band": band.value
+    }
+
+
+def simulate_scalar(streams: List[EventStream], state: AgentState) -> List[Dict]:
+    """Reference path: feed every event through LoveEquationEvaluator one at a time."""
+    rows = []
+    for stream in streams:
+        evaluator = LoveEquationEvaluator(replace(state, event_window=deque()))
+        C_cumulative = D_cumulative = 0.0
+        for event in stream.events(state.agent_id):
+            evaluator.add_event(event)
+            evaluator.evaluate()
+            if event.direction == EventDirection.COOPERATION:
+                C_cumulative += event.effective_weight
+            else:
+                D_cumulative += event.effective_weight
+        rows.append(_result_row(evaluator.state.E, evaluator.state.I, C_cumulative, D_cumulative))
+    return rows
+
+
+def _window_metric(weights: np.ndarray, mask: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    compute_C/D/N after each event, for every iteration: the masked weight sum
+    over the last window_size events, normalized by window length, capped at 1.
+    """
+    iterations, n = weights.shape
+    zeros = np.zeros((iterations, 1))
+    sums = np.concatenate([zeros, np.cumsum(np.where(mask, weights, 0.0), axis=1)], axis=1)
+    counts = np.concatenate([zeros.astype(np.int64), np.cumsum(mask, axis=1)], axis=1)
+    hi = np.arange(1, n + 1)
+    lo = np.maximum(0, hi - window_size)
+    total = sums[:, hi] - sums[:, lo]
+    metric = np.minimum(1.0, total / (hi - lo))
+    # A direction absent from the window is exactly 0.0, as in the evaluator
+    return np.where(counts[:, hi] - counts[:, lo] > 0, metric, 0.0)
+
+
+def simulate_vectorized(streams: List[EventStream], state: AgentState) -> List[Dict]:
+    """
+    Array path: window metrics for every (iteration, event) at once, then
+    the E/I recurrences stepped across all iterations together.
+    """
+    weights = np.stack([s.effective_weights() for s in streams])
+    cooperation = np.stack([s.is_cooperation for s in streams])
+    C = _window_metric(weights, cooperation, state.window_size)
+    D = _window_metric(weights, ~cooperation, state.window_size)
+    N = np.zeros_like(C)  # generated streams contain no NOVELTY events
+    
+    E = np.full(len(streams), state.E)
+    I = np.full(len(streams), state.I)
+    for t in range(weights.shape[1]):
+        # Same expressions as LoveEquationEvaluator.evaluate with delta_t = 1.0
+        E = np.clip(E + 1.0 * (state.beta * (C[:, t] - D[:, t]) * E), 0.0, 1.0)
+        I = np.clip(
+            I + 1.0 * (state.gamma * (N[:, t] - NOVELTY_BASELINE) * I + state.kappa * I),
+            0.0, state.Imax,
+        )
+    
+    C_cumulative = np.where(cooperation, weights, 0.0).sum(axis=1)
+    D_cumulative = np.where(cooperation, 0.0, weights).sum(axis=1)
+    return [
+        _result_row(float(E[i]), float(I[i]), float(C_cumulative[i]), float(D_cumulative[i]))
+        for i in range(len(streams))
+    ]
+
+
+def simulate_iterations(test_spec: Dict, defaults: Dict, seeds: List[np.random.SeedSequence],
+                        vectorized: bool = True) -> List[Dict]:
+    """Result rows for one chunk of iterations, one seed per iteration (process pool entry point)."""
+    event_count = defaults.get("event_count", 1000)
+    streams = [generate_event_stream(test_spec, event_count, np.random.default_rng(seed)) for seed in seeds]
+    simulate = simulate_vectorized if vectorized else simulate_scalar
+    return simulate(streams, initial_agent_state(test_spec, defaults))
+
+
+def to_alignment_event(event: Dict, agent_id: str) -> AlignmentEvent:
+    """Convert a suite event dict (0-10 magnitude) to an AlignmentEvent."""
+    context = event.get("context") or {}
+    return AlignmentEvent(
+        event_id=event.get("event_id", str(uuid.uuid4())),
+        agent_id=agent_id,
+        principal_id=PRINCIPAL_ID,
+        timestamp=datetime.now(timezone.utc),
+        direction=EventDirection[event["event_type"]],
+        weight=event.get("magnitude", 5.0) / SCORE_SCALE,
+        category=event.get("category", event["event_type"]),
+        source="drift-test-runner",
+        stakes=context.get("stakes", "low"),
+        reversibility=context.get("reversibility", "reversible"),
+        verifiability=event.get("verifiability", 0.7),
+        confidence=event.get("confidence", 0.7),
+        **{flag: bool(context.get(flag, False)) for flag, _ in FLAG_MULTIPLIERS},
+    )
+
+
 class DriftTestRunner:
     """Executes drift tests from YAML specifications"""
     
-    def __init__(self, test_dir: Path = Path("drift_tests")):
+    def __init__(self, test_dir: Path = Path("drift_tests"), workers: int = 1,
+                 seed: Optional[int] = None, vectorized: bool = True):
         self.test_dir = test_dir
         self.results: List[TestResult] = []
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.seed = np.random.SeedSequence(seed)
+        self.vectorized = vectorized
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    def _iteration_seeds(self, suite_name: str, test_name: str, iterations: int) -> List[np.random.SeedSequence]:
+        """Per-iteration seeds, stable for a test name regardless of which suites run."""
+        key = zlib.crc32(f"{suite_name}/{test_name}".encode("utf-8"))
+        return np.random.SeedSequence(self.seed.entropy, spawn_key=(key,)).spawn(iterations)
+    
+    def _submit(self, fn, *args) -> Future:
+        """Run fn on the process pool if one is open, otherwise inline."""
+        if self._pool is not None:
+            return self._pool.submit(fn, *args)
+        future: Future = Future()
+        future.set_result(fn(*args))
+        return future
         
     def load_test_suite(self, suite_name: str) -> Dict:
         """Load a YAML test suite"""
@@ -68,97 +337,24 @@ class DriftTestRunner:
         with open(suite_path, 'r') as f:
             return yaml.safe_load(f)
     
-    def generate_event_from_distribution(self, 
-                                        event_dist: Dict, 
-                                        mag_dist: Dict,
-                                        ctx_dist: Dict,
-                                        agent_id: str) -> Dict:
-        """Generate a single event based on distribution parameters"""
-        
-        # Determine cooperation vs defection
-        coop_rate = event_dist.get("cooperation_rate", 0.5)
-        is_cooperation = np.random.random() < coop_rate
-        
-        # Select category
-        if is_cooperation:
-            categories = event_dist.get("cooperation_categories", {})
-            event_type = "COOPERATION"
-        else:
-            categories = event_dist.get("defection_categories", {})
-            event_type = "DEFECTION"
-        
-        # Weighted random selection of category
-        cats = list(categories.keys())
-        weights = list(categories.values())
-        category = np.random.choice(cats, p=weights)
-        
-        # Generate magnitude
-        if mag_dist.get("type") == "normal":
-            magnitude = np.clip(
-                np.random.normal(mag_dist["mean"], mag_dist["std_dev"]),
-                mag_dist["min"],
-                mag_dist["max"]
-            )
-        elif mag_dist.get("type") == "uniform":
-            magnitude = np.random.uniform(mag_dist["min"], mag_dist["max"])
-        else:
-            magnitude = 5.0
-        
-        # Generate context
-        stakes_dist = ctx_dist.get("stakes", {})
-        stakes = np.random.choice(
-            list(stakes_dist.keys()),
-            p=list(stakes_dist.values())
-        )
-        
-        rev_dist = ctx_dist.get("reversibility", {})
-        reversibility = np.random.choice(
-            list(rev_dist.keys()),
-            p=list(rev_dist.values())
-        )
-        
-        context = {
-            "domain": "general",
-            "stakes": stakes,
-            "reversibility": reversibility,
-            "sensitive_data": np.random.random() < ctx_dist.get("sensitive_data_rate", 0.0),
-            "user_vulnerable": np.random.random() < ctx_dist.get("user_vulnerable_rate", 0.0),
-            "financial_impact": np.random.random() < ctx_dist.get("financial_impact_rate", 0.0),
-            "self_harm_risk": np.random.random() < ctx_dist.get("self_harm_risk_rate", 0.0),
-            "third_party_impact": np.random.random() < ctx_dist.get("third_party_impact_rate", 0.0)
-        }
-        
-        # Generate verifiability and confidence
-        verif_dist = event_dist.get("verifiability_distribution", {})
-        if verif_dist.get("type") == "beta":
-            verifiability = np.random.beta(verif_dist["alpha"], verif_dist["beta"])
-        else:
-            verifiability = 0.7
-        
-        conf_dist = event_dist.get("confidence_distribution", {})
-        if conf_dist.get("type") == "beta":
-            confidence = np.random.beta(conf_dist["alpha"], conf_dist["beta"])
-        else:
-            confidence = 0.7
-        
-        # Construct event
-        event = {
-            "event_id": str(uuid.uuid4()),
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "agent_id": agent_id,
-            "event_type": event_type,
-            "category": category,
-            "magnitude": float(magnitude),
-            "context": context,
-            "verifiability": float(verifiability),
-            "confidence": float(confidence)
-        }
-        
-        return event
-    
-    def run_probabilistic_test(self, test_spec: Dict, defaults: Dict) -> TestResult:
+    def run_probabilistic_test(self, test_spec: Dict, defaults: Dict,
+                               suite_name: str = "probabilistic") -> TestResult:
         """Run a single probabilistic test with statistical validation"""
-        
+        futures = self._submit_probabilistic(test_spec, defaults, suite_name)
+        return self._finish_probabilistic(test_spec, defaults, futures)
+    
+    def _submit_probabilistic(self, test_spec: Dict, defaults: Dict, suite_name: str) -> List[Future]:
+        """Queue a test's iterations, split into one chunk per worker."""
+        iterations = defaults.get("test_iterations", 10)
+        seeds = self._iteration_seeds(suite_name, test_spec["name"], iterations)
+        chunks = [seeds[i::self.workers] for i in range(min(self.workers, iterations))]
+        return [
+            self._submit(simulate_iterations, test_spec, defaults, chunk, self.vectorized)
+            for chunk in chunks
+        ]
+    
+    def _finish_probabilistic(self, test_spec: Dict, defaults: Dict, futures: List[Future]) -> TestResult:
+        """Collect a queued test's iterations and validate the summary statistics"""
         test_name = test_spec["name"]
         iterations = defaults.get("test_iterations", 10)
         event_count = defaults.get("event_count", 1000)
@@ -168,40 +364,15 @@ class DriftTestRunner:
         print(f"  Iterations: {iterations}")
         print(f"  Events per iteration: {event_count}")
         
-        results = []
         errors = []
         warnings = []
         
-        for i in range(iterations):
-            # Initialize evaluator
-            initial_state = test_spec.get("initial_state", {})
-            evaluator = LoveEquationEvaluator(
-                beta=defaults.get("beta", 0.1),
-                beta_I=defaults.get("beta_I", 0.08),
-                E_initial=initial_state.get("E_initial", defaults.get("E_initial", 5.0)),
-                I_initial=initial_state.get("I_initial", defaults.get("I_initial", 5.0))
-            )
-            
-            # Generate and process events
-            event_dist = test_spec["event_distribution"]
-            mag_dist = test_spec["magnitude_distribution"]
-            ctx_dist = test_spec["context_distribution"]
-            
-            for _ in range(event_count):
-                event = self.generate_event_from_distribution(
-                    event_dist, mag_dist, ctx_dist, f"test-{test_name}"
-                )
-                evaluator.process_event(event)
-            
-            # Collect results
-            scores = evaluator.get_scores()
-            results.append({
-                "E_final": scores.E,
-                "I_final": scores.I,
-                "C_cumulative": scores.C_cumulative,
-                "D_cumulative": scores.D_cumulative,
-                "band": scores.band.value
-            })
+        # Chunks are strided, so chunk k holds iterations k, k + workers, ...
+        chunk_rows = [future.result() for future in futures]
+        results = [
+            chunk_rows[i % len(chunk_rows)][i // len(chunk_rows)]
+            for i in range(iterations)
+        ]
         
         # Statistical analysis
         E_finals = [r["E_final"] for r in results]
@@ -288,33 +459,25 @@ class DriftTestRunner:
         
         for i in range(iterations):
             # Initialize evaluator
-            initial_state = test_spec.get("initial_state", {})
-            evaluator = LoveEquationEvaluator(
-                beta=defaults.get("beta", 0.1),
-                beta_I=defaults.get("beta_I", 0.08),
-                E_initial=initial_state.get("E_initial", defaults.get("E_initial", 5.0)),
-                I_initial=initial_state.get("I_initial", defaults.get("I_initial", 5.0))
-            )
+            evaluator = LoveEquationEvaluator(initial_agent_state(test_spec, defaults))
+            C_cumulative = D_cumulative = 0.0
             
             # Process fixed event sequence
             for event in test_spec["events"]:
                 # Fill in required fields
                 event_copy = event.copy()
                 event_copy["event_id"] = str(uuid.uuid4())
-                event_copy["timestamp"] = datetime.utcnow().isoformat() + "Z"
-                event_copy["agent_id"] = f"test-{test_name}"
                 
-                evaluator.process_event(event_copy)
+                alignment_event = to_alignment_event(event_copy, f"test-{test_name}")
+                evaluator.add_event(alignment_event)
+                evaluator.evaluate()
+                if alignment_event.direction == EventDirection.COOPERATION:
+                    C_cumulative += alignment_event.effective_weight
+                elif alignment_event.direction == EventDirection.DEFECTION:
+                    D_cumulative += alignment_event.effective_weight
             
             # Collect results
-            scores = evaluator.get_scores()
-            results.append({
-                "E_final": scores.E,
-                "I_final": scores.I,
-                "C_cumulative": scores.C_cumulative,
-                "D_cumulative": scores.D_cumulative,
-                "band": scores.band.value
-            })
+            results.append(_result_row(evaluator.state.E, evaluator.state.I, C_cumulative, D_cumulative))
         
         # Check exact reproducibility
         first_result = results[0]
@@ -380,24 +543,50 @@ class DriftTestRunner:
     
     def run_suite(self, suite_name: str) -> List[TestResult]:
         """Run an entire test suite"""
-        
-        print(f"\n{'=' * 60}")
-        print(f"Running Test Suite: {suite_name}")
-        print(f"{'=' * 60}")
-        
-        suite = self.load_test_suite(suite_name)
-        defaults = suite.get("defaults", {})
-        
-        results = []
-        
-        for test_spec in suite["test_suites"]:
-            if suite_name == "probabilistic":
-                result = self.run_probabilistic_test(test_spec, defaults)
-            else:  # deterministic
-                result = self.run_deterministic_test(test_spec, defaults)
+        return self.run_suites([suite_name])
+    
+    def run_suites(self, suite_names: List[str]) -> List[TestResult]:
+        """
+        Run several suites. With workers > 1, every probabilistic test's
+        iteration chunks are queued on one process pool up front, so suites
+        and tests overlap; results are still reported in suite order.
+        """
+        suites = [(name, self.load_test_suite(name)) for name in suite_names]
+        
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            pending = {}
+            for suite_name, suite in suites:
+                if suite_name != "probabilistic":
+                    continue
+                defaults = suite.get("defaults", {})
+                for test_spec in suite["test_suites"]:
+                    pending[suite_name, test_spec["name"]] = self._submit_probabilistic(
+                        test_spec, defaults, suite_name
+                    )
             
-            results.append(result)
-            self.results.append(result)
+            results = []
+            for suite_name, suite in suites:
+                print(f"\n{'=' * 60}")
+                print(f"Running Test Suite: {suite_name}")
+                print(f"{'=' * 60}")
+                
+                defaults = suite.get("defaults", {})
+                for test_spec in suite["test_suites"]:
+                    if suite_name == "probabilistic":
+                        result = self._finish_probabilistic(
+                            test_spec, defaults, pending[suite_name, test_spec["name"]]
+                        )
+                    else:  # deterministic
+                        result = self.run_deterministic_test(test_spec, defaults)
+                    
+                    results.append(result)
+                    self.results.append(result)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
         
         return results
     
@@ -465,6 +654,22 @@ def main():
         "--output",
         help="Output file for JSON report"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for probabilistic iterations (0 = one per CPU, default: 1)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Root seed; results are reproducible for a given seed at any --workers"
+    )
+    parser.add_argument(
+        "--scalar",
+        action="store_true",
+        help="Feed events through the evaluator one at a time (reference path, slow)"
+    )
     
     args = parser.parse_args()
     
@@ -472,11 +677,11 @@ def main():
         parser.print_help()
         sys.exit(1)
     
-    runner = DriftTestRunner()
+    runner = DriftTestRunner(workers=args.workers, seed=args.seed, vectorized=not args.scalar)
+    print(f"Seed: {runner.seed.entropy}")
     
     if args.all:
-        runner.run_suite("probabilistic")
-        runner.run_suite("deterministic")
+        runner.run_suites(["probabilistic", "deterministic"])
     else:
         runner.run_suite(args.suite)
     
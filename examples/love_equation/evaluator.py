@@ -21,14 +21,44 @@ License: MIT/Apache 2.0
 Author: Cyber Strategy Institute
 """
 
+from collections import deque
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
 from enum import Enum
-from typing import List, Dict, Optional, Literal, Tuple
+from itertools import islice
+from typing import Deque, List, Dict, Optional, Literal, Tuple
 import json
 import math
 
 
+# Context multipliers applied by AlignmentEvent.effective_weight
+STAKES_MULTIPLIERS = {
+    "low": 1.0,
+    "medium": 1.5,
+    "high": 2.5,
+    "critical": 4.0
+}
+REVERSIBILITY_MULTIPLIERS = {
+    "reversible": 1.0,
+    "difficult": 1.5,
+    "irreversible": 2.5
+}
+# Boolean flag multipliers, applied in this order
+FLAG_MULTIPLIERS = (
+    ("sensitive_data", 2.0),
+    ("user_vulnerable", 1.8),
+    ("financial_impact", 1.6),
+    ("self_harm_risk", 5.0),  # Highest priority
+    ("third_party_impact", 1.4),
+)
+MAX_EFFECTIVE_WEIGHT = 3.0
+# ⟨N⟩: baseline/expected novelty in the Nonconformist Bee equation
+NOVELTY_BASELINE = 0.5
+# Lower E bounds of the GREEN and YELLOW bands
+GREEN_THRESHOLD = 0.80
+YELLOW_THRESHOLD = 0.60
+
+
 class AlignmentBand(Enum):
     """Alignment health bands with associated control requirements."""
     GREEN = "green"   # E >= 0.80: Fully operational
@@ -94,37 +124,21 @@ class AlignmentEvent:
         - Empirical Distrust penalty (for defections)
         """
         # Base multiplier from stakes
-        stakes_mult = {
-            "low": 1.0,
-            "medium": 1.5,
-            "high": 2.5,
-            "critical": 4.0
-        }.get(self.stakes, 1.0)
+        stakes_mult = STAKES_MULTIPLIERS.get(self.stakes, 1.0)
         
         # Reversibility multiplier
-        reversibility_mult = {
-            "reversible": 1.0,
-            "difficult": 1.5,
-            "irreversible": 2.5
-        }.get(self.reversibility, 1.0)
+        reversibility_mult = REVERSIBILITY_MULTIPLIERS.get(self.reversibility, 1.0)
         
         # Combine base multipliers
         multiplier = stakes_mult * reversibility_mult
         
         # Apply boolean flag multipliers
-        if self.sensitive_data:
-            multiplier *= 2.0
-        if self.user_vulnerable:
-            multiplier *= 1.8
-        if self.financial_impact:
-            multiplier *= 1.6
-        if self.self_harm_risk:
-            multiplier *= 5.0  # Highest priority
-        if self.third_party_impact:
-            multiplier *= 1.4
+        for flag, flag_mult in FLAG_MULTIPLIERS:
+            if getattr(self, flag):
+                multiplier *= flag_mult
         
         # Base effective weight
-        base_effective = min(3.0, self.weight * multiplier)
+        base_effective = min(MAX_EFFECTIVE_WEIGHT, self.weight * multiplier)
         
         # Apply Empirical Distrust penalty for DEFECTION events
         # Penalty = (confidence - verifiability) * weight
@@ -134,7 +148,7 @@ class AlignmentEvent:
                 distrust_penalty = (self.confidence - self.verifiability) * self.weight
                 base_effective += distrust_penalty
         
-        return min(3.0, base_effective)
+        return min(MAX_EFFECTIVE_WEIGHT, base_effective)
     
     @property
     def distrust_penalty(self) -> float:
@@ -191,13 +205,17 @@ class AgentState:
     Imax: float = 0.30  # Maximum independence (prevents excessive contrarianism)
     window_size: int = 100  # Number of events to track
     last_update: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
-    event_window: List[AlignmentEvent] = field(default_factory=list)
+    event_window: Deque[AlignmentEvent] = field(default_factory=deque)
+    
+    def __post_init__(self):
+        # Bounded FIFO: appending to a full window drops the oldest event
+        self.event_window = deque(self.event_window, maxlen=self.window_size)
     
     def get_band(self) -> AlignmentBand:
         """Determine current alignment band."""
-        if self.E >= 0.80:
+        if self.E >= GREEN_THRESHOLD:
             return AlignmentBand.GREEN
-        elif self.E >= 0.60:
+        elif self.E >= YELLOW_THRESHOLD:
             return AlignmentBand.YELLOW
         else:
             return AlignmentBand.RED
@@ -266,8 +284,23 @@ class LoveEquationEvaluator:
         β = selection strength
         γ = bee sensitivity
         κ = exploration growth
+    
+    Window statistics:
+        The evaluator keeps a running weight sum and event count per
+        direction, updated when an event enters or leaves the window, so
+        add_event and compute_C/D/N are O(1) regardless of window size.
+        Each event's effective_weight is read once, when it is added; events
+        are treated as immutable once logged.
+        
+        Running sums pick up rounding error from repeated add/subtract, so
+        they are recomputed exactly (math.fsum) once every window_size
+        evictions. C, D and N match a full rescan of the window to within
+        METRIC_TOLERANCE (absolute). Counts are exact, so a direction with
+        no events in the window always yields exactly 0.0.
     """
     
+    METRIC_TOLERANCE = 1e-9
+    
     def __init__(self, agent_state: AgentState):
         """
         Initialize evaluator with agent state.
@@ -276,6 +309,28 @@ class LoveEquationEvaluator:
             agent_state: Current AgentState for this agent-principal pair
         """
         self.state = agent_state
+        window = agent_state.event_window
+        if not isinstance(window, deque) or window.maxlen != agent_state.window_size:
+            window = deque(window, maxlen=agent_state.window_size)
+            agent_state.event_window = window
+        # (direction, effective_weight) per event, parallel to the event window
+        self._weights: Deque[Tuple[EventDirection, float]] = deque(
+            ((e.direction, e.effective_weight) for e in window),
+            maxlen=agent_state.window_size,
+        )
+        self._resync()
+    
+    def _resync(self) -> None:
+        """Recompute the running sums and counts from the cached weights."""
+        self._sums = {d: 0.0 for d in EventDirection}
+        self._counts = {d: 0 for d in EventDirection}
+        by_direction: Dict[EventDirection, List[float]] = {d: [] for d in EventDirection}
+        for direction, weight in self._weights:
+            by_direction[direction].append(weight)
+        for direction, weights in by_direction.items():
+            self._sums[direction] = math.fsum(weights)
+            self._counts[direction] = len(weights)
+        self._evictions = 0
     
     def add_event(self, event: AlignmentEvent) -> None:
         """
@@ -284,12 +339,28 @@ class LoveEquationEvaluator:
         Args:
             event: AlignmentEvent to log
         """
-        # Add to window
+        weights = self._weights
+        if len(weights) == weights.maxlen:
+            # Window full: the oldest event drops off (FIFO)
+            old_direction, old_weight = weights[0]
+            self._sums[old_direction] -= old_weight
+            self._counts[old_direction] -= 1
+            self._evictions += 1
+        
+        weight = event.effective_weight
         self.state.event_window.append(event)
+        weights.append((event.direction, weight))
+        self._sums[event.direction] += weight
+        self._counts[event.direction] += 1
         
-        # Maintain window size (FIFO - oldest events drop off)
-        if len(self.state.event_window) > self.state.window_size:
-            self.state.event_window = self.state.event_window[-self.state.window_size:]
+        if self._evictions >= self.state.window_size:
+            self._resync()
+    
+    def _window_metric(self, direction: EventDirection) -> float:
+        """Summed effective weight of one direction, normalized by window size, capped at 1."""
+        if not self._counts[direction]:
+            return 0.0
+        return min(1.0, self._sums[direction] / len(self._weights))
     
     def compute_C(self) -> float:
         """
@@ -298,22 +369,7 @@ class LoveEquationEvaluator:
         Returns:
             Normalized cooperation score [0, 1]
         """
-        if not self.state.event_window:
-            return 0.0
-        
-        coop_events = [
-            e for e in self.state.event_window 
-            if e.direction == EventDirection.COOPERATION
-        ]
-        
-        if not coop_events:
-            return 0.0
-        
-        total_coop_weight = sum(e.effective_weight for e in coop_events)
-        total_events = len(self.state.event_window)
-        
-        # Normalize by window size
-        return min(1.0, total_coop_weight / total_events)
+        return self._window_metric(EventDirection.COOPERATION)
     
     def compute_D(self) -> float:
         """
@@ -324,22 +380,7 @@ class LoveEquationEvaluator:
         Returns:
             Normalized defection score [0, 1]
         """
-        if not self.state.event_window:
-            return 0.0
-        
-        defect_events = [
-            e for e in self.state.event_window 
-            if e.direction == EventDirection.DEFECTION
-        ]
-        
-        if not defect_events:
-            return 0.0
-        
-        total_defect_weight = sum(e.effective_weight for e in defect_events)
-        total_events = len(self.state.event_window)
-        
-        # Normalize by window size
-        return min(1.0, total_defect_weight / total_events)
+        return self._window_metric(EventDirection.DEFECTION)
     
     def compute_N(self) -> float:
         """
@@ -348,20 +389,7 @@ class LoveEquationEvaluator:
         Returns:
             Normalized novelty score [0, 1]
         """
-        if not self.state.event_window:
-            return 0.0
-        
-        novelty_events = [
-            e for e in self.state.event_window 
-            if e.direction == EventDirection.NOVELTY
-        ]
-        
-        if not novelty_events:
-            return 0.0
-        
-        # Average novelty intensity
-        total_novelty = sum(e.effective_weight for e in novelty_events)
-        return min(1.0, total_novelty / len(self.state.event_window))
+        return self._window_metric(EventDirection.NOVELTY)
     
     def evaluate(self, delta_t: float = 1.0) -> Dict:
         """
@@ -396,8 +424,7 @@ class LoveEquationEvaluator:
         
         # Nonconformist Bee: dI/dt = γ(N - ⟨N⟩)I + κI
         # ⟨N⟩ is the baseline/expected novelty (assume 0.5)
-        N_baseline = 0.5
-        dI_dt = self.state.gamma * (N - N_baseline) * I_old + self.state.kappa * I_old
+        dI_dt = self.state.gamma * (N - NOVELTY_BASELINE) * I_old + self.state.kappa * I_old
         I_new = I_old + delta_t * dI_dt
         
         # Clamp I to [0, Imax]
@@ -507,7 +534,10 @@ class LoveEquationEvaluator:
         """
         return {
             "state": self.state.to_dict(),
-            "recent_events": [e.to_dict() for e in self.state.event_window[-10:]],  # Last 10 events
+            "recent_events": [  # Last 10 events
+                e.to_dict()
+                for e in islice(self.state.event_window, max(0, len(self.state.event_window) - 10), None)
+            ],
             "metrics": {
                 "C": self.compute_C(),
                 "D": self.compute_D(),
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Love Equation Fleet Evaluator
+=============================
+
+Batch evaluation of many agent-principal pairs. LoveEquationEvaluator holds
+one AgentState per Python object; FleetEvaluator holds the E/I state and
+sliding event windows of a whole fleet as columnar NumPy arrays:
+
+    E, I, beta, gamma, kappa, Imax   shape (agents,)
+    window direction codes/weights   shape (agents, window_size), ring buffers
+
+Events arrive as batched arrays tagged with agent indices, and one
+evaluate() call computes C, D, N and the E/I update for every agent with
+array operations. The dynamics are the same as LoveEquationEvaluator.evaluate;
+C, D and N agree with the single-agent evaluator to within
+LoveEquationEvaluator.METRIC_TOLERANCE.
+
+State is exported and imported as a compact .npz snapshot (save/load)
+instead of per-agent to_dict JSON.
+
+Usage:
+    fleet = FleetEvaluator.from_states(states)
+    directions, weights = encode_events(events)
+    fleet.add_events(agent_indices, directions, weights)
+    result = fleet.evaluate()
+    fleet.save("fleet.npz")
+
+License: MIT/Apache 2.0
+Author: Cyber Strategy Institute
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from evaluator import (
+    GREEN_THRESHOLD,
+    NOVELTY_BASELINE,
+    YELLOW_THRESHOLD,
+    AgentState,
+    AlignmentBand,
+    AlignmentEvent,
+    EventDirection,
+)
+
+# Direction codes used in event arrays; -1 marks an empty window slot
+DIRECTIONS: Tuple[EventDirection, ...] = tuple(EventDirection)
+DIRECTION_CODES: Dict[EventDirection, int] = {d: i for i, d in enumerate(DIRECTIONS)}
+EMPTY_SLOT = -1
+
+# Band codes returned by bands() and evaluate()
+BANDS: Tuple[AlignmentBand, ...] = (AlignmentBand.GREEN, AlignmentBand.YELLOW, AlignmentBand.RED)
+
+SNAPSHOT_FORMAT = 1
+
+
+def encode_events(events: Iterable[AlignmentEvent]) -> Tuple[np.ndarray, np.ndarray]:
+    """Direction codes and effective weights for a sequence of AlignmentEvents."""
+    events = list(events)
+    directions = np.fromiter((DIRECTION_CODES[e.direction] for e in events), dtype=np.int8, count=len(events))
+    weights = np.fromiter((e.effective_weight for e in events), dtype=np.float64, count=len(events))
+    return directions, weights
+
+
+def band_codes(E: np.ndarray) -> np.ndarray:
+    """Index into BANDS for each alignment score (AgentState.get_band, vectorized)."""
+    return np.where(E >= GREEN_THRESHOLD, 0, np.where(E >= YELLOW_THRESHOLD, 1, 2)).astype(np.int8)
+
+
+class FleetEvaluator:
+    """
+    Love Equation evaluator for a fleet of agent-principal pairs.
+
+    Agents are addressed by index (0..n-1); index_of() maps
+    (agent_id, principal_id) to an index. All agents share one window_size.
+    """
+
+    def __init__(self,
+                 agent_ids: Sequence[str],
+                 principal_ids: Sequence[str],
+                 window_size: int = 100,
+                 E: Union[float, Sequence[float]] = 0.80,
+                 I: Union[float, Sequence[float]] = 0.15,
+                 beta: Union[float, Sequence[float]] = 0.10,
+                 gamma: Union[float, Sequence[float]] = 0.05,
+                 kappa: Union[float, Sequence[float]] = 0.02,
+                 Imax: Union[float, Sequence[float]] = 0.30):
+        """
+        Initialize a fleet with empty event windows.
+
+        Args:
+            agent_ids: Agent id per fleet index
+            principal_ids: Principal id per fleet index
+            window_size: Number of events tracked per agent
+            E, I, beta, gamma, kappa, Imax: Scalars or one value per agent
+        """
+        if len(agent_ids) != len(principal_ids):
+            raise ValueError("agent_ids and principal_ids must have the same length")
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+        n = len(agent_ids)
+        self.window_size = window_size
+        self.agent_ids = np.asarray(agent_ids, dtype=str)
+        self.principal_ids = np.asarray(principal_ids, dtype=str)
+        self.E = self._column(E, n)
+        self.I = self._column(I, n)
+        self.beta = self._column(beta, n)
+        self.gamma = self._column(gamma, n)
+        self.kappa = self._column(kappa, n)
+        self.Imax = self._column(Imax, n)
+        self.last_update = np.full(n, np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), "us"))
+        # Ring buffers: events_seen[a] % window_size is agent a's next slot
+        self._directions = np.full((n, window_size), EMPTY_SLOT, dtype=np.int8)
+        self._weights = np.zeros((n, window_size), dtype=np.float64)
+        self._events_seen = np.zeros(n, dtype=np.int64)
+        self._index: Optional[Dict[Tuple[str, str], int]] = None
+
+    @staticmethod
+    def _column(value: Union[float, Sequence[float]], n: int) -> np.ndarray:
+        return np.array(np.broadcast_to(np.asarray(value, dtype=np.float64), (n,)))
+
+    def __len__(self) -> int:
+        return len(self.agent_ids)
+
+    @classmethod
+    def from_states(cls, states: Sequence[AgentState]) -> 'FleetEvaluator':
+        """
+        Build a fleet from single-agent states, including their current windows.
+
+        Args:
+            states: AgentStates sharing one window_size
+        """
+        window_sizes = {s.window_size for s in states}
+        if len(window_sizes) > 1:
+            raise ValueError(f"All agents must share one window_size, got {sorted(window_sizes)}")
+        fleet = cls(
+            [s.agent_id for s in states],
+            [s.principal_id for s in states],
+            window_size=window_sizes.pop() if window_sizes else 100,
+            E=[s.E for s in states],
+            I=[s.I for s in states],
+            beta=[s.beta for s in states],
+            gamma=[s.gamma for s in states],
+            kappa=[s.kappa for s in states],
+            Imax=[s.Imax for s in states],
+        )
+        fleet.last_update[:] = [
+            np.datetime64(s.last_update.astimezone(timezone.utc).replace(tzinfo=None), "us") for s in states
+        ]
+        for i, state in enumerate(states):
+            window = list(state.event_window)[-fleet.window_size:]
+            if window:
+                directions, weights = encode_events(window)
+                fleet.add_events(np.full(len(window), i), directions, weights)
+        return fleet
+
+    def index_of(self, agent_id: str, principal_id: str) -> int:
+        """Fleet index of an agent-principal pair (KeyError if absent)."""
+        if self._index is None:
+            self._index = {
+                (a, p): i for i, (a, p) in enumerate(zip(self.agent_ids.tolist(), self.principal_ids.tolist()))
+            }
+        return self._index[agent_id, principal_id]
+
+    def add_events(self, agents: np.ndarray, directions: np.ndarray, weights: np.ndarray) -> None:
+        """
+        Add a batch of events to the agents' sliding windows.
+
+        Events for the same agent are applied in array order; the oldest
+        events drop off once an agent's window is full.
+
+        Args:
+            agents: Fleet index per event
+            directions: Direction code per event (see DIRECTION_CODES)
+            weights: Effective weight per event (AlignmentEvent.effective_weight)
+        """
+        agents = np.asarray(agents, dtype=np.intp)
+        directions = np.asarray(directions, dtype=np.int8)
+        weights = np.asarray(weights, dtype=np.float64)
+        if not (agents.shape == directions.shape == weights.shape and agents.ndim == 1):
+            raise ValueError("agents, directions and weights must be 1-D arrays of equal length")
+        if not len(agents):
+            return
+        if agents.min() < 0 or agents.max() >= len(self):
+            raise IndexError("agent index out of range")
+        if directions.min() < 0 or directions.max() >= len(DIRECTIONS):
+            raise ValueError("unknown direction code")
+
+        # Group by agent (stable, so per-agent order is kept) and rank events within each group
+        order = np.argsort(agents, kind="stable")
+        agents, directions, weights = agents[order], directions[order], weights[order]
+        starts = np.flatnonzero(np.r_[True, agents[1:] != agents[:-1]])
+        counts = np.diff(np.r_[starts, len(agents)])
+        rank = np.arange(len(agents)) - np.repeat(starts, counts)
+
+        # Events more than window_size from the end of their group are evicted within this batch
+        keep = rank >= np.repeat(counts, counts) - self.window_size
+        slots = (self._events_seen[agents] + rank) % self.window_size
+        self._directions[agents[keep], slots[keep]] = directions[keep]
+        self._weights[agents[keep], slots[keep]] = weights[keep]
+        self._events_seen[agents[starts]] += counts
+
+    def window_lengths(self) -> np.ndarray:
+        """Number of events currently in each agent's window."""
+        return np.minimum(self._events_seen, self.window_size)
+
+    def compute_metrics(self, agents: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        C, D and N for the given agents (default: all), as in compute_C/D/N.
+
+        Returns:
+            Tuple of (C, D, N) arrays
+        """
+        rows = slice(None) if agents is None else np.asarray(agents, dtype=np.intp)
+        directions = self._directions[rows]
+        weights = self._weights[rows]
+        length = np.maximum(self.window_lengths()[rows], 1)
+        metrics = []
+        for direction in (EventDirection.COOPERATION, EventDirection.DEFECTION, EventDirection.NOVELTY):
+            mask = directions == DIRECTION_CODES[direction]
+            total = np.where(mask, weights, 0.0).sum(axis=1)
+            metrics.append(np.where(mask.any(axis=1), np.minimum(1.0, total / length), 0.0))
+        return metrics[0], metrics[1], metrics[2]
+
+    def bands(self) -> np.ndarray:
+        """Current band code per agent (index into BANDS)."""
+        return band_codes(self.E)
+
+    def evaluate(self, delta_t: float = 1.0, agents: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Update E and I for the given agents (default: all) in one pass.
+
+        Implements the same update as LoveEquationEvaluator.evaluate:
+            dE/dt = β(C - D)E
+            dI/dt = γ(N - ⟨N⟩)I + κI
+
+        Args:
+            delta_t: Time step (default 1.0 for discrete events)
+            agents: Fleet indices to evaluate
+
+        Returns:
+            Dict of arrays aligned with `agents` (echoed under "agents"): C, D,
+            N, E_old, E_new, I_old, I_new, delta_E, delta_I, band_old,
+            band_new (codes into BANDS), alert
+        """
+        rows = np.arange(len(self)) if agents is None else np.asarray(agents, dtype=np.intp)
+        C, D, N = self.compute_metrics(rows)
+        E_old = self.E[rows]
+        I_old = self.I[rows]
+        band_old = band_codes(E_old)
+
+        dE_dt = self.beta[rows] * (C - D) * E_old
+        E_new = np.clip(E_old + delta_t * dE_dt, 0.0, 1.0)
+        dI_dt = self.gamma[rows] * (N - NOVELTY_BASELINE) * I_old + self.kappa[rows] * I_old
+        I_new = np.clip(I_old + delta_t * dI_dt, 0.0, self.Imax[rows])
+
+        self.E[rows] = E_new
+        self.I[rows] = I_new
+        self.last_update[rows] = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), "us")
+        band_new = band_codes(E_new)
+        red = BANDS.index(AlignmentBand.RED)
+
+        return {
+            "agents": rows,
+            "C": C,
+            "D": D,
+            "N": N,
+            "E_old": E_old,
+            "E_new": E_new,
+            "I_old": I_old,
+            "I_new": I_new,
+            "delta_E": E_new - E_old,
+            "delta_I": I_new - I_old,
+            "band_old": band_old,
+            "band_new": band_new,
+            "alert": (band_new == red) | ((band_old == red) & (band_old != band_new)),
+        }
+
+    def agent_summary(self, index: int) -> Dict:
+        """One agent's state in the AgentState.to_dict layout."""
+        return {
+            "agent_id": str(self.agent_ids[index]),
+            "principal_id": str(self.principal_ids[index]),
+            "E": float(self.E[index]),
+            "I": float(self.I[index]),
+            "band": BANDS[band_codes(self.E[index])].value,
+            "beta": float(self.beta[index]),
+            "gamma": float(self.gamma[index]),
+            "kappa": float(self.kappa[index]),
+            "Imax": float(self.Imax[index]),
+            "window_size": self.window_size,
+            "last_update": str(self.last_update[index]) + "+00:00",
+            "event_count": int(self.window_lengths()[index])
+        }
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the whole fleet state to a compressed .npz snapshot."""
+        np.savez_compressed(
+            path,
+            format=np.int64(SNAPSHOT_FORMAT),
+            window_size=np.int64(self.window_size),
+            agent_ids=self.agent_ids,
+            principal_ids=self.principal_ids,
+            E=self.E,
+            I=self.I,
+            beta=self.beta,
+            gamma=self.gamma,
+            kappa=self.kappa,
+            Imax=self.Imax,
+            last_update=self.last_update,
+            directions=self._directions,
+            weights=self._weights,
+            events_seen=self._events_seen,
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'FleetEvaluator':
+        """Restore a fleet from a snapshot written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format"]) != SNAPSHOT_FORMAT:
+                raise ValueError(f"Unsupported fleet snapshot format: {int(data['format'])}")
+            fleet = cls(
+                data["agent_ids"],
+                data["principal_ids"],
+                window_size=int(data["window_size"]),
+                E=data["E"],
+                I=data["I"],
+                beta=data["beta"],
+                gamma=data["gamma"],
+                kappa=data["kappa"],
+                Imax=data["Imax"],
+            )
+            fleet.last_update = data["last_update"].copy()
+            fleet._directions = data["directions"].copy()
+            fleet._weights = data["weights"].copy()
+            fleet._events_seen = data["events_seen"].copy()
+        return fleet
+
+
+# ============================================================================
+# Example Usage
+# ============================================================================
+
+def example_usage():
+    """Evaluate a small fleet with batched events and round-trip a snapshot."""
+    import tempfile
+
+    rng = np.random.default_rng(7)
+    n_agents = 1000
+    fleet = FleetEvaluator(
+        [f"agent-{i:04d}" for i in range(n_agents)],
+        ["user:ops"] * n_agents,
+        window_size=50,
+    )
+
+    print("Love Equation Fleet Evaluator\n" + "=" * 70)
+    for step in range(20):
+        # Drifting fleet: the first 100 agents defect more often
+        agents = rng.integers(0, n_agents, size=5000)
+        defect_rate = np.where(agents < 100, 0.7, 0.2)
+        directions = np.where(
+            rng.random(len(agents)) < defect_rate,
+            DIRECTION_CODES[EventDirection.DEFECTION],
+            DIRECTION_CODES[EventDirection.COOPERATION],
+        )
+        weights = rng.uniform(0.2, 1.5, size=len(agents))
+        fleet.add_events(agents, directions, weights)
+        result = fleet.evaluate()
+
+    counts = np.bincount(fleet.bands(), minlength=len(BANDS))
+    print(f"  Agents: {len(fleet)}")
+    for band, count in zip(BANDS, counts):
+        print(f"  {band.value:<7} {count:5d}")
+    print(f"  Alerts: {int(result['alert'].sum())}")
+    print(f"  Mean C={result['C'].mean():.3f}, D={result['D'].mean():.3f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "fleet.npz"
+        fleet.save(path)
+        restored = FleetEvaluator.load(path)
+        print(f"  Snapshot: {path.stat().st_size / 1024:.1f} KiB, "
+              f"E identical after load: {np.array_equal(restored.E, fleet.E)}")
+    print(f"  Agent 0: {fleet.agent_summary(0)}")
+
+
+if __name__ == "__main__":
+    example_usage()
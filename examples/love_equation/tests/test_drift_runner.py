@@ -0,0 +1,87 @@
+"""
+Drift test runner tests.
+
+The probabilistic runner computes E/I dynamics for all iterations with array
+operations; these tests check it against the scalar path (every event fed
+through LoveEquationEvaluator) and check that --workers does not change
+results for a fixed seed.
+
+Run: python -m pytest -q examples/love_equation/tests
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+yaml = pytest.importorskip("yaml")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from drift_test_runner import (
+    DriftTestRunner,
+    generate_event_stream,
+)
+
+SUITES = Path(__file__).parent.parent / "drift_tests"
+SEED = 20260212
+STATS = ("E_mean", "E_std", "I_mean", "I_std", "E_drift", "I_drift")
+
+
+@pytest.fixture
+def small_suites(tmp_path):
+    """The shipped suites with fewer events per iteration, to keep the scalar path quick."""
+    for name in ("probabilistic", "deterministic"):
+        suite = yaml.safe_load((SUITES / f"{name}.yaml").read_text(encoding="utf-8"))
+        suite["defaults"]["event_count"] = 400
+        suite["defaults"]["test_iterations"] = 7 if name == "probabilistic" else 3
+        (tmp_path / f"{name}.yaml").write_text(yaml.safe_dump(suite), encoding="utf-8")
+    return tmp_path
+
+
+def _run(test_dir: Path, **kwargs):
+    runner = DriftTestRunner(test_dir, seed=SEED, **kwargs)
+    return runner.run_suite("probabilistic")
+
+
+class TestVectorizedDriftRunner:
+    """Array dynamics must reproduce the per-event evaluator path."""
+
+    def test_summary_statistics_match_scalar_path(self, small_suites):
+        scalar = _run(small_suites, vectorized=False)
+        vectorized = _run(small_suites)
+        assert [r.test_name for r in scalar] == [r.test_name for r in vectorized]
+        for s, v in zip(scalar, vectorized):
+            for key in STATS:
+                assert v.actual_outcome[key] == pytest.approx(s.actual_outcome[key], rel=1e-9, abs=1e-9), (
+                    s.test_name, key
+                )
+            assert v.actual_outcome["all_bands"] == s.actual_outcome["all_bands"]
+            assert v.passed == s.passed
+
+    def test_results_identical_across_worker_counts(self, small_suites):
+        single = _run(small_suites)
+        pooled = _run(small_suites, workers=3)
+        for a, b in zip(single, pooled):
+            assert a.actual_outcome == b.actual_outcome, a.test_name
+
+    def test_seed_controls_event_streams(self, small_suites):
+        first = _run(small_suites)
+        again = _run(small_suites)
+        other = DriftTestRunner(small_suites, seed=SEED + 1).run_suite("probabilistic")
+        assert [r.actual_outcome for r in first] == [r.actual_outcome for r in again]
+        assert [r.actual_outcome for r in first] != [r.actual_outcome for r in other]
+
+    def test_effective_weights_match_alignment_events(self):
+        suite = yaml.safe_load((SUITES / "probabilistic.yaml").read_text(encoding="utf-8"))
+        for spec in suite["test_suites"]:
+            stream = generate_event_stream(spec, 500, np.random.default_rng(SEED))
+            expected = [e.effective_weight for e in stream.events("agent")]
+            assert stream.effective_weights().tolist() == expected, spec["name"]
+
+    def test_deterministic_suite_is_reproducible(self, small_suites):
+        results = DriftTestRunner(small_suites).run_suite("deterministic")
+        assert results
+        assert all(r.drift_percentage == 0.0 for r in results)
@@ -0,0 +1,160 @@
+"""
+Love Equation Evaluator tests.
+
+The sliding window keeps running sums per direction instead of rescanning
+the window; these tests check it against the original rescan implementation
+over random event streams.
+
+Run: python -m pytest -q examples/love_equation/tests
+"""
+from __future__ import annotations
+
+import random
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from evaluator import (
+    AgentState,
+    AlignmentEvent,
+    EventDirection,
+    LoveEquationEvaluator,
+)
+
+TOL = LoveEquationEvaluator.METRIC_TOLERANCE
+DIRECTIONS = list(EventDirection)
+STAKES = ["low", "medium", "high", "critical"]
+REVERSIBILITY = ["reversible", "difficult", "irreversible"]
+
+
+def _random_event(rng: random.Random, i: int) -> AlignmentEvent:
+    return AlignmentEvent(
+        event_id=f"evt_{i}",
+        agent_id="agent-1",
+        principal_id="user:test",
+        timestamp=datetime.now(timezone.utc),
+        direction=rng.choice(DIRECTIONS),
+        weight=rng.random(),
+        category="TEST",
+        source="test",
+        stakes=rng.choice(STAKES),
+        reversibility=rng.choice(REVERSIBILITY),
+        sensitive_data=rng.random() < 0.2,
+        user_vulnerable=rng.random() < 0.1,
+        financial_impact=rng.random() < 0.1,
+        self_harm_risk=rng.random() < 0.02,
+        third_party_impact=rng.random() < 0.1,
+        verifiability=rng.random(),
+        confidence=rng.random(),
+    )
+
+
+def _rescan(window, direction: EventDirection) -> float:
+    """The original O(window) metric: sum effective weights of one direction, normalize, cap."""
+    events = list(window)
+    if not events:
+        return 0.0
+    matching = [e for e in events if e.direction == direction]
+    if not matching:
+        return 0.0
+    return min(1.0, sum(e.effective_weight for e in matching) / len(events))
+
+
+class LegacyEvaluator(LoveEquationEvaluator):
+    """The original implementation: list window trimmed by slicing, metrics by rescan."""
+
+    def __init__(self, agent_state: AgentState):
+        self.state = agent_state
+        self.state.event_window = list(agent_state.event_window)
+
+    def add_event(self, event: AlignmentEvent) -> None:
+        self.state.event_window.append(event)
+        if len(self.state.event_window) > self.state.window_size:
+            self.state.event_window = self.state.event_window[-self.state.window_size:]
+
+    def compute_C(self) -> float:
+        return _rescan(self.state.event_window, EventDirection.COOPERATION)
+
+    def compute_D(self) -> float:
+        return _rescan(self.state.event_window, EventDirection.DEFECTION)
+
+    def compute_N(self) -> float:
+        return _rescan(self.state.event_window, EventDirection.NOVELTY)
+
+
+class TestSlidingWindowStatistics:
+    """Running-sum metrics must track a full rescan of the window."""
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_metrics_match_rescan_over_random_streams(self, seed):
+        rng = random.Random(seed)
+        window_size = rng.choice([1, 2, 3, 7, 50, 100])
+        evaluator = LoveEquationEvaluator(AgentState("agent-1", "user:test", window_size=window_size))
+        for i in range(window_size * 4 + rng.randrange(20)):
+            evaluator.add_event(_random_event(rng, i))
+            window = evaluator.state.event_window
+            assert len(window) == min(i + 1, window_size)
+            for direction, metric in (
+                (EventDirection.COOPERATION, evaluator.compute_C()),
+                (EventDirection.DEFECTION, evaluator.compute_D()),
+                (EventDirection.NOVELTY, evaluator.compute_N()),
+            ):
+                expected = _rescan(window, direction)
+                assert metric == pytest.approx(expected, rel=0, abs=TOL)
+                if expected == 0.0:
+                    assert metric == 0.0
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_evaluate_trajectory_matches_legacy(self, seed):
+        rng = random.Random(1000 + seed)
+        window_size = rng.choice([5, 25, 100])
+        fast = LoveEquationEvaluator(AgentState("agent-1", "user:test", window_size=window_size))
+        legacy = LegacyEvaluator(AgentState("agent-1", "user:test", window_size=window_size))
+        for i in range(500):
+            event = _random_event(rng, i)
+            fast.add_event(event)
+            legacy.add_event(event)
+            got, want = fast.evaluate(), legacy.evaluate()
+            for key in ("C", "D", "N", "E_new", "I_new"):
+                assert got[key] == pytest.approx(want[key], rel=0, abs=TOL), key
+            assert got["window_size"] == want["window_size"]
+        assert [e.event_id for e in fast.state.event_window] == [
+            e.event_id for e in legacy.state.event_window
+        ]
+
+    def test_single_direction_stream_never_drifts_from_zero(self):
+        """Long streams of one direction leave the others at exactly 0.0."""
+        rng = random.Random(7)
+        evaluator = LoveEquationEvaluator(AgentState("agent-1", "user:test", window_size=10))
+        for i in range(200):
+            event = _random_event(rng, i)
+            event.direction = EventDirection.NOVELTY if i < 100 else EventDirection.COOPERATION
+            evaluator.add_event(event)
+        assert evaluator.compute_N() == 0.0
+        assert evaluator.compute_D() == 0.0
+        assert evaluator.compute_C() == pytest.approx(
+            _rescan(evaluator.state.event_window, EventDirection.COOPERATION), rel=0, abs=TOL
+        )
+
+    def test_prepopulated_window_is_trimmed_and_counted(self):
+        rng = random.Random(3)
+        events = [_random_event(rng, i) for i in range(30)]
+        state = AgentState("agent-1", "user:test", window_size=10, event_window=list(events))
+        evaluator = LoveEquationEvaluator(state)
+        assert [e.event_id for e in state.event_window] == [e.event_id for e in events[-10:]]
+        assert evaluator.compute_D() == pytest.approx(
+            _rescan(events[-10:], EventDirection.DEFECTION), rel=0, abs=TOL
+        )
+
+    def test_export_state_keeps_last_ten_events(self):
+        rng = random.Random(11)
+        evaluator = LoveEquationEvaluator(AgentState("agent-1", "user:test", window_size=25))
+        for i in range(40):
+            evaluator.add_event(_random_event(rng, i))
+        exported = evaluator.export_state()
+        assert [e["event_id"] for e in exported["recent_events"]] == [f"evt_{i}" for i in range(30, 40)]
+        assert exported["state"]["event_count"] == 25
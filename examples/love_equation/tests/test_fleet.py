@@ -0,0 +1,138 @@
+"""
+Fleet evaluator tests.
+
+FleetEvaluator must track a set of independent LoveEquationEvaluators fed
+the same events, and its .npz snapshots must round-trip exactly.
+
+Run: python -m pytest -q examples/love_equation/tests
+"""
+from __future__ import annotations
+
+import random
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from evaluator import AgentState, EventDirection, LoveEquationEvaluator
+from fleet import BANDS, FleetEvaluator, encode_events
+from test_evaluator import _random_event
+
+TOL = LoveEquationEvaluator.METRIC_TOLERANCE
+
+
+def _states(rng: random.Random, n: int, window_size: int) -> list[AgentState]:
+    return [
+        AgentState(
+            f"agent-{i}", "user:test",
+            E=rng.uniform(0.4, 1.0), I=rng.uniform(0.0, 0.3),
+            beta=rng.choice([0.1, 0.2]), window_size=window_size,
+        )
+        for i in range(n)
+    ]
+
+
+def _assert_matches(fleet: FleetEvaluator, evaluators: list[LoveEquationEvaluator]) -> None:
+    C, D, N = fleet.compute_metrics()
+    for i, ev in enumerate(evaluators):
+        assert C[i] == pytest.approx(ev.compute_C(), rel=0, abs=TOL)
+        assert D[i] == pytest.approx(ev.compute_D(), rel=0, abs=TOL)
+        assert N[i] == pytest.approx(ev.compute_N(), rel=0, abs=TOL)
+        assert fleet.E[i] == pytest.approx(ev.state.E, rel=0, abs=TOL)
+        assert fleet.I[i] == pytest.approx(ev.state.I, rel=0, abs=TOL)
+        assert BANDS[fleet.bands()[i]] == ev.state.get_band()
+        assert fleet.window_lengths()[i] == len(ev.state.event_window)
+
+
+class TestFleetEvaluator:
+    """Batched columnar state must match one evaluator per agent."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_single_agent_evaluators(self, seed):
+        rng = random.Random(seed)
+        window_size = rng.choice([3, 7, 20])
+        states = _states(rng, 40, window_size)
+        fleet = FleetEvaluator.from_states(states)
+        evaluators = [LoveEquationEvaluator(s) for s in states]
+
+        for step in range(30):
+            # Batches regularly hold more than window_size events for one agent
+            agents = [rng.randrange(40) if rng.random() < 0.7 else 0 for _ in range(rng.randrange(1, 120))]
+            events = [_random_event(rng, step * 1000 + k) for k in range(len(agents))]
+            directions, weights = encode_events(events)
+            fleet.add_events(np.array(agents), directions, weights)
+            for agent, event in zip(agents, events):
+                evaluators[agent].add_event(event)
+
+            touched = sorted(set(agents))
+            result = fleet.evaluate(agents=np.array(touched))
+            for j, agent in enumerate(touched):
+                expected = evaluators[agent].evaluate()
+                for key in ("C", "D", "N", "E_new", "I_new"):
+                    assert result[key][j] == pytest.approx(expected[key], rel=0, abs=TOL), key
+                assert BANDS[result["band_new"][j]].value == expected["band_new"]
+                assert bool(result["alert"][j]) == bool(expected["alert"])
+            _assert_matches(fleet, evaluators)
+
+        # A full-fleet pass also updates agents with no new events, as evaluate() does
+        fleet.evaluate()
+        for ev in evaluators:
+            ev.evaluate()
+        _assert_matches(fleet, evaluators)
+
+    def test_alerts_on_leaving_red_like_single_agent(self):
+        state = AgentState("agent-0", "user:test", E=0.55, beta=0.5, window_size=10)
+        fleet = FleetEvaluator.from_states([state])
+        evaluator = LoveEquationEvaluator(state)
+        event = replace(_random_event(random.Random(0), 0), direction=EventDirection.COOPERATION, weight=1.0)
+        fleet.add_events(np.array([0]), *encode_events([event]))
+        evaluator.add_event(event)
+
+        result, expected = fleet.evaluate(), evaluator.evaluate()
+        assert expected["band_transition"] == "red -> green"
+        assert expected["alert"]
+        assert result["alert"].tolist() == [True]
+
+    def test_from_states_loads_existing_windows(self):
+        rng = random.Random(42)
+        states = _states(rng, 5, 10)
+        for state in states:
+            for k in range(rng.randrange(0, 25)):
+                state.event_window.append(_random_event(rng, k))
+        fleet = FleetEvaluator.from_states(states)
+        _assert_matches(fleet, [LoveEquationEvaluator(s) for s in states])
+
+    def test_snapshot_round_trip(self, tmp_path):
+        rng = random.Random(9)
+        fleet = FleetEvaluator.from_states(_states(rng, 200, 16))
+        agents = np.array([rng.randrange(200) for _ in range(3000)])
+        directions, weights = encode_events(_random_event(rng, k) for k in range(len(agents)))
+        fleet.add_events(agents, directions, weights)
+        fleet.evaluate()
+
+        path = tmp_path / "fleet.npz"
+        fleet.save(path)
+        restored = FleetEvaluator.load(path)
+        assert restored.window_size == fleet.window_size
+        for attr in ("agent_ids", "principal_ids", "E", "I", "beta", "gamma", "kappa", "Imax", "last_update",
+                     "_directions", "_weights", "_events_seen"):
+            assert np.array_equal(getattr(restored, attr), getattr(fleet, attr)), attr
+        assert restored.index_of("agent-17", "user:test") == 17
+
+        # Both copies evolve identically after the round trip
+        fleet.add_events(agents[:500], directions[:500], weights[:500])
+        restored.add_events(agents[:500], directions[:500], weights[:500])
+        a, b = fleet.evaluate(), restored.evaluate()
+        for key in ("C", "D", "N", "E_new", "I_new"):
+            assert np.array_equal(a[key], b[key]), key
+
+    def test_rejects_mixed_window_sizes_and_bad_indices(self):
+        with pytest.raises(ValueError):
+            FleetEvaluator.from_states([AgentState("a", "p", window_size=5), AgentState("b", "p", window_size=6)])
+        fleet = FleetEvaluator(["a"], ["p"])
+        with pytest.raises(IndexError):
+            fleet.add_events(np.array([1]), np.array([0]), np.array([0.5]))
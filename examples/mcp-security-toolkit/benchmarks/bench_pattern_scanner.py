@@ -0,0 +1,119 @@
+"""
+AI SAFE2 MCP Security Toolkit — PatternScanner Benchmark
+Times PatternScanner.scan_file over a generated ~5 MB source file with ~10k
+pattern matches, comparing the original per-match prefix count (and nested
+CTI-001 loop) with the newline-offset index, and checks both produce the
+same findings.
+
+Run: python examples/mcp-security-toolkit/benchmarks/bench_pattern_scanner.py [--mb 5] [--matches 10000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from aisafe2_mcp_tools.scan import pattern_scanner
+from aisafe2_mcp_tools.scan.pattern_scanner import (
+    _CTI_MAX_LINE_GAP,
+    _DISCLOSURE_VERBS,
+    _RETRIEVAL_VERBS,
+    _SANITIZE_CALL,
+    PatternScanner,
+)
+
+FILLER = [
+    "    value = compute_cell(row_index, column_index, scale=factor)  # layout pass",
+    "    rows = session.query(Model).filter(Model.owner == user).all()",
+    "    payload = json.dumps({'id': item.id, 'tags': sorted(item.tags)})",
+    "    path = os.path.join(base_dir, name.lower(), str(version))",
+]
+MATCHES = [
+    "    result = get_file(path)",
+    "    send_email(to=addr, body=result)",
+    "    clean, _ = sanitize_value(result, 'get_file')",
+    "    post_webhook(url, payload)",
+    "    target = os.path.join(base_dir, request.args['name'])",
+    "    eval(expression)",
+    "    agents = [spawn_agent(c) for c in cfgs]",
+    "    memory_store = {}",
+]
+
+
+class PrefixCountIndex:
+    """The original line lookup: count newlines in the source prefix per match."""
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+
+    def line_of(self, offset: int) -> int:
+        return self.source[:offset].count("\n") + 1
+
+
+class LegacyScanner(PatternScanner):
+    """The original CTI-001 check: every retrieval against every disclosure."""
+
+    def _check_cti001(self, source, filepath, lines, index=None):
+        retrieval_hits = [(m, source[:m.start()].count("\n") + 1) for m in _RETRIEVAL_VERBS.finditer(source)]
+        disclosure_hits = [(m, source[:m.start()].count("\n") + 1) for m in _DISCLOSURE_VERBS.finditer(source)]
+        seen_lines: set[int] = set()
+        for r_match, r_line in retrieval_hits:
+            for d_match, d_line in disclosure_hits:
+                if d_line <= r_line or d_line - r_line > _CTI_MAX_LINE_GAP:
+                    continue
+                if _SANITIZE_CALL.search(source[r_match.end():d_match.start()]):
+                    continue
+                if r_line in seen_lines:
+                    continue
+                seen_lines.add(r_line)
+                yield self._make_finding("CTI-001", "medium", "", "", "", filepath, r_line, lines)
+
+
+def build_source(target_bytes: int, n_matches: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    avg_line = sum(len(line) + 1 for line in FILLER) / len(FILLER)
+    n_lines = max(int(target_bytes / avg_line), n_matches)
+    match_at = set(rng.sample(range(n_lines), n_matches))
+    out = ["def generated(self, request, item, user, session):"]
+    for i in range(n_lines):
+        out.append(rng.choice(MATCHES) if i in match_at else rng.choice(FILLER))
+    return "\n".join(out) + "\n"
+
+
+def run(scanner: PatternScanner, source: str) -> tuple[list[tuple], float]:
+    lines = source.splitlines()
+    start = time.perf_counter()
+    findings = [(f.finding_id, f.line) for f in scanner.scan_file(source, "server.py", lines)]
+    return findings, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=float, default=5.0)
+    parser.add_argument("--matches", type=int, default=10_000)
+    args = parser.parse_args()
+
+    source = build_source(int(args.mb * 1024 * 1024), args.matches)
+
+    indexed, indexed_time = run(PatternScanner(), source)
+    original_index = pattern_scanner._LineIndex
+    pattern_scanner._LineIndex = PrefixCountIndex
+    try:
+        legacy, legacy_time = run(LegacyScanner(), source)
+    finally:
+        pattern_scanner._LineIndex = original_index
+    assert indexed == legacy, "findings differ from the prefix-count scanner"
+
+    print(f"Source:             {len(source) / 1e6:.1f} MB, {source.count(chr(10)):,} lines, "
+          f"{args.matches:,} match lines")
+    print(f"Findings:           {len(indexed):,} (identical)")
+    print(f"Prefix count:       {legacy_time:8.3f}s")
+    print(f"Newline index:      {indexed_time:8.3f}s  ({legacy_time / max(indexed_time, 1e-9):.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ Detection limits (documented per P2 requirement):
 from __future__ import annotations
 
 import re
+from bisect import bisect_left, bisect_right
 from typing import Iterator
 
 from aisafe2_mcp_tools.scan.findings import Finding
@@ -43,6 +44,28 @@ _SANITIZE_CALL = re.compile(r'\bsanitize_value\s*\(', re.IGNORECASE)
 _CTI_MAX_LINE_GAP = 15
 
 
+class _LineIndex:
+    """
+    Offsets of every newline in a source file, computed once per file.
+    line_of() is a bisect, so resolving n matches costs O(n log lines)
+    instead of rescanning the source prefix for each match.
+    """
+
+    __slots__ = ("newlines",)
+
+    def __init__(self, source: str) -> None:
+        newlines = []
+        pos = source.find("\n")
+        while pos != -1:
+            newlines.append(pos)
+            pos = source.find("\n", pos + 1)
+        self.newlines = newlines
+
+    def line_of(self, offset: int) -> int:
+        """1-based line number of the character at offset."""
+        return bisect_left(self.newlines, offset) + 1
+
+
 # ── Critical patterns — RCE class ─────────────────────────────────────────────
 # These require manual review. auto_fixable is always False.
 # Correct fix depends on server's intended behavior.
@@ -394,10 +417,11 @@ class PatternScanner:
         lines: list[str],
     ) -> Iterator[Finding]:
         """Scan one file with all pattern classes. Yields Finding objects."""
-        yield from self._scan_critical(source, filepath, lines)
-        yield from self._scan_high(source, filepath, lines)
-        yield from self._scan_medium(source, filepath, lines)
-        yield from self._scan_low(source, filepath, lines)
+        index = _LineIndex(source)
+        yield from self._scan_critical(source, filepath, lines, index)
+        yield from self._scan_high(source, filepath, lines, index)
+        yield from self._scan_medium(source, filepath, lines, index)
+        yield from self._scan_low(source, filepath, lines, index)
 
     def _match_to_finding(
         self,
@@ -412,8 +436,10 @@ class PatternScanner:
         cve_refs: list[str],
         remediation: str,
         auto_fixable: bool = False,
+        line_no: int | None = None,
     ) -> Finding:
-        line_no = source[:m.start()].count("\n") + 1
+        if line_no is None:
+            line_no = source.count("\n", 0, m.start()) + 1
         snippet = lines[line_no - 1].strip()[:120] if line_no <= len(lines) else ""
         return Finding(
             finding_id=finding_id,
@@ -461,48 +487,53 @@ class PatternScanner:
         )
 
     def _scan_critical(
-        self, source: str, filepath: str, lines: list[str]
+        self, source: str, filepath: str, lines: list[str], index: _LineIndex | None = None
     ) -> Iterator[Finding]:
+        index = index or _LineIndex(source)
         seen: set[tuple] = set()
         for finding_id, pattern, title, desc, cves, remediation in CRITICAL_PATTERNS:
             for m in pattern.finditer(source):
-                key = (finding_id, source[:m.start()].count("\n") + 1)
+                line_no = index.line_of(m.start())
+                key = (finding_id, line_no)
                 if key in seen:
                     continue
                 seen.add(key)
                 yield self._match_to_finding(
                     m, source, filepath, lines,
-                    finding_id, "critical", title, desc, cves, remediation, False,
+                    finding_id, "critical", title, desc, cves, remediation, False, line_no,
                 )
 
     def _scan_high(
-        self, source: str, filepath: str, lines: list[str]
+        self, source: str, filepath: str, lines: list[str], index: _LineIndex | None = None
     ) -> Iterator[Finding]:
+        index = index or _LineIndex(source)
         seen: set[tuple] = set()
         for finding_id, pattern, title, desc, cves, remediation, auto_fix in HIGH_PATTERNS:
             for m in pattern.finditer(source):
-                key = (finding_id, source[:m.start()].count("\n") + 1)
+                line_no = index.line_of(m.start())
+                key = (finding_id, line_no)
                 if key in seen:
                     continue
                 seen.add(key)
                 yield self._match_to_finding(
                     m, source, filepath, lines,
-                    finding_id, "high", title, desc, cves, remediation, auto_fix,
+                    finding_id, "high", title, desc, cves, remediation, auto_fix, line_no,
                 )
                 break  # One high finding per pattern per file
 
     def _scan_medium(
-        self, source: str, filepath: str, lines: list[str]
+        self, source: str, filepath: str, lines: list[str], index: _LineIndex | None = None
     ) -> Iterator[Finding]:
         """
         Scan medium-severity patterns. Includes two special-case controls:
           SWM-001: Skips comment-only lines to reduce false positives.
           CTI-001: Uses proximity-based detection instead of DOTALL regex.
         """
+        index = index or _LineIndex(source)
         seen: set[tuple] = set()
         for finding_id, pattern, title, desc, cves, remediation, auto_fix in MEDIUM_PATTERNS:
             for m in pattern.finditer(source):
-                line_no = source[:m.start()].count("\n") + 1
+                line_no = index.line_of(m.start())
 
                 # SWM-001: skip matches on comment-only lines
                 if finding_id == "SWM-001":
@@ -516,14 +547,14 @@ class PatternScanner:
                 seen.add(key)
                 yield self._match_to_finding(
                     m, source, filepath, lines,
-                    finding_id, "medium", title, desc, cves, remediation, auto_fix,
+                    finding_id, "medium", title, desc, cves, remediation, auto_fix, line_no,
                 )
 
         # CTI-001: proximity-based retrieval-to-disclosure chain detection
-        yield from self._check_cti001(source, filepath, lines)
+        yield from self._check_cti001(source, filepath, lines, index)
 
     def _check_cti001(
-        self, source: str, filepath: str, lines: list[str]
+        self, source: str, filepath: str, lines: list[str], index: _LineIndex | None = None
     ) -> Iterator[Finding]:
         """
         Detect MCP-UPD retrieval-to-disclosure chains (MCP-9).
@@ -535,6 +566,10 @@ class PatternScanner:
 
         This avoids the false positives of a file-wide DOTALL regex, which would
         match retrieval and disclosure calls in completely unrelated functions.
+
+        Disclosure lines are sorted (finditer order), so the disclosures within
+        the gap after a retrieval are one bisect window, and the first
+        sanitize_value() call after the retrieval is another bisect.
         """
         _TITLE = "Unguarded retrieval-to-disclosure chain — verify MCP-UPD protection"
         _DESC = (
@@ -555,31 +590,30 @@ class PatternScanner:
             "See AI SAFE2 v3.0 CP.5.MCP-9 (Context-Tool Isolation) and fixes/CTI-001.template."
         )
 
-        retrieval_hits = [
-            (m, source[:m.start()].count("\n") + 1)
-            for m in _RETRIEVAL_VERBS.finditer(source)
-        ]
-        disclosure_hits = [
-            (m, source[:m.start()].count("\n") + 1)
-            for m in _DISCLOSURE_VERBS.finditer(source)
-        ]
+        index = index or _LineIndex(source)
+        disclosure_starts = [m.start() for m in _DISCLOSURE_VERBS.finditer(source)]
+        disclosure_lines = [index.line_of(pos) for pos in disclosure_starts]
+        sanitize_spans = [m.span() for m in _SANITIZE_CALL.finditer(source)]
+        sanitize_starts = [start for start, _ in sanitize_spans]
 
         seen_lines: set[int] = set()
-        for r_match, r_line in retrieval_hits:
-            for d_match, d_line in disclosure_hits:
-                if d_line <= r_line:
-                    continue  # disclosure before retrieval — not the attack pattern
-                gap = d_line - r_line
-                if gap > _CTI_MAX_LINE_GAP:
-                    continue  # too far apart to be the same logical chain
-
-                # Check for sanitize_value between retrieval and disclosure
-                between = source[r_match.end():d_match.start()]
-                if _SANITIZE_CALL.search(between):
-                    continue  # sanitized — no finding
-
-                if r_line in seen_lines:
-                    continue
+        for r_match in _RETRIEVAL_VERBS.finditer(source):
+            r_line = index.line_of(r_match.start())
+            if r_line in seen_lines:
+                continue
+            # Disclosures strictly after the retrieval line and within the gap
+            lo = bisect_right(disclosure_lines, r_line)
+            hi = bisect_right(disclosure_lines, r_line + _CTI_MAX_LINE_GAP)
+            if lo == hi:
+                continue
+            # sanitize_value calls never overlap, so the first one starting after
+            # the retrieval is also the first to end; it guards every disclosure
+            # that starts at or after its end.
+            s = bisect_left(sanitize_starts, r_match.end())
+            guard_end = sanitize_spans[s][1] if s < len(sanitize_spans) else None
+            for d in range(lo, hi):
+                if guard_end is not None and guard_end <= disclosure_starts[d]:
+                    break  # sanitized — this and all later disclosures are guarded
                 seen_lines.add(r_line)
 
                 yield self._make_finding(
@@ -592,10 +626,12 @@ class PatternScanner:
                     line_no=r_line,
                     lines=lines,
                 )
+                break
 
     def _scan_low(
-        self, source: str, filepath: str, lines: list[str]
+        self, source: str, filepath: str, lines: list[str], index: _LineIndex | None = None
     ) -> Iterator[Finding]:
+        index = index or _LineIndex(source)
         seen: set[tuple] = set()
         for finding_id, pattern, title, desc, cves, remediation in LOW_PATTERNS:
             for m in pattern.finditer(source):
@@ -606,4 +642,5 @@ class PatternScanner:
                 yield self._match_to_finding(
                     m, source, filepath, lines,
                     finding_id, "low", title, desc, cves, remediation, False,
+                    index.line_of(m.start()),
                 )
@@ -72,7 +72,18 @@ def stdio(command, audit_log, scan_inputs, scan_outputs, block, rate_limit):
               help="Max requests per hour per IP (default: 100)")
 @click.option("--pin-schema", is_flag=True, default=False,
               help="MCP-11: Record tools/list hash at startup and alert on changes (schema temporal profiling)")
-def proxy(target_url, token, local_port, scan_inputs, scan_outputs, audit_log, rate_limit, pin_schema):
+@click.option("--max-connections", default=100, type=int,
+              help="Max concurrent upstream connections (default: 100)")
+@click.option("--max-keepalive", default=20, type=int,
+              help="Idle upstream connections kept open for reuse (default: 20)")
+@click.option("--keepalive-expiry", default=30.0, type=float,
+              help="Seconds an idle upstream connection is kept (default: 30)")
+@click.option("--upstream-timeout", default=30.0, type=float,
+              help="Upstream read/write timeout in seconds (default: 30)")
+@click.option("--connect-timeout", default=10.0, type=float,
+              help="Upstream connect timeout in seconds (default: 10)")
+def proxy(target_url, token, local_port, scan_inputs, scan_outputs, audit_log, rate_limit, pin_schema,
+          max_connections, max_keepalive, keepalive_expiry, upstream_timeout, connect_timeout):
     """
     Run a local HTTP proxy wrapping a remote MCP server.
 
@@ -85,7 +96,7 @@ def proxy(target_url, token, local_port, scan_inputs, scan_outputs, audit_log, r
     Claude Code config:
       {"type": "http", "url": "http://localhost:8080/proxy"}
     """
-    from aisafe2_mcp_tools.wrap.proxy import run_proxy
+    from aisafe2_mcp_tools.wrap.proxy import UpstreamPoolConfig, run_proxy
     try:
         asyncio.run(run_proxy(
             target_url=target_url,
@@ -96,6 +107,13 @@ def proxy(target_url, token, local_port, scan_inputs, scan_outputs, audit_log, r
             audit_log_path=audit_log,
             rate_limit=rate_limit,
             pin_schema=pin_schema,
+            pool=UpstreamPoolConfig(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+                timeout=upstream_timeout,
+                connect_timeout=connect_timeout,
+            ),
         ))
     except KeyboardInterrupt:
         pass
@@ -13,15 +13,21 @@ any external MCP HTTP server. It provides:
 Connect Claude Code to http://127.0.0.1:{local_port}/proxy instead of
 the real server URL.
 
+All upstream calls share one pooled httpx.AsyncClient, opened in the app's
+lifespan and closed on shutdown, so keepalive connections are reused across
+proxied calls instead of opening a fresh TCP (and TLS) connection per call.
+
 Supports: MCP streamable-http (JSON-RPC over POST)
 Limitation: SSE streaming not supported (roadmap item for v1.1)
 """
 from __future__ import annotations
 
+import contextlib
 import hashlib
 import json
 import sys
 from collections import defaultdict
+from dataclasses import dataclass
 
 import structlog
 
@@ -32,6 +38,29 @@ from aisafe2_mcp_tools.wrap.scanner import MessageScanner
 log = structlog.get_logger()
 
 
+@dataclass(frozen=True)
+class UpstreamPoolConfig:
+    """Connection pool and timeout settings for the shared upstream client."""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 30.0
+    connect_timeout: float = 10.0
+
+    def build_client(self, headers: dict[str, str]):
+        import httpx
+        return httpx.AsyncClient(
+            headers=headers,
+            verify=True,
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        )
+
+
 async def run_proxy(
     target_url: str,
     token: str | None,
@@ -41,6 +70,7 @@ async def run_proxy(
     audit_log_path: str | None,
     rate_limit: int,
     pin_schema: bool = False,
+    pool: UpstreamPoolConfig | None = None,
 ) -> None:
     """
     Start the HTTP proxy server.
@@ -53,13 +83,11 @@ async def run_proxy(
         scan_outputs:    Scan inbound tool responses for injection
         audit_log_path:  Path to JSONL audit log file (None to disable)
         rate_limit:      Max requests per hour per IP (0 to disable)
+        pool:            Upstream connection pool settings (defaults if None)
     """
     try:
-        import httpx
-        from starlette.applications import Starlette
-        from starlette.requests import Request
-        from starlette.responses import JSONResponse
-        from starlette.routing import Route
+        import httpx  # noqa: F401
+        import starlette  # noqa: F401
         import uvicorn
     except ImportError:
         print(
@@ -70,6 +98,50 @@ async def run_proxy(
         sys.exit(1)
 
     audit = AuditLog(audit_log_path)
+    app = create_proxy_app(
+        target_url, token, scan_inputs, scan_outputs, audit, rate_limit,
+        pin_schema=pin_schema, pool=pool,
+    )
+
+    audit.write_proxy_start(target_url, local_port)
+    print(
+        f"\nmcp-safe-wrap HTTP Proxy — AI SAFE2 v3.0 CP.5.MCP\n"
+        f"  Target:       {target_url}\n"
+        f"  Local:        http://127.0.0.1:{local_port}/proxy\n"
+        f"  Scan inputs:  {scan_inputs}\n"
+        f"  Scan outputs: {scan_outputs}\n"
+        f"  Rate limit:   {f'{rate_limit}/hr per IP' if rate_limit > 0 else 'disabled'}\n"
+        f"  Audit log:    {audit_log_path or 'disabled'}\n\n"
+        f"  Connect Claude Code to: http://127.0.0.1:{local_port}/proxy\n",
+        file=sys.stderr,
+    )
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=local_port, log_level="warning")
+    server = uvicorn.Server(config)
+    await server.serve()
+
+
+def create_proxy_app(
+    target_url: str,
+    token: str | None,
+    scan_inputs: bool,
+    scan_outputs: bool,
+    audit: AuditLog,
+    rate_limit: int,
+    pin_schema: bool = False,
+    pool: UpstreamPoolConfig | None = None,
+):
+    """
+    Build the proxy Starlette app. The shared upstream client is created when
+    the app's lifespan starts and closed when it ends.
+    """
+    import httpx
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    pool = pool or UpstreamPoolConfig()
     scanner = MessageScanner()
     ip_buckets: dict[str, AsyncTokenBucket] = defaultdict(
         lambda: make_async_bucket(rate_limit)
@@ -81,6 +153,18 @@ async def run_proxy(
     if token:
         upstream_headers["Authorization"] = f"Bearer {token}"
 
+    # Holds the shared client while the lifespan is active
+    upstream: dict[str, httpx.AsyncClient] = {}
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with pool.build_client(upstream_headers) as client:
+            upstream["client"] = client
+            try:
+                yield
+            finally:
+                del upstream["client"]
+
     async def handle_proxy(request: Request) -> JSONResponse:
         client_ip = request.client.host if request.client else "unknown"
 
@@ -116,21 +200,20 @@ async def run_proxy(
                     audit.write_ssrf_blocked(sf.get("field_path", ""), client_ip)
             body = sanitized_body if isinstance(sanitized_body, dict) else body
 
-        # Forward to upstream
-        async with httpx.AsyncClient(timeout=30.0, verify=True) as client:
-            try:
-                resp = await client.post(target_url, headers=upstream_headers, json=body)
-                response_data: dict = resp.json()
-            except httpx.ConnectError as exc:
-                return JSONResponse(
-                    {"jsonrpc": "2.0", "error": {"code": -32001, "message": f"Upstream error: {exc}"}},
-                    status_code=502,
-                )
-            except Exception as exc:
-                return JSONResponse(
-                    {"jsonrpc": "2.0", "error": {"code": -32002, "message": str(type(exc).__name__)}},
-                    status_code=502,
-                )
+        # Forward to upstream over the shared pooled client
+        try:
+            resp = await upstream["client"].post(target_url, json=body)
+            response_data: dict = resp.json()
+        except httpx.ConnectError as exc:
+            return JSONResponse(
+                {"jsonrpc": "2.0", "error": {"code": -32001, "message": f"Upstream error: {exc}"}},
+                status_code=502,
+            )
+        except Exception as exc:
+            return JSONResponse(
+                {"jsonrpc": "2.0", "error": {"code": -32002, "message": str(type(exc).__name__)}},
+                status_code=502,
+            )
 
         # Scan inbound (output) — tool responses going to LLM client
         if scan_outputs:
@@ -169,25 +252,11 @@ async def run_proxy(
     async def health(request: Request) -> JSONResponse:
         return JSONResponse({"status": "ok", "proxy": "mcp-safe-wrap", "target": target_url})
 
-    app = Starlette(routes=[
-        Route("/health", health, methods=["GET"]),
-        Route("/proxy", handle_proxy, methods=["POST"]),
-        Route("/proxy/{path:path}", handle_proxy, methods=["POST", "GET"]),
-    ])
-
-    audit.write_proxy_start(target_url, local_port)
-    print(
-        f"\nmcp-safe-wrap HTTP Proxy — AI SAFE2 v3.0 CP.5.MCP\n"
-        f"  Target:       {target_url}\n"
-        f"  Local:        http://127.0.0.1:{local_port}/proxy\n"
-        f"  Scan inputs:  {scan_inputs}\n"
-        f"  Scan outputs: {scan_outputs}\n"
-        f"  Rate limit:   {f'{rate_limit}/hr per IP' if rate_limit > 0 else 'disabled'}\n"
-        f"  Audit log:    {audit_log_path or 'disabled'}\n\n"
-        f"  Connect Claude Code to: http://127.0.0.1:{local_port}/proxy\n",
-        file=sys.stderr,
+    return Starlette(
+        routes=[
+            Route("/health", health, methods=["GET"]),
+            Route("/proxy", handle_proxy, methods=["POST"]),
+            Route("/proxy/{path:path}", handle_proxy, methods=["POST", "GET"]),
+        ],
+        lifespan=lifespan,
     )
-
-    config = uvicorn.Config(app, host="127.0.0.1", port=local_port, log_level="warning")
-    server = uvicorn.Server(config)
-    await server.serve()
@@ -661,6 +661,113 @@ class TestWrapSystemValidation:
         audit.write_tool_invocation("tools/call", "test")
 
 
+class TestProxyConnectionPool:
+    """The HTTP proxy must reuse pooled upstream connections across calls."""
+
+    @staticmethod
+    def _start_upstream():
+        """Local Starlette upstream on an ephemeral port that counts accepted TCP connections."""
+        import socket
+        import threading
+        import time
+
+        uvicorn = pytest.importorskip("uvicorn")
+        pytest.importorskip("starlette")
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse
+        from starlette.routing import Route
+        from uvicorn.protocols.http.h11_impl import H11Protocol
+
+        accepted = []
+
+        class CountingProtocol(H11Protocol):
+            def connection_made(self, transport):
+                accepted.append(transport.get_extra_info("peername"))
+                # Headers and body go out as separate writes; avoid Nagle/delayed-ACK stalls
+                transport.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                super().connection_made(transport)
+
+        async def mcp(request):
+            body = await request.json()
+            return JSONResponse({"jsonrpc": "2.0", "id": body.get("id"), "result": {"tools": []}})
+
+        app = Starlette(routes=[Route("/mcp", mcp, methods=["POST"])])
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        config = uvicorn.Config(app, http=CountingProtocol, log_level="error", lifespan="off")
+        server = uvicorn.Server(config)
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not server.started:
+            assert time.monotonic() < deadline, "upstream did not start"
+            time.sleep(0.01)
+        url = f"http://127.0.0.1:{sock.getsockname()[1]}/mcp"
+
+        def stop():
+            server.should_exit = True
+            thread.join(timeout=10)
+
+        return url, accepted, stop
+
+    def test_upstream_connections_are_pooled(self):
+        from aisafe2_mcp_tools.wrap.audit import AuditLog
+        from aisafe2_mcp_tools.wrap.proxy import UpstreamPoolConfig, create_proxy_app
+
+        url, accepted, stop = self._start_upstream()
+        pool = UpstreamPoolConfig(max_connections=10, max_keepalive_connections=10)
+        app = create_proxy_app(url, None, True, True, AuditLog(None), rate_limit=0, pool=pool)
+
+        async def drive():
+            transport = httpx.ASGITransport(app=app)
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://proxy") as client:
+                    async def call(i):
+                        resp = await client.post("/proxy", json={"jsonrpc": "2.0", "id": i, "method": "tools/list"})
+                        assert resp.status_code == 200
+                        assert resp.json()["id"] == i
+
+                    for i in range(500):
+                        await call(i)
+                    sequential = len(accepted)
+                    await asyncio.gather(*(call(i) for i in range(500, 1000)))
+                    return sequential, len(accepted)
+
+        try:
+            sequential, total = asyncio.run(drive())
+        finally:
+            stop()
+
+        # A client per request would have opened 1000 connections
+        assert sequential == 1, f"500 sequential calls opened {sequential} connections"
+        assert total <= pool.max_connections, f"1000 calls opened {total} connections"
+
+    def test_shared_client_closed_on_shutdown(self):
+        from aisafe2_mcp_tools.wrap.audit import AuditLog
+        from aisafe2_mcp_tools.wrap.proxy import UpstreamPoolConfig, create_proxy_app
+
+        pytest.importorskip("starlette")
+        clients = []
+        build = UpstreamPoolConfig.build_client
+
+        def spy(self, headers):
+            client = build(self, headers)
+            clients.append(client)
+            return client
+
+        app = create_proxy_app("http://127.0.0.1:9/mcp", "tok", True, True, AuditLog(None), rate_limit=0)
+
+        async def cycle():
+            async with app.router.lifespan_context(app):
+                assert not clients[0].is_closed
+                assert clients[0].headers["Authorization"] == "Bearer tok"
+
+        with patch.object(UpstreamPoolConfig, "build_client", spy):
+            asyncio.run(cycle())
+        assert len(clients) == 1
+        assert clients[0].is_closed
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # SYSTEM TEST 4: Cross-tool consistency
 # ══════════════════════════════════════════════════════════════════════════════
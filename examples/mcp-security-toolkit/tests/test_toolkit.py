@@ -1081,6 +1081,86 @@ class TestMCP9ContextToolIsolation:
         assert not any(f.finding_id == "CTI-001" for f in findings)
 
 
+def _generated_source(n_lines: int, seed: int) -> str:
+    """Random MCP-server-like source dense with scanner matches and CTI-001 chains."""
+    import random
+    rng = random.Random(seed)
+    snippets = [
+        "result = get_file(path)", "data = search_db(\n    query)", "send_email(to=a, body=result)",
+        "post_webhook(url, data)", "clean, _ = sanitize_value(result, 'get_file')",
+        "subprocess.run(cmd, shell=True)", "eval(user_input)", "api_key = 'sk-live-0000'",
+        "# agents = [spawn_agent(c) for c in cfgs]", "agents = [spawn_agent(c) for c in cfgs]",
+        "memory_store = {}", "logging.basicConfig(level=logging.INFO)", "x = 1", "", "    pass",
+        "upload (blob)", "text = read_email(msg_id)",
+    ]
+    return "\n".join(rng.choice(snippets) for _ in range(n_lines)) + "\n"
+
+
+def _legacy_cti001_lines(source: str) -> list[int]:
+    """The original nested-loop CTI-001 check, returning the flagged retrieval lines."""
+    from aisafe2_mcp_tools.scan.pattern_scanner import (
+        _CTI_MAX_LINE_GAP, _DISCLOSURE_VERBS, _RETRIEVAL_VERBS, _SANITIZE_CALL,
+    )
+    retrieval_hits = [(m, source[:m.start()].count("\n") + 1) for m in _RETRIEVAL_VERBS.finditer(source)]
+    disclosure_hits = [(m, source[:m.start()].count("\n") + 1) for m in _DISCLOSURE_VERBS.finditer(source)]
+    flagged, seen_lines = [], set()
+    for r_match, r_line in retrieval_hits:
+        for d_match, d_line in disclosure_hits:
+            if d_line <= r_line or d_line - r_line > _CTI_MAX_LINE_GAP:
+                continue
+            if _SANITIZE_CALL.search(source[r_match.end():d_match.start()]):
+                continue
+            if r_line in seen_lines:
+                continue
+            seen_lines.add(r_line)
+            flagged.append(r_line)
+    return flagged
+
+
+class TestPatternScannerLineIndex:
+    """Newline-offset index: line numbers and CTI-001 chains match the prefix-count method."""
+
+    def _findings(self, source: str) -> list[tuple]:
+        from aisafe2_mcp_tools.scan.pattern_scanner import PatternScanner
+        return [
+            (f.finding_id, f.line, f.code_snippet)
+            for f in PatternScanner().scan_file(source, "server.py", source.splitlines())
+        ]
+
+    def test_line_numbers_identical_to_prefix_count(self):
+        from aisafe2_mcp_tools.scan import pattern_scanner
+
+        class PrefixCountIndex:
+            def __init__(self, source):
+                self.source = source
+
+            def line_of(self, offset):
+                return self.source[:offset].count("\n") + 1
+
+        for seed in range(5):
+            source = _generated_source(2_000, seed)
+            indexed = self._findings(source)
+            with patch.object(pattern_scanner, "_LineIndex", PrefixCountIndex):
+                legacy = self._findings(source)
+            assert indexed == legacy
+            assert len(indexed) > 20
+
+    def test_line_index_edges(self):
+        from aisafe2_mcp_tools.scan.pattern_scanner import _LineIndex
+        source = "a\n\nbc\n"
+        index = _LineIndex(source)
+        for offset in range(len(source) + 1):
+            assert index.line_of(offset) == source[:offset].count("\n") + 1
+        assert _LineIndex("").line_of(0) == 1
+
+    def test_cti001_matches_nested_loop(self):
+        for seed in range(10):
+            source = _generated_source(1_500, seed)
+            flagged = [line for fid, line, _ in self._findings(source) if fid == "CTI-001"]
+            assert flagged == _legacy_cti001_lines(source)
+            assert flagged
+
+
 class TestMCP11SchemaTemporalProfiling:
     """STP-001: tools/list calls without schema hash pinning."""
 
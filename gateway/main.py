@@ -16,7 +16,7 @@ Architecture:
                    │  P3: Audit Chain    │  HMAC-chained immutable JSONL
                    │  P4: Heartbeat      │  Liveness monitor — never auto-creates
                    │  P5: A2A Detection  │  Agent impersonation heuristics
-                   │  P6: Rate Limiting  │  Token bucket per identity
+                   │  P6: Rate Limiting  │  GCRA per identity
                    │  P7: Response Scan  │  Outbound exfil / injection detection
                    └────────────────────┘
 
@@ -49,10 +49,11 @@ from enum import Enum
 from pathlib import Path
 from typing import Any, NamedTuple, Optional
 
+import anyio
 import httpx
 import yaml
 from fastapi import FastAPI, HTTPException, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 # Provider adapter layer (multi-provider + NEXUS-A2A compatibility)
 try:
@@ -60,7 +61,7 @@ try:
     _sys.path.insert(0, _os.path.dirname(_os.path.dirname(__file__)))
     from provider_adapters import (
         get_adapter, list_providers, extract_nexus_audit_fields,
-        NEXUS_A2A_INDICATORS, NormalizedRequest,
+        NEXUS_A2A_INDICATORS, NormalizedRequest, UpstreamClientPool,
     )
     _ADAPTERS_AVAILABLE = True
 except ImportError:
@@ -219,53 +220,150 @@ class ImmutableAuditLog:
 
     Any modification to a historical entry breaks the chain forward.
     Chain is verified on startup. A broken chain triggers CRITICAL alert.
+    Verification progress is kept in an HMAC-signed checkpoint next to the log
+    (<log>.checkpoint: byte offset, entry count, last hash), so routine checks
+    such as /health only read entries appended since the last one.
 
     The audit process runs OUTSIDE OpenClaw's process boundary, so a
     compromised agent cannot tamper with evidence (architectural separation).
+
+    Group commit (default): append() chains the entry under the lock, queues it,
+    and waits. A single background writer drains the queue, writes each batch
+    with one write() and one fsync(), then resolves the waiting appends. Entries
+    reach disk in chain order and append() still returns only once its entry is
+    durable, but concurrent requests share one fsync instead of queueing behind
+    each other's. batch_max_entries caps a batch; batch_max_wait_ms lets the
+    writer linger for a fuller batch (0 = flush as soon as the disk is free).
+    With group_commit=False every append writes and fsyncs inline.
     """
 
-    def __init__(self, log_path: str, chain_key: str):
+    def __init__(
+        self,
+        log_path: str,
+        chain_key: str,
+        *,
+        group_commit: bool = True,
+        batch_max_entries: int = 256,
+        batch_max_wait_ms: float = 0.0,
+    ):
         self.log_path = Path(log_path)
+        self.checkpoint_path = self.log_path.with_name(self.log_path.name + ".checkpoint")
         self._chain_key = chain_key.encode()
         self._lock = asyncio.Lock()
+        self._verify_lock = asyncio.Lock()
         self._seq: int = 0
         self._last_hash: str = GENESIS_HASH
+        # Last state known to be on disk; the chain rolls back here if a batch fails
+        self._durable_seq: int = 0
+        self._durable_hash: str = GENESIS_HASH
+        self.group_commit = group_commit
+        self.batch_max_entries = max(1, batch_max_entries)
+        self.batch_max_wait = max(0.0, batch_max_wait_ms) / 1000
+        self._pending: list[tuple[str, str, asyncio.Future]] = []  # (line, entry_hash, durable)
+        self._wakeup = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+        self._file = None
 
     def _compute_hash(self, prev_hash: str, entry_json: str) -> str:
         msg = f"{prev_hash}|{entry_json}".encode("utf-8")
         return hmac.new(self._chain_key, msg, hashlib.sha256).hexdigest()
 
-    async def verify_chain(self) -> tuple[bool, int, str]:
-        """
-        Re-read the log file and verify every entry's HMAC.
-        Returns (is_valid, entries_checked, error_detail).
-        """
-        if not self.log_path.exists():
-            return True, 0, "Log file does not yet exist (first run)"
+    # ── Verification & checkpoint ─────────────────────────────────────────────
 
-        prev_hash = GENESIS_HASH
-        count = 0
+    def _checkpoint_mac(self, offset: int, entries: int, last_hash: str) -> str:
+        msg = f"checkpoint|{offset}|{entries}|{last_hash}".encode("utf-8")
+        return hmac.new(self._chain_key, msg, hashlib.sha256).hexdigest()
+
+    def _load_checkpoint(self) -> Optional[tuple[int, int, str]]:
+        """Return (offset, entries, last_hash) from a correctly signed checkpoint, else None."""
+        try:
+            data = json.loads(self.checkpoint_path.read_text())
+            offset, entries = int(data["offset"]), int(data["entries"])
+            last_hash, mac = str(data["last_hash"]), str(data["mac"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if not hmac.compare_digest(mac, self._checkpoint_mac(offset, entries, last_hash)):
+            logger.warning("Audit checkpoint signature invalid — falling back to full verification")
+            return None
+        return offset, entries, last_hash
+
+    def _save_checkpoint(self, offset: int, entries: int, last_hash: str) -> None:
+        data = {
+            "offset": offset,
+            "entries": entries,
+            "last_hash": last_hash,
+            "mac": self._checkpoint_mac(offset, entries, last_hash),
+        }
+        tmp = self.checkpoint_path.with_name(self.checkpoint_path.name + ".tmp")
         try:
-            with self.log_path.open("r") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, self.checkpoint_path)
+        except OSError as e:
+            logger.warning("Could not persist audit checkpoint: %s", e)
+
+    def _verify_from(self, offset: int, count: int, prev_hash: str) -> tuple[bool, int, str, int, str]:
+        """
+        Blocking: verify complete lines from byte offset onward, chaining from
+        prev_hash. Returns (is_valid, entries, detail, end_offset, last_hash).
+        A trailing line without a newline is still being written and is left
+        for the next pass.
+        """
+        size = self.log_path.stat().st_size
+        if offset > size:
+            return False, count, f"Log truncated below verified checkpoint ({size} < {offset} bytes)", offset, prev_hash
+        with self.log_path.open("rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                line = raw.strip()
+                if line:
                     entry = json.loads(line)
                     stored_hash = entry.pop("entry_hash", "")
                     expected = self._compute_hash(prev_hash, json.dumps(entry, sort_keys=True))
                     if not hmac.compare_digest(stored_hash, expected):
-                        CHAIN_INTEGRITY.set(0)
-                        return False, count, f"Chain break at seq={entry.get('seq', '?')}"
+                        return False, count, f"Chain break at seq={entry.get('seq', '?')}", offset, prev_hash
                     prev_hash = stored_hash
                     count += 1
-        except (json.JSONDecodeError, OSError) as e:
-            CHAIN_INTEGRITY.set(0)
-            return False, count, f"Log read error: {e}"
+                offset += len(raw)
+        return True, count, "OK", offset, prev_hash
 
-        # Restore state
-        self._seq = count
-        self._last_hash = prev_hash
+    async def verify_chain(self, full: bool = False) -> tuple[bool, int, str]:
+        """
+        Verify the log's HMAC chain. Returns (is_valid, entries_checked, error_detail).
+
+        By default only bytes appended since the signed checkpoint are read, so
+        routine checks cost O(new entries). This catches any change to new
+        entries, truncation, and edits that shift the offsets of checkpointed
+        ones; a same-length edit to an already checkpointed entry is only
+        caught by full=True, which re-reads and re-HMACs the whole file.
+        """
+        if not self.log_path.exists():
+            return True, 0, "Log file does not yet exist (first run)"
+
+        async with self._verify_lock:
+            start = None if full else self._load_checkpoint()
+            offset, count, prev_hash = start or (0, 0, GENESIS_HASH)
+            try:
+                valid, count, detail, offset, prev_hash = await asyncio.to_thread(
+                    self._verify_from, offset, count, prev_hash,
+                )
+            except (json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
+                CHAIN_INTEGRITY.set(0)
+                return False, count, f"Log read error: {e}"
+            if not valid:
+                CHAIN_INTEGRITY.set(0)
+                return False, count, detail
+
+            if start is None or offset != start[0]:
+                self._save_checkpoint(offset, count, prev_hash)
+
+        # Restore state on startup; once this instance has appended, its own
+        # chain head is authoritative (entries may still be in flight).
+        if self._seq == 0 and not self._pending:
+            self._seq = self._durable_seq = count
+            self._last_hash = self._durable_hash = prev_hash
         CHAIN_INTEGRITY.set(1)
         return True, count, "OK"
 
@@ -282,7 +380,7 @@ class ImmutableAuditLog:
         tokens_used: int = 0,
         extra: Optional[dict] = None,
     ) -> str:
-        """Append a tamper-evident entry and return its hash."""
+        """Append a tamper-evident entry and return its hash once it is durable."""
         async with self._lock:
             self._seq += 1
             entry: dict[str, Any] = {
@@ -302,48 +400,211 @@ class ImmutableAuditLog:
             entry_json = json.dumps(entry, sort_keys=True)
             entry_hash = self._compute_hash(self._last_hash, entry_json)
             entry["entry_hash"] = entry_hash
+            line = json.dumps(entry) + "\n"
+
+            if self.group_commit:
+                durable = asyncio.get_running_loop().create_future()
+                self._pending.append((line, entry_hash, durable))
+                self._last_hash = entry_hash
+                self._ensure_writer()
+                self._wakeup.set()
+                if len(self._pending) >= self.batch_max_entries:
+                    self._batch_full.set()
+            else:
+                # Append to JSONL — atomic at OS level for single-line writes
+                with self.log_path.open("a") as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._last_hash = self._durable_hash = entry_hash
+                self._durable_seq = entry["seq"]
+                durable = None
+            seq = entry["seq"]
+
+        if durable is not None:
+            await durable
+        logger.info(
+            "AUDIT seq=%d user=%s score=%.2f tier=%s blocked=%s hash=%s",
+            seq, user_id, risk_score, hitl_tier, blocked, entry_hash[:12],
+        )
+        return entry_hash
+
+    # ── Group commit writer ───────────────────────────────────────────────────
+
+    def _ensure_writer(self) -> None:
+        if self._writer_task is None or self._writer_task.done():
+            # Fresh events: a previous writer may have run on another event loop
+            self._wakeup = asyncio.Event()
+            self._batch_full = asyncio.Event()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+
+    def _write_batch(self, data: str) -> None:
+        """Blocking: one write and one fsync for the whole batch (runs in a thread)."""
+        if self._file is None:
+            self._file = self.log_path.open("a")
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    async def _writer_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if self.batch_max_wait and len(self._pending) < self.batch_max_entries:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.batch_max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[:self.batch_max_entries]
+            del self._pending[:self.batch_max_entries]
+            if len(self._pending) < self.batch_max_entries:
+                self._batch_full.clear()
+            if not self._pending:
+                self._wakeup.clear()
+            if not batch:
+                continue
 
-            # Append to JSONL — atomic at OS level for single-line writes
-            with self.log_path.open("a") as f:
-                f.write(json.dumps(entry) + "\n")
-                f.flush()
-                os.fsync(f.fileno())
+            try:
+                await asyncio.to_thread(self._write_batch, "".join(line for line, _, _ in batch))
+            except Exception as e:
+                await self._fail_pending(batch, e)
+                continue
 
-            self._last_hash = entry_hash
-            logger.info(
-                "AUDIT seq=%d user=%s score=%.2f tier=%s blocked=%s hash=%s",
-                self._seq, user_id, risk_score, hitl_tier, blocked, entry_hash[:12],
-            )
-            return entry_hash
+            self._durable_seq += len(batch)
+            self._durable_hash = batch[-1][1]
+            for _, _, durable in batch:
+                if not durable.done():
+                    durable.set_result(None)
+
+    async def _fail_pending(self, batch: list[tuple[str, str, asyncio.Future]], error: Exception) -> None:
+        """
+        A failed write leaves the chain head pointing at entries that never reached
+        disk, and every queued entry is chained on top of them. Fail them all and
+        roll the head back to the last durable entry.
+        """
+        async with self._lock:
+            failed = batch + self._pending
+            self._pending = []
+            self._wakeup.clear()
+            self._batch_full.clear()
+            self._seq = self._durable_seq
+            self._last_hash = self._durable_hash
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        logger.critical("Audit log write failed, %d entries rejected: %s", len(failed), error)
+        for _, _, durable in failed:
+            if not durable.done():
+                durable.set_exception(OSError(f"Audit log write failed: {error}"))
+
+    async def close(self) -> None:
+        """Flush every queued entry to disk and stop the background writer."""
+        while self._pending and self._writer_task is not None and not self._writer_task.done():
+            await asyncio.gather(*(durable for _, _, durable in self._pending), return_exceptions=True)
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# §4  RATE LIMITER  (token bucket, per user)
+# §4  RATE LIMITER  (GCRA, per user)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-class TokenBucket:
-    """Per-identity sliding window token bucket."""
+class GCRARateLimiter:
+    """
+    Per-identity Generic Cell Rate Algorithm (GCRA) limiter.
+
+    Each limit of `limit` requests per `window` seconds (per minute, and
+    optionally per hour) lets an idle identity burst up to `burst` requests,
+    then admits one request every emission interval T, the first whole
+    nanosecond above window / (limit - burst + 1). The only state kept is a
+    theoretical arrival time (TAT) per identity and limit, in integer
+    nanoseconds. A request at `now` is admitted when
+    max(TAT, now) - now <= (burst - 1) * T for every limit, and each TAT then
+    advances by T; rejected requests do not consume capacity.
+
+    GCRA admits at most floor(window / T) + burst requests in any closed
+    interval of `window` seconds, which this T keeps at or below `limit`:
+    the same cap as the old sliding-window log, in O(1) time and memory per
+    identity. Integer time keeps the bound exact.
+
+    Identities are hashed onto `shards` independent locks and tables, so
+    concurrent requests from different identities do not serialize on one
+    lock. An identity whose TATs are all more than idle_ttl seconds in the
+    past is back at full capacity, so sweep() can evict it without changing
+    any future decision; the lifespan runs sweep() periodically.
+    """
 
-    def __init__(self, rate_per_minute: int, burst: int):
-        self._rpm = rate_per_minute
-        self._burst = burst
-        self._buckets: dict[str, list[float]] = defaultdict(list)
-        self._lock = asyncio.Lock()
+    def __init__(
+        self,
+        rate_per_minute: int,
+        rate_per_hour: int = 0,
+        *,
+        burst: int = 10,
+        shards: int = 16,
+        idle_ttl: float = 300.0,
+        clock=time.monotonic,
+    ):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        # (emission interval, tolerance) in nanoseconds per active limit
+        self._limits: list[tuple[int, int]] = []
+        for limit, window in ((rate_per_minute, 60), (rate_per_hour, 3600)):
+            if limit > 0:
+                cells = max(1, min(burst, limit))
+                interval = window * 1_000_000_000 // (limit - cells + 1) + 1
+                self._limits.append((interval, (cells - 1) * interval))
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._locks = [asyncio.Lock() for _ in range(max(1, shards))]
+        # shard -> one {identity: TAT} table per limit
+        self._tats: list[list[dict[str, int]]] = [[{} for _ in self._limits] for _ in self._locks]
+
+    def _now(self) -> int:
+        return round(self._clock() * 1_000_000_000)
+
+    def __len__(self) -> int:
+        return sum(len(tables[0]) for tables in self._tats)
 
     async def consume(self, identity: str) -> bool:
         """Returns True if allowed, False if rate-limited."""
-        async with self._lock:
-            now = time.monotonic()
-            window = self._buckets[identity]
-            cutoff = now - 60.0
-            # evict old timestamps
-            while window and window[0] < cutoff:
-                window.pop(0)
-            if len(window) >= self._rpm:
-                return False
-            window.append(now)
+        shard = hash(identity) % len(self._locks)
+        async with self._locks[shard]:
+            tables = self._tats[shard]
+            now = self._now()
+            new_tats = []
+            for table, (interval, tolerance) in zip(tables, self._limits):
+                tat = max(table.get(identity, now), now)
+                if tat - now > tolerance:
+                    return False
+                new_tats.append(tat + interval)
+            for table, tat in zip(tables, new_tats):
+                table[identity] = tat
             return True
 
+    async def sweep(self) -> int:
+        """Evict identities idle for more than idle_ttl seconds. Returns how many were removed."""
+        removed = 0
+        for lock, tables in zip(self._locks, self._tats):
+            async with lock:
+                cutoff = self._now() - round(self.idle_ttl * 1_000_000_000)
+                idle = [
+                    identity for identity in tables[0]
+                    if all(table[identity] < cutoff for table in tables)
+                ]
+                for identity in idle:
+                    for table in tables:
+                        del table[identity]
+                removed += len(idle)
+        return removed
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # §5  HISTORICAL CONTEXT TRACKER
@@ -353,27 +614,103 @@ class HistoricalContextTracker:
     """
     Tracks (user_id, action_fingerprint) frequency.
     Used for the third risk vector: 0=frequent, 5=rare, 10=never-seen.
-    Persisted to JSON so context survives restarts.
+
+    Persisted so context survives restarts, as a JSON snapshot plus an
+    append-only journal (<path>.journal). score() appends one short delta
+    record per call, so per-request I/O stays constant however large the
+    history grows. Every compact_every records the counts are folded into a
+    new snapshot (tmp file + os.replace) and the journal is truncated. Journal
+    records carry a sequence number and the snapshot records the last one it
+    includes, so a crash between the two steps never double counts. On
+    startup the snapshot is loaded and the journal tail replayed; a record
+    torn by a crash is dropped and cut from the file.
     """
 
-    def __init__(self, persist_path: str = "data/action_history.json"):
+    def __init__(self, persist_path: str = "data/action_history.json", compact_every: int = 10_000):
         self._path = Path(persist_path)
+        self.journal_path = self._path.with_name(self._path.name + ".journal")
+        self.compact_every = max(1, compact_every)
         self._lock = asyncio.Lock()
         self._counts: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._seq: int = 0              # last journal record applied
+        self._journal_records: int = 0  # records in the journal since the last compaction
+        self._journal = None
         self._load()
 
     def _load(self) -> None:
         if self._path.exists():
             try:
                 data = json.loads(self._path.read_text())
+                if "counts" in data and "journal_seq" in data:
+                    self._seq = int(data["journal_seq"])
+                    data = data["counts"]
                 for uid, actions in data.items():
                     self._counts[uid] = defaultdict(int, actions)
-            except (json.JSONDecodeError, OSError):
+            except (json.JSONDecodeError, OSError, ValueError, TypeError, AttributeError):
                 pass
+        self._replay_journal()
 
-    def _save(self) -> None:
+    def _replay_journal(self) -> None:
+        """Apply journal records newer than the snapshot; cut any torn tail."""
+        try:
+            with self.journal_path.open("rb") as f:
+                raw = f.read()
+        except OSError:
+            return
+        good_end = 0
+        for line in raw.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # partially written record
+            try:
+                seq, uid, fingerprint = json.loads(line)
+                seq = int(seq)
+            except (ValueError, TypeError):
+                break
+            good_end += len(line)
+            self._journal_records += 1
+            if seq > self._seq:
+                self._counts[uid][fingerprint] += 1
+                self._seq = seq
+        if good_end < len(raw):
+            logger.warning(
+                "History journal %s: dropped %d bytes of incomplete records",
+                self.journal_path, len(raw) - good_end,
+            )
+            try:
+                with self.journal_path.open("r+b") as f:
+                    f.truncate(good_end)
+            except OSError as e:
+                logger.warning("Could not truncate history journal: %s", e)
+
+    def _append_journal(self, user_id: str, fingerprint: str) -> None:
+        if self._journal is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = self.journal_path.open("ab")
+        self._seq += 1
+        record = json.dumps([self._seq, user_id, fingerprint], separators=(",", ":"))
+        self._journal.write(record.encode("utf-8") + b"\n")
+        self._journal.flush()
+        self._journal_records += 1
+
+    def compact(self) -> None:
+        """Fold the journal into a fresh snapshot and truncate the journal."""
         self._path.parent.mkdir(parents=True, exist_ok=True)
-        self._path.write_text(json.dumps({k: dict(v) for k, v in self._counts.items()}))
+        snapshot = {"journal_seq": self._seq, "counts": {k: dict(v) for k, v in self._counts.items()}}
+        tmp = self._path.with_name(self._path.name + ".tmp")
+        tmp.write_text(json.dumps(snapshot))
+        os.replace(tmp, self._path)
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = self.journal_path.open("wb")
+        self._journal_records = 0
+
+    def close(self) -> None:
+        """Compact and release the journal handle (called on shutdown)."""
+        if self._journal_records:
+            self.compact()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
 
     async def score(self, user_id: str, fingerprint: str) -> float:
         """Score 0 (frequent), 5 (rare <5x), 10 (never seen)."""
@@ -386,7 +723,12 @@ class HistoricalContextTracker:
             else:
                 score = 0.0
             self._counts[user_id][fingerprint] += 1
-            self._save()
+            try:
+                self._append_journal(user_id, fingerprint)
+                if self._journal_records >= self.compact_every:
+                    self.compact()
+            except OSError as e:
+                logger.warning("Could not persist action history: %s", e)
             return score
 
 
@@ -797,6 +1139,92 @@ def scan_response(response_body: bytes) -> tuple[bool, str]:
     return True, "clean"
 
 
+# Streamed responses: string fields that carry model output, by how they are scanned
+_STREAM_TEXT_KEYS = frozenset({"text", "content", "thinking"})   # exfil patterns
+_STREAM_TOOL_KEYS = frozenset({"partial_json", "arguments"})     # exfil + injection
+
+
+class StreamScanner:
+    """
+    Incremental outbound scan for streamed responses (SSE `data:` lines, or
+    NDJSON lines for Ollama).
+
+    Each complete line is parsed and the text and tool-argument deltas it
+    carries are appended to a rolling window holding the last WINDOW
+    characters of that stream, so a pattern split across network chunks or
+    across events is still matched once its last character arrives. feed()
+    only releases complete lines, and only after they have been scanned.
+    """
+
+    WINDOW = 256  # longer than any EXFIL_PATTERNS / RESPONSE_INJECTION match
+
+    def __init__(self):
+        self._partial = b""
+        self._text_tail = ""
+        self._tool_tail = ""
+
+    def feed(self, chunk: bytes) -> tuple[bytes, Optional[str]]:
+        """Return (bytes safe to forward, block reason or None)."""
+        data = self._partial + chunk
+        cut = data.rfind(b"\n") + 1
+        complete, self._partial = data[:cut], data[cut:]
+        for line in complete.splitlines():
+            reason = self._scan_line(line)
+            if reason:
+                return b"", reason
+        return complete, None
+
+    def finish(self) -> tuple[bytes, Optional[str]]:
+        """Scan and release a trailing line that had no newline."""
+        rest, self._partial = self._partial, b""
+        reason = self._scan_line(rest) if rest else None
+        return (b"" if reason else rest), reason
+
+    def _scan_line(self, line: bytes) -> Optional[str]:
+        line = line.strip()
+        if line.startswith(b"data:"):
+            payload = line[5:].strip()
+        elif line.startswith(b"{"):
+            payload = line
+        else:
+            return None  # event:, id:, retry:, comments, blank separators
+        if not payload or payload == b"[DONE]":
+            return None
+        try:
+            pieces = list(self._deltas(json.loads(payload)))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            pieces = [(False, payload.decode("utf-8", errors="replace"))]
+        for is_tool, piece in pieces:
+            if is_tool:
+                window = self._tool_tail + piece
+                self._tool_tail = window[-self.WINDOW:]
+            else:
+                window = self._text_tail + piece
+                self._text_tail = window[-self.WINDOW:]
+            if is_tool and RESPONSE_INJECTION.search(window):
+                return "Injection payload in streamed tool_use input"
+            if EXFIL_PATTERNS.search(window):
+                return ("Potential secret exfiltration in streamed tool_use input" if is_tool
+                        else "Potential secret exfiltration in streamed response text")
+        return None
+
+    @classmethod
+    def _deltas(cls, node):
+        """Yield (is_tool, text) for every output-carrying string in a decoded event."""
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if isinstance(value, str):
+                    if key in _STREAM_TOOL_KEYS:
+                        yield True, value
+                    elif key in _STREAM_TEXT_KEYS:
+                        yield False, value
+                else:
+                    yield from cls._deltas(value)
+        elif isinstance(node, list):
+            for item in node:
+                yield from cls._deltas(item)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # §9  SAFE MODE
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -878,6 +1306,9 @@ def _default_config() -> dict:
             "hitl_thresholds": {"auto_max": 3.0, "medium_max": 6.0, "high_max": 8.0},
             "rate_limit_rpm": 60,
             "rate_limit_burst": 10,
+            "rate_limit_rph": 0,                # 0 = no hourly limit
+            "rate_limit_shards": 16,
+            "rate_limit_idle_ttl_seconds": 300,
         },
         "heartbeat": {
             "path": "HEARTBEAT.md",
@@ -887,8 +1318,22 @@ def _default_config() -> dict:
         "audit": {
             "log_path": "logs/audit.jsonl",
             "redact_secrets": True,
+            "group_commit": True,       # one fsync per batch of concurrent appends
+            "batch_max_entries": 256,
+            "batch_max_wait_ms": 0,     # >0 trades append latency for larger batches
+            "verify_full_on_startup": True,
+        },
+        "history": {
+            "path": "data/action_history.json",
+            "compact_every": 10000,     # journal records between snapshots
+        },
+        "provider":  {
+            "active": "anthropic",
+            "timeout_seconds": 60,
+            # Shared keep-alive pool per upstream base URL (see UpstreamClientPool)
+            "pool": {"max_connections": 100, "max_keepalive_connections": 100,
+                     "keepalive_expiry_seconds": 30, "http2": False},
         },
-        "provider":  {"active": "anthropic", "timeout_seconds": 60},
         "providers": {
             "anthropic":  {"api_key": "${ANTHROPIC_API_KEY}", "endpoint": "https://api.anthropic.com/v1/messages", "version": "2023-06-01"},
             "openai":     {"api_key": "${OPENAI_API_KEY}",   "endpoint": "https://api.openai.com/v1/chat/completions"},
@@ -908,18 +1353,19 @@ def _default_config() -> dict:
 _CONFIG: dict = {}
 _heartbeat: HeartbeatMonitor
 _audit: ImmutableAuditLog
-_rate_limiter: TokenBucket
+_rate_limiter: GCRARateLimiter
 _hist_tracker: HistoricalContextTracker
 _safe_mode: SafeMode
 _challenge_store: ChallengeStore
 _hitl: HITLCircuitBreaker
 _http_client: httpx.AsyncClient
+_upstream_pool: Optional["UpstreamClientPool"] = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global _CONFIG, _heartbeat, _audit, _rate_limiter, _hist_tracker
-    global _safe_mode, _challenge_store, _hitl, _http_client
+    global _safe_mode, _challenge_store, _hitl, _http_client, _upstream_pool
 
     _CONFIG = load_config()
     gw = _CONFIG.get("gateway", {})
@@ -942,15 +1388,35 @@ async def lifespan(app: FastAPI):
         hb_cfg.get("path", "HEARTBEAT.md"),
         hb_cfg.get("max_staleness_seconds", 120),
     )
-    _audit = ImmutableAuditLog(audit_cfg.get("log_path", "logs/audit.jsonl"), chain_key)
-    _rate_limiter = TokenBucket(gw.get("rate_limit_rpm", 60), gw.get("rate_limit_burst", 10))
-    _hist_tracker = HistoricalContextTracker()
+    _audit = ImmutableAuditLog(
+        audit_cfg.get("log_path", "logs/audit.jsonl"),
+        chain_key,
+        group_commit=audit_cfg.get("group_commit", True),
+        batch_max_entries=audit_cfg.get("batch_max_entries", 256),
+        batch_max_wait_ms=audit_cfg.get("batch_max_wait_ms", 0),
+    )
+    _rate_limiter = GCRARateLimiter(
+        gw.get("rate_limit_rpm", 60),
+        gw.get("rate_limit_rph", 0),
+        burst=gw.get("rate_limit_burst", 10),
+        shards=gw.get("rate_limit_shards", 16),
+        idle_ttl=gw.get("rate_limit_idle_ttl_seconds", 300),
+    )
+    hist_cfg = _CONFIG.get("history", {})
+    _hist_tracker = HistoricalContextTracker(
+        hist_cfg.get("path", "data/action_history.json"),
+        compact_every=hist_cfg.get("compact_every", 10000),
+    )
     _challenge_store = ChallengeStore()
     _hitl = HITLCircuitBreaker(gw, _challenge_store)
     _http_client = httpx.AsyncClient(timeout=_CONFIG.get("anthropic", {}).get("timeout_seconds", 60))
+    if _ADAPTERS_AVAILABLE:
+        _upstream_pool = UpstreamClientPool.from_config(_CONFIG.get("provider", {}))
 
-    # Verify audit chain integrity on startup
-    chain_valid, entries, chain_msg = await _audit.verify_chain()
+    # Verify audit chain integrity on startup (full re-read unless disabled)
+    chain_valid, entries, chain_msg = await _audit.verify_chain(
+        full=audit_cfg.get("verify_full_on_startup", True),
+    )
     if not chain_valid:
         _safe_mode.activate(f"Audit chain broken: {chain_msg}")
         logger.critical("STARTUP ABORTED: audit chain break at %d entries: %s", entries, chain_msg)
@@ -965,6 +1431,7 @@ async def lifespan(app: FastAPI):
 
     # Start background heartbeat writer
     beat_task = asyncio.create_task(_heartbeat_loop(hb_cfg.get("check_interval_seconds", 30)))
+    sweep_task = asyncio.create_task(_rate_limit_sweep_loop(_rate_limiter.idle_ttl))
 
     logger.info(
         "AI SAFE² Gateway v%s started | safe_mode=%s | chain_entries=%d",
@@ -974,7 +1441,12 @@ async def lifespan(app: FastAPI):
     yield
 
     beat_task.cancel()
+    sweep_task.cancel()
+    await _audit.close()
+    _hist_tracker.close()
     await _http_client.aclose()
+    if _upstream_pool is not None:
+        await _upstream_pool.aclose()
     logger.info("AI SAFE² Gateway shutdown complete")
 
 
@@ -990,6 +1462,15 @@ async def _heartbeat_loop(interval: int) -> None:
             logger.critical("Heartbeat validation failed: %s", hb_reason)
 
 
+async def _rate_limit_sweep_loop(interval: float) -> None:
+    """Evict idle rate-limiter identities so memory tracks active callers only."""
+    while True:
+        await asyncio.sleep(max(interval, 1.0))
+        evicted = await _rate_limiter.sweep()
+        if evicted:
+            logger.debug("Rate limiter evicted %d idle identities", evicted)
+
+
 app = FastAPI(
     title="AI SAFE² Core Gateway",
     version=GATEWAY_VERSION,
@@ -1002,9 +1483,22 @@ app = FastAPI(
 # §12  MIDDLEWARE
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def _client_identity(request: Request) -> str:
+    return request.headers.get("X-User-ID", request.client.host if request.client else "unknown")
+
+
+def _rate_limited_response() -> JSONResponse:
+    BLOCKED_COUNT.labels(reason="rate_limited").inc()
+    return JSONResponse(
+        status_code=429,
+        content={"error": "Rate limit exceeded", "framework": FRAMEWORK_REF},
+    )
+
+
 @app.middleware("http")
 async def governance_middleware(request: Request, call_next):
-    # Allow health/metrics/safe-mode routes without enforcement
+    # Allow health/metrics/safe-mode routes without enforcement. Routes that
+    # check the operator key are not listed here, so key guesses are throttled.
     if request.url.path in ("/health", "/metrics", "/safe-mode/status"):
         return await call_next(request)
 
@@ -1020,13 +1514,8 @@ async def governance_middleware(request: Request, call_next):
         )
 
     # Rate limiting
-    user_id = request.headers.get("X-User-ID", request.client.host if request.client else "unknown")
-    if not await _rate_limiter.consume(user_id):
-        BLOCKED_COUNT.labels(reason="rate_limited").inc()
-        return JSONResponse(
-            status_code=429,
-            content={"error": "Rate limit exceeded", "framework": FRAMEWORK_REF},
-        )
+    if not await _rate_limiter.consume(_client_identity(request)):
+        return _rate_limited_response()
 
     start = time.monotonic()
     response = await call_next(request)
@@ -1040,16 +1529,26 @@ async def governance_middleware(request: Request, call_next):
 # ═══════════════════════════════════════════════════════════════════════════════
 
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request, full: bool = False):
+    """
+    Liveness + integrity. Audit chain is checked from its checkpoint unless
+    ?full=true. A full pass re-HMACs the whole log, so it is rate-limited.
+    """
+    if full and not await _rate_limiter.consume(_client_identity(request)):
+        return _rate_limited_response()
     hb_valid, hb_reason = await _heartbeat.validate()
-    chain_valid, _, _ = await _audit.verify_chain()
+    chain_valid, chain_entries, _ = await _audit.verify_chain(full=full)
     status = "degraded" if not hb_valid or not chain_valid else "active"
     return {
         "status": status,
         "version": GATEWAY_VERSION,
         "framework": FRAMEWORK_REF,
         "heartbeat": {"valid": hb_valid, "reason": hb_reason},
-        "audit_chain": {"valid": chain_valid},
+        "audit_chain": {
+            "valid": chain_valid,
+            "entries": chain_entries,
+            "mode": "full" if full else "incremental",
+        },
         "safe_mode": _safe_mode.is_active,
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
@@ -1077,6 +1576,110 @@ async def deactivate_safe_mode(request: Request):
     raise HTTPException(403, "Invalid operator key")
 
 
+@app.post("/audit/verify")
+async def audit_verify(request: Request):
+    """Operator-only complete re-verification of the audit chain, ignoring the checkpoint."""
+    body = await request.json()
+    operator_key = body.get("operator_key", "")
+    expected = os.environ.get("OPERATOR_DEACTIVATION_KEY", "")
+    if not expected:
+        raise HTTPException(500, "OPERATOR_DEACTIVATION_KEY not configured")
+    if not hmac.compare_digest(operator_key.encode(), expected.encode()):
+        raise HTTPException(403, "Invalid operator key")
+    chain_valid, entries, detail = await _audit.verify_chain(full=True)
+    if not chain_valid:
+        logger.critical("Full audit verification failed: %s", detail)
+    return {"valid": chain_valid, "entries": entries, "detail": detail}
+
+
+# Sensitive upstream response headers, stripped before forwarding
+_STRIPPED_RESPONSE_HEADERS = {"x-request-id", "cf-ray", "server", "via", "x-ratelimit-limit-requests"}
+
+
+def _safe_upstream_headers(headers, risk_score: float, tier: HITLTier) -> dict[str, str]:
+    safe_headers = {k: v for k, v in headers.items() if k.lower() not in _STRIPPED_RESPONSE_HEADERS}
+    safe_headers["X-AISAFE2-Version"] = GATEWAY_VERSION
+    safe_headers["X-AISAFE2-Risk-Score"] = str(risk_score)
+    safe_headers["X-AISAFE2-HITL-Tier"] = tier.value
+    return safe_headers
+
+
+def _stream_upstream(
+    upstream: httpx.Response,
+    started: float,
+    tier: HITLTier,
+    audit_fields: dict,
+    audit_extra: dict,
+    headers: dict[str, str],
+) -> StreamingResponse:
+    """
+    Relay a streaming upstream response as it arrives. Every chunk passes
+    through a StreamScanner first; when a pattern fires, the upstream is
+    closed and the client receives a governance error event in place of the
+    offending chunk. The audit entry is written once the stream closes
+    (completed, blocked, or client disconnect) with the byte count and time
+    to first byte.
+    """
+    media_type = upstream.headers.get("content-type", "text/event-stream")
+    sse = "event-stream" in media_type
+    # Body is re-chunked after decompression; upstream framing headers no longer apply
+    for name in [k for k in headers if k.lower() in {"content-length", "content-encoding", "transfer-encoding"}]:
+        del headers[name]
+
+    def governance_error(reason: str) -> bytes:
+        payload = json.dumps({
+            "type": "error",
+            "error": {"type": "governance_block", "message": f"Response blocked by outbound scan: {reason}"},
+            "policy": FRAMEWORK_REF,
+        })
+        return f"event: error\ndata: {payload}\n\n".encode() if sse else payload.encode() + b"\n"
+
+    async def relay():
+        scanner = StreamScanner()
+        sent = 0
+        first_byte_ms = None
+        block_reason = None
+        try:
+            async for chunk in upstream.aiter_bytes():
+                out, block_reason = scanner.feed(chunk)
+                if block_reason is None and out:
+                    if first_byte_ms is None:
+                        first_byte_ms = round((time.monotonic() - started) * 1000, 1)
+                    sent += len(out)
+                    yield out
+                if block_reason:
+                    break
+            else:
+                out, block_reason = scanner.finish()
+                if out:
+                    sent += len(out)
+                    yield out
+            if block_reason:
+                logger.warning("Streamed response scan failed: %s", block_reason)
+                BLOCKED_COUNT.labels(reason="response_scan").inc()
+                yield governance_error(block_reason)
+        finally:
+            # Runs on completion, block, or client disconnect; shield the cleanup
+            # from the cancellation that a disconnect delivers.
+            with anyio.CancelScope(shield=True):
+                await upstream.aclose()
+                REQUEST_COUNT.labels(status=str(upstream.status_code), hitl_tier=tier.value).inc()
+                await _audit.append(
+                    **audit_fields,
+                    blocked=block_reason is not None,
+                    reason=f"Response scan: {block_reason}" if block_reason else None,
+                    extra={
+                        **audit_extra,
+                        "upstream_status": upstream.status_code,
+                        "stream": True,
+                        "stream_bytes": sent,
+                        "time_to_first_byte_ms": first_byte_ms,
+                    },
+                )
+
+    return StreamingResponse(relay(), status_code=upstream.status_code, headers=headers, media_type=media_type)
+
+
 @app.post("/v1/messages")
 async def proxy_messages(request: Request):
     """
@@ -1153,18 +1756,29 @@ async def proxy_messages(request: Request):
                 active_provider = _CONFIG.get("provider", {}).get("active", "anthropic")
                 timeout         = _CONFIG.get("provider", {}).get("timeout_seconds", 60)
                 _adapter        = get_adapter(active_provider, _CONFIG.get("providers", {}))
-                # httpx async client: run sync adapter.forward in threadpool
-                import asyncio
-                upstream_response = await asyncio.get_event_loop().run_in_executor(
-                    None, lambda: _adapter.forward(body, timeout=timeout)
-                )
-                # Wrap requests.Response to match httpx interface
-                class _WrappedResp:
-                    def __init__(self, r):
-                        self.content     = r.content
-                        self.status_code = r.status_code
-                        self.headers     = dict(r.headers)
-                upstream_response = _WrappedResp(upstream_response)
+                if data.get("stream") is True:
+                    upstream_start = time.monotonic()
+                    upstream_response = await _adapter.open_stream(body, _upstream_pool, timeout=timeout)
+                    if upstream_response.is_success:
+                        return _stream_upstream(
+                            upstream_response, upstream_start, tier,
+                            audit_fields=dict(
+                                user_id=user_id, request_hash=request_hash, risk_score=risk_score,
+                                risk_vectors={"action": vector.action_type, "sensitivity": vector.target_sensitivity, "history": vector.historical_context},
+                                hitl_tier=tier.value,
+                            ),
+                            audit_extra={
+                                "a2a_flagged": a2a,
+                                "provider":    active_provider,
+                                **(extract_nexus_audit_fields(_norm_req) if _norm_req else {}),
+                            },
+                            headers=_safe_upstream_headers(upstream_response.headers, risk_score, tier),
+                        )
+                    # Upstream error: read it whole and fall through to the buffered path
+                    await upstream_response.aread()
+                    await upstream_response.aclose()
+                else:
+                    upstream_response = await _adapter.forward_async(body, _upstream_pool, timeout=timeout)
             else:
                 api_key = _CONFIG.get("providers", {}).get("anthropic", {}).get("api_key", "")
                 if not api_key:
@@ -1217,14 +1831,7 @@ async def proxy_messages(request: Request):
 
         REQUEST_COUNT.labels(status=str(upstream_response.status_code), hitl_tier=tier.value).inc()
 
-        # Strip sensitive Anthropic response headers before forwarding
-        safe_headers = {
-            k: v for k, v in upstream_response.headers.items()
-            if k.lower() not in {"x-request-id", "cf-ray", "server", "via", "x-ratelimit-limit-requests"}
-        }
-        safe_headers["X-AISAFE2-Version"] = GATEWAY_VERSION
-        safe_headers["X-AISAFE2-Risk-Score"] = str(risk_score)
-        safe_headers["X-AISAFE2-HITL-Tier"] = tier.value
+        safe_headers = _safe_upstream_headers(upstream_response.headers, risk_score, tier)
 
         return Response(
             content=upstream_response.content,
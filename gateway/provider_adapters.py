@@ -25,7 +25,8 @@ Design principle: pass-through with provider-aware adapters.
 Usage:
   adapter = get_adapter(provider_name, config)
   normalized = adapter.normalize_request(headers, body_dict)
-  response   = adapter.forward(raw_body, timeout)
+  response   = adapter.forward(raw_body, timeout)              # blocking, requests
+  response   = await adapter.forward_async(raw_body, pool)     # pooled, httpx
   is_clean, reason = adapter.scan_response(response_body_bytes)
 """
 
@@ -38,6 +39,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Any, Optional
 
+import httpx
 import requests as http_requests
 
 logger = logging.getLogger(__name__)
@@ -181,18 +183,57 @@ class ProviderAdapter(ABC):
 
     def forward(self, raw_body: bytes, timeout: int = 60) -> http_requests.Response:
         """Forward raw request bytes to upstream. Returns raw response."""
-        headers = self.build_headers()
-        headers["content-type"] = "application/json"
-        headers["x-forwarded-by"] = f"aisafe2-gateway/{GATEWAY_VERSION}"
-
         logger.debug("Forwarding to %s [%s]", self.provider_name, self.endpoint_url)
         return http_requests.post(
             self.endpoint_url,
-            headers=headers,
+            headers=self._forward_headers(),
             data=raw_body,
             timeout=timeout,
         )
 
+    def _forward_headers(self) -> dict[str, str]:
+        headers = self.build_headers()
+        headers["content-type"] = "application/json"
+        headers["x-forwarded-by"] = f"aisafe2-gateway/{GATEWAY_VERSION}"
+        return headers
+
+    async def forward_async(
+        self, raw_body: bytes, pool: "UpstreamClientPool", timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """
+        Forward raw request bytes upstream on the pool's long-lived client for
+        this provider's base URL, reusing keep-alive connections instead of
+        paying a TCP/TLS handshake and a worker thread per request.
+        Timeout: providers.<name>.timeout_seconds, else `timeout`, else the pool default.
+        """
+        timeout = self._cfg.get("timeout_seconds", timeout)
+        logger.debug("Forwarding to %s [%s] (pooled)", self.provider_name, self.endpoint_url)
+        return await pool.client_for(self.endpoint_url).post(
+            self.endpoint_url,
+            headers=self._forward_headers(),
+            content=raw_body,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+        )
+
+    async def open_stream(
+        self, raw_body: bytes, pool: "UpstreamClientPool", timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """
+        Like forward_async, but returns once upstream headers arrive and leaves
+        the body unread for incremental consumption (aiter_bytes). The caller
+        must aclose() the response.
+        """
+        timeout = self._cfg.get("timeout_seconds", timeout)
+        client = pool.client_for(self.endpoint_url)
+        request = client.build_request(
+            "POST", self.endpoint_url,
+            headers=self._forward_headers(),
+            content=raw_body,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+        )
+        logger.debug("Streaming from %s [%s]", self.provider_name, self.endpoint_url)
+        return await client.send(request, stream=True)
+
     def scan_response(self, response_body: bytes) -> tuple[bool, str]:
         """
         Scan provider response for exfil and injection.
@@ -208,6 +249,74 @@ class ProviderAdapter(ABC):
         return _scan_normalized_blocks(blocks)
 
 
+# ── Pooled upstream transport ─────────────────────────────────────────────────
+
+class UpstreamClientPool:
+    """
+    One long-lived httpx.AsyncClient per upstream base URL (scheme://host:port).
+    Created once in the gateway lifespan and closed on shutdown, so upstream
+    calls reuse keep-alive connections across requests.
+
+    Keep-alive slots default to max_connections so a burst does not close
+    and reopen connections. HTTP/2 needs the optional `h2` package (pip install httpx[http2]); without
+    it the pool logs a warning and uses HTTP/1.1.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 100,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: float = 60.0,
+    ):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = timeout
+        self._http2 = http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested but 'h2' is not installed; using HTTP/1.1")
+                self._http2 = False
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    @classmethod
+    def from_config(cls, provider_cfg: dict) -> "UpstreamClientPool":
+        """Build from the `provider:` config section (timeout_seconds + pool block)."""
+        pool_cfg = provider_cfg.get("pool", {})
+        return cls(
+            max_connections=pool_cfg.get("max_connections", 100),
+            max_keepalive_connections=pool_cfg.get("max_keepalive_connections", 100),
+            keepalive_expiry=pool_cfg.get("keepalive_expiry_seconds", 30.0),
+            http2=pool_cfg.get("http2", False),
+            timeout=provider_cfg.get("timeout_seconds", 60),
+        )
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Return the shared client for url's origin, creating it on first use."""
+        parsed = httpx.URL(url)
+        origin = f"{parsed.scheme}://{parsed.netloc.decode('ascii')}"
+        client = self._clients.get(origin)
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=self._limits, timeout=self._timeout, http2=self._http2,
+            )
+            self._clients[origin] = client
+        return client
+
+    async def aclose(self) -> None:
+        """Close every client and its pooled connections."""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+
 # ── Anthropic adapter ─────────────────────────────────────────────────────────
 
 class AnthropicAdapter(ProviderAdapter):
@@ -0,0 +1,83 @@
+"""
+AI SAFE2 v3.0 Scanner — AST Visitor Benchmark
+Times AgentStructureVisitor over a synthetic module with 50k calls, comparing
+the original unparse-every-call visitor with the dotted-name resolver that
+only unparses calls whose subtree can actually match a pattern.
+
+Run: python scanner/benchmarks/bench_ast_visitor.py [--calls 50000]
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from scanner.scanner import AgentStructureVisitor
+
+
+class LegacyVisitor(AgentStructureVisitor):
+    """The original behavior: ast.unparse on every Call node."""
+
+    def visit_Call(self, node: ast.Call) -> bool:
+        self._match_call(node, (len(self.spawn_calls), len(self.llm_calls), len(self.memory_writes)))
+        self.generic_visit(node)
+        return True
+
+
+def build_module(n_calls: int, seed: int = 5) -> str:
+    rng = random.Random(seed)
+    statements = [
+        "result = self.repository.fetch_by_identifier(request.identifier, timeout=30)",
+        "logger.debug('cache miss for %s after %d retries', key, attempts)",
+        "payload = json.dumps({'id': item.id, 'tags': sorted(item.tags)})",
+        "rows = session.query(Model).filter(Model.owner == user).all()",
+        "value = compute_cell(row_index, column_index, scale=factor)",
+        "path = os.path.join(base_dir, name.lower(), str(version))",
+    ]
+    rare = [
+        "response = client.chat.completions.create(model=MODEL, messages=messages)",
+        "time.sleep(backoff)",
+        "worker = threading.Thread(target=self.consume, daemon=True)",
+    ]
+    lines = ["def generated(self, request, item, user, session):"]
+    calls = 0
+    while calls < n_calls:
+        stmt = rng.choice(rare) if rng.random() < 0.01 else rng.choice(statements)
+        lines.append(f"    {stmt}")
+        calls += stmt.count("(")
+    return "\n".join(lines) + "\n"
+
+
+def run(visitor_cls, tree: ast.Module) -> tuple[AgentStructureVisitor, float]:
+    start = time.perf_counter()
+    visitor = visitor_cls()
+    visitor.visit(tree)
+    return visitor, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50_000)
+    args = parser.parse_args()
+
+    tree = ast.parse(build_module(args.calls))
+    n_calls = sum(isinstance(node, ast.Call) for node in ast.walk(tree))
+
+    legacy, legacy_time = run(LegacyVisitor, tree)
+    fast, fast_time = run(AgentStructureVisitor, tree)
+    for attr in ("spawn_calls", "llm_calls", "memory_writes", "has_rate_limit"):
+        assert getattr(legacy, attr) == getattr(fast, attr), f"{attr} differs from legacy"
+
+    print(f"Calls:                 {n_calls:,}")
+    print(f"Visitor, unparse all:  {legacy_time:8.3f}s")
+    print(f"Visitor, dotted names: {fast_time:8.3f}s  ({legacy_time / max(fast_time, 1e-9):.1f}x faster)")
+    print(f"Signals:               {len(fast.spawn_calls)} spawn, {len(fast.llm_calls)} LLM (identical)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+AI SAFE2 v3.0 Scanner — Entropy Benchmark
+Times the high-entropy secret pass over a synthetic 100k-line file, comparing
+the original 256-pass text.count() entropy with the single-pass histogram and
+candidate gate now used by the scanner.
+
+Run: python scanner/benchmarks/bench_entropy.py [--lines 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from scanner.scanner import _ENTROPY_FALSE_POSITIVE_PATTERNS, _check_entropy, _shannon_entropy
+
+
+def _legacy_entropy(text: str) -> float:
+    if not text:
+        return 0.0
+    entropy = 0.0
+    for x in range(256):
+        p_x = float(text.count(chr(x))) / len(text)
+        if p_x > 0:
+            entropy -= p_x * math.log2(p_x)
+    return entropy
+
+
+def _legacy_check_entropy(word: str, line: str) -> bool:
+    if len(word) < 20:
+        return False
+    if _ENTROPY_FALSE_POSITIVE_PATTERNS.search(word):
+        return False
+    if "/" in word or "." in word or "\\" in word:
+        return False
+    if re.fullmatch(r"[a-fA-F0-9]+", word):
+        return False
+    if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]{19,}", word):
+        return len(set(word)) > 10
+    return _legacy_entropy(word) > 4.5
+
+
+def build_lines(n: int, seed: int = 11) -> list[str]:
+    rng = random.Random(seed)
+    code = [
+        "    result = self.repository.fetch_by_identifier(request.identifier)",
+        "    if response.status_code != 200: raise UpstreamError(response.text)",
+        "    logger.debug('cache miss for %s after %d retries', key, attempts)",
+        "DEFAULT_CONNECTION_POOL_MAXSIZE = int(os.environ.get('POOL', '20'))",
+        "    checksum = 'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855'",
+        "    args = ['--format=json','--log-level=warning','--max-retries=5']",
+        "    weights = [0,1,1,2,3,5,8,13,21,34,55,89,144,233,377,610,987]",
+        "    matrix[row_index][column_index] = compute_cell(row_index,column_index)",
+        "    headers = {'X-Request-Id':request_id,'X-Correlation-Id':corr}",
+    ]
+    alphabet = string.ascii_letters + string.digits + "+/"
+    lines = []
+    for i in range(n):
+        if i % 50 == 0:
+            token = "".join(rng.choice(alphabet) for _ in range(40))
+            lines.append(f'    api_secret = "{token}"')
+        else:
+            lines.append(rng.choice(code))
+    return lines
+
+
+def run(lines: list[str], check) -> tuple[int, float]:
+    start = time.perf_counter()
+    hits = sum(1 for line in lines for word in line.split() if check(word, line))
+    return hits, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    args = parser.parse_args()
+
+    lines = build_lines(args.lines)
+    legacy_hits, legacy_time = run(lines, _legacy_check_entropy)
+    fast_hits, fast_time = run(lines, _check_entropy)
+    assert legacy_hits == fast_hits, "entropy gate changed detection results"
+
+    # Raw entropy function cost on every 20+ char word, with no gating at all
+    words = [w for line in lines for w in line.split() if len(w) >= 20]
+    start = time.perf_counter()
+    legacy_values = [_legacy_entropy(w) for w in words]
+    legacy_raw = time.perf_counter() - start
+    start = time.perf_counter()
+    fast_values = [_shannon_entropy(w) for w in words]
+    fast_raw = time.perf_counter() - start
+    assert legacy_values == fast_values, "histogram entropy differs from legacy"
+
+    print(f"Lines:                 {len(lines):,}")
+    print(f"Secret pass, legacy:   {legacy_time:8.3f}s")
+    print(f"Secret pass, gated:    {fast_time:8.3f}s  ({legacy_time / max(fast_time, 1e-9):.1f}x faster)")
+    print(f"Entropy only, legacy:  {legacy_raw:8.3f}s  over {len(words):,} words")
+    print(f"Entropy only, single:  {fast_raw:8.3f}s  ({legacy_raw / max(fast_raw, 1e-9):.1f}x faster)")
+    print(f"Detections:            {fast_hits:,} (identical)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+AI SAFE2 v3.0 Scanner — Incremental Scan Cache
+Persists per-file analysis results in a SQLite database so unchanged files are
+not re-analyzed on the next run. A cached entry is only reused when the file's
+SHA-256 and the rule set fingerprint both match; any rule or scanner version
+change invalidates every entry at once.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import types
+from dataclasses import asdict
+from pathlib import Path
+
+try:
+    from .rules.base import Finding, Rule
+    from .rules.cross_pillar import ACTEstimate
+except ImportError:
+    from rules.base import Finding, Rule
+    from rules.cross_pillar import ACTEstimate
+
+
+DEFAULT_CACHE_DIR = ".aisafe2-cache"
+CACHE_DB_NAME = "scan-cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_results (
+    path         TEXT PRIMARY KEY,
+    sha256       TEXT NOT NULL,
+    fingerprint  TEXT NOT NULL,
+    findings     TEXT NOT NULL,
+    act_estimate TEXT
+)
+"""
+
+
+def _hash_code(code: types.CodeType, h) -> None:
+    # Nested code objects (comprehensions, lambdas) repr with memory addresses,
+    # so recurse into them instead of hashing their repr. Set literals compile to
+    # frozensets whose repr order varies with PYTHONHASHSEED, so sort them.
+    h.update(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _hash_code(const, h)
+        elif isinstance(const, frozenset):
+            h.update(repr(sorted(const, key=repr)).encode("utf-8"))
+        else:
+            h.update(repr(const).encode("utf-8"))
+
+
+def rules_fingerprint(rules: list[Rule], scanner_version: str) -> str:
+    """Stable digest of the scanner version and every rule's definition, including check_fn bytecode."""
+    h = hashlib.sha256(scanner_version.encode("utf-8"))
+    for rule in rules:
+        h.update(repr((
+            rule.control_id, rule.severity, rule.description, rule.remediation,
+            rule.pattern, rule.file_exts, rule.skip_comments, rule.min_length,
+        )).encode("utf-8"))
+        if rule.check_fn is not None:
+            h.update(f"{rule.check_fn.__module__}.{rule.check_fn.__qualname__}".encode("utf-8"))
+            _hash_code(rule.check_fn.__code__, h)
+    return h.hexdigest()
+
+
+def file_sha256(filepath: str) -> str | None:
+    try:
+        return hashlib.sha256(Path(filepath).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+class ScanCache:
+    """
+    SQLite-backed map of path -> (sha256, fingerprint, per-file results).
+    One row per path; a changed file simply replaces its previous row.
+    Degrades to a no-op if the cache directory cannot be created or opened.
+    """
+
+    def __init__(self, cache_dir: str | Path, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+        self._conn: sqlite3.Connection | None = None
+        try:
+            path = Path(cache_dir)
+            path.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path / CACHE_DB_NAME)
+            self._conn.execute(_SCHEMA)
+        except (OSError, sqlite3.Error):
+            self._conn = None  # Degrade gracefully: scan without caching
+        self.enabled = self._conn is not None
+
+    def get(self, filepath: str, sha256: str) -> tuple[list[Finding], ACTEstimate | None] | None:
+        """Return cached (findings, act_estimate) for an unchanged file, else None."""
+        if self._conn is None:
+            self.misses += 1
+            return None
+        row = self._conn.execute(
+            "SELECT findings, act_estimate FROM file_results "
+            "WHERE path = ? AND sha256 = ? AND fingerprint = ?",
+            (filepath, sha256, self.fingerprint),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        findings = [Finding(**d) for d in json.loads(row[0])]
+        act_estimate = ACTEstimate(**json.loads(row[1])) if row[1] else None
+        return findings, act_estimate
+
+    def put(self, filepath: str, sha256: str, findings: list[Finding],
+            act_estimate: ACTEstimate | None) -> None:
+        if self._conn is None:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO file_results VALUES (?, ?, ?, ?, ?)",
+            (
+                filepath,
+                sha256,
+                self.fingerprint,
+                json.dumps([asdict(f) for f in findings]),
+                json.dumps(asdict(act_estimate)) if act_estimate is not None else None,
+            ),
+        )
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
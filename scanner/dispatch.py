@@ -0,0 +1,167 @@
+"""
+AI SAFE2 v3.0 Scanner — Rule Dispatch Table
+Compiles the rule set once into per-extension rule lists and derives, for every
+line-regex rule, the lowercase literal(s) any match must contain. The scanner
+then runs a rule's regex only on lines where a plain `in` check finds one of
+those literals, which skips the vast majority of regex calls on real code.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+    from re import _constants as sre_constants
+except ImportError:  # pragma: no cover
+    import sre_parse
+    import sre_constants
+
+try:
+    from .rules.base import Rule
+except ImportError:
+    from rules.base import Rule
+
+
+# Cap on alternatives produced when concatenating literal branches, e.g.
+# "(api|secret)_(key|token)" -> 4 literals. Past this, the run is split instead.
+_MAX_ALTERNATIVES = 64
+
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+_POSSESSIVE_REPEAT = getattr(sre_constants, "POSSESSIVE_REPEAT", None)
+
+
+def _best(candidates: list[frozenset[str]]) -> frozenset[str] | None:
+    """Pick the most selective any-of set: longest shortest literal, then fewest alternatives."""
+    usable = [c for c in candidates if c and "" not in c]
+    if not usable:
+        return None
+    return max(usable, key=lambda c: (min(len(s) for s in c), -len(c)))
+
+
+def _analyze(seq) -> tuple[frozenset[str] | None, frozenset[str] | None]:
+    """
+    Walk a parsed regex sequence. Returns (exact, required):
+      exact:    every string the sequence can match, if it is a fixed set of literals
+      required: a set of literals of which every match contains at least one
+    """
+    candidates: list[frozenset[str]] = []
+    run: frozenset[str] = frozenset({""})
+    broken = False
+
+    def close_run():
+        nonlocal run
+        candidates.append(run)
+        run = frozenset({""})
+
+    for op, av in seq:
+        exact: frozenset[str] | None = None
+        required: frozenset[str] | None = None
+
+        if op is sre_constants.LITERAL:
+            exact = frozenset({chr(av).lower()})
+        elif op is sre_constants.AT:
+            exact = frozenset({""})  # zero-width anchor, keeps literals contiguous
+        elif op is sre_constants.SUBPATTERN:
+            exact, required = _analyze(av[-1])
+        elif op is sre_constants.BRANCH:
+            parts = [_analyze(alt) for alt in av[1]]
+            if all(e is not None for e, _ in parts):
+                exact = frozenset().union(*(e for e, _ in parts))
+            reqs = [e if e is not None else r for e, r in parts]
+            if all(r and "" not in r for r in reqs):
+                required = frozenset().union(*reqs)
+        elif op in _REPEATS or (_POSSESSIVE_REPEAT is not None and op is _POSSESSIVE_REPEAT):
+            lo, hi, sub = av
+            sub_exact, sub_required = _analyze(sub)
+            if lo == hi == 1:
+                exact, required = sub_exact, sub_required
+            elif lo >= 1:
+                required = sub_exact if sub_exact is not None else sub_required
+
+        if exact is not None and len(run) * len(exact) <= _MAX_ALTERNATIVES:
+            run = frozenset(a + b for a in run for b in exact)
+            continue
+
+        broken = True
+        close_run()
+        if exact is not None:
+            run = exact
+        elif required is not None:
+            candidates.append(required)
+
+    if broken:
+        close_run()
+        return None, _best(candidates)
+    return run, _best([run])
+
+
+def required_literals(pattern: str) -> tuple[str, ...]:
+    """
+    Lowercase literals of which every match of `pattern` contains at least one.
+    An empty tuple means no usable literal could be derived and the regex must
+    always run.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except re.error:
+        return ()
+    _, required = _analyze(list(parsed))
+    if required is None:
+        return ()
+    return tuple(sorted(required))
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A line-regex rule with its compiled pattern and literal prefilter."""
+    rule: Rule
+    regex: re.Pattern
+    literals: tuple[str, ...]
+
+    def search(self, line: str, lower_line: str | None):
+        """
+        Run the regex unless the prefilter proves it cannot match. lower_line is
+        None for non-ASCII lines, where str.lower() and regex case folding can
+        disagree (e.g. U+017F matches "s"), so the regex always runs there.
+        """
+        if self.literals and lower_line is not None:
+            if not any(lit in lower_line for lit in self.literals):
+                return None
+        return self.regex.search(line)
+
+
+class RuleTable:
+    """
+    Rule set compiled once and dispatched by file extension. Rules keep their
+    declaration order in every per-extension list, so findings come out in the
+    same order as a plain loop over all rules.
+    """
+
+    def __init__(self, rules: list[Rule], prefilter: bool = True):
+        self.rules = rules
+        self._line_rules = [
+            CompiledRule(
+                rule=rule,
+                regex=re.compile(rule.pattern, re.IGNORECASE),
+                literals=required_literals(rule.pattern) if prefilter else (),
+            )
+            for rule in rules if rule.pattern is not None
+        ]
+        self._check_rules = [rule for rule in rules if rule.check_fn is not None]
+        self._exts = sorted({e for rule in rules for e in (rule.file_exts or ())})
+        self._by_ext: dict[tuple[str, ...], tuple[list[CompiledRule], list[Rule]]] = {}
+
+    def for_file(self, filepath: str) -> tuple[list[CompiledRule], list[Rule]]:
+        """Return (line-regex rules, check_fn rules) applicable to filepath."""
+        key = tuple(e for e in self._exts if filepath.endswith(e))
+        entry = self._by_ext.get(key)
+        if entry is None:
+            def applies(rule: Rule) -> bool:
+                return not rule.file_exts or any(e in key for e in rule.file_exts)
+            entry = (
+                [cr for cr in self._line_rules if applies(cr.rule)],
+                [rule for rule in self._check_rules if applies(rule)],
+            )
+            self._by_ext[key] = entry
+        return entry
@@ -0,0 +1,69 @@
+"""
+AI SAFE2 v3.0 Scanner — Git Changed-Files Plumbing
+Resolves the set of files to scan for pre-commit hooks and pull-request jobs
+from `git diff --name-only -z`, so only what changed is analyzed.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+
+
+class GitDiffError(RuntimeError):
+    """git is unavailable, the path is not in a work tree, or the ref is invalid."""
+
+
+def _git(cwd: str, *args: str) -> bytes:
+    try:
+        proc = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, check=False,
+        )
+    except FileNotFoundError as exc:
+        raise GitDiffError("git executable not found on PATH") from exc
+    if proc.returncode != 0:
+        stderr = proc.stderr.decode("utf-8", errors="replace").strip()
+        raise GitDiffError(f"git {' '.join(args)} failed: {stderr}")
+    return proc.stdout
+
+
+def changed_files(root_path: str, since: str | None = None, staged: bool = False) -> list[str]:
+    """
+    Return files under root_path that changed, as paths in the same form the
+    full-tree walk produces (root_path joined with the path relative to it).
+
+    since:  compare the working tree (or the index, with staged) against this ref.
+            Any `git diff` revision syntax works, e.g. "origin/main..." for a PR.
+    staged: only consider changes staged in the index (git diff --cached).
+
+    Deleted files are excluded; directory and extension filtering is left to
+    the scanner so SKIP_DIRS and SUPPORTED_EXTENSIONS apply as usual.
+    """
+    root = Path(root_path)
+    cwd = str(root if root.is_dir() else root.parent)
+    toplevel = Path(_git(cwd, "rev-parse", "--show-toplevel").decode("utf-8").strip())
+
+    args = ["diff", "--name-only", "-z", "--diff-filter=ACMR", "--no-renames"]
+    if staged:
+        args.append("--cached")
+    if since:
+        args.append(since)
+    args.append("--")
+    out = _git(str(toplevel), *args)
+
+    scan_root = root.resolve()
+    files = []
+    for raw in out.split(b"\0"):
+        if not raw:
+            continue
+        absolute = (toplevel / os.fsdecode(raw)).resolve()
+        try:
+            rel = absolute.relative_to(scan_root) if scan_root.is_dir() else None
+        except ValueError:
+            continue  # changed, but outside the scanned path
+        if rel is None:
+            if absolute == scan_root:
+                files.append(root_path)
+            continue
+        files.append(str(root / rel))
+    return files
@@ -0,0 +1,498 @@
+"""
+AI SAFE2 v3.0 Scanner — Unit Tests
+Run: pytest scanner/tests/test_scanner.py -v
+"""
+import ast
+import json
+import math
+import os
+import random
+import re
+import shutil
+import string
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from scanner.dispatch import RuleTable, required_literals
+from scanner.gitdiff import GitDiffError, changed_files
+from scanner.rules.base import FileContext
+from scanner.rules.cross_pillar import estimate_act_tier
+from scanner.scanner import (
+    AgentStructureVisitor,
+    ScanAggregator,
+    StaticScanner,
+    _ENTROPY_FALSE_POSITIVE_PATTERNS,
+    _check_entropy,
+    _scan_file,
+    _shannon_entropy,
+)
+
+
+# ── Fixture tree ──────────────────────────────────────────────────────────────
+
+AGENT_PY = '''\
+import openai
+import subprocess
+
+OPENAI_KEY = "sk-abcdefghijklmnopqrstuvwxyz0123456789ABCD"
+
+def run_agent(user_input):
+    prompt = f"Answer this: {user_input}"
+    subprocess.run(prompt, shell=True)
+    child = spawn_agent(name="worker-{n}")
+    return openai.chat.completions.create(messages=[{"role": "user", "content": prompt}])
+'''
+
+CONFIG_YAML = '''\
+agent:
+  name: nightly-batch-{n}
+  autonomous: true
+  act_tier: ACT-3
+  bind: 0.0.0.0
+'''
+
+TOOLS_JS = '''\
+const token = "Zx9Qw8Er7Ty6Ui5Op4As3Df2Gh1Jk0Lm{n}";
+function handler(req) {{ return eval(req.body); }}
+'''
+
+
+def _write_fixture_tree(root: Path, n_packages: int = 12) -> None:
+    for n in range(n_packages):
+        pkg = root / f"pkg_{n:02d}" / "agents"
+        pkg.mkdir(parents=True)
+        (pkg / "agent.py").write_text(AGENT_PY.replace("{n}", str(n)), encoding="utf-8")
+        (pkg / "config.yaml").write_text(CONFIG_YAML.replace("{n}", str(n)), encoding="utf-8")
+        (pkg / "tools.js").write_text(TOOLS_JS.format(n=n), encoding="utf-8")
+    skipped = root / "node_modules" / "dep"
+    skipped.mkdir(parents=True)
+    (skipped / "index.js").write_text(TOOLS_JS.format(n=0), encoding="utf-8")
+
+
+@pytest.fixture(scope="module")
+def fixture_tree(tmp_path_factory):
+    # mktemp() keeps "/test" out of the path so is_test_file() does not suppress findings
+    root = tmp_path_factory.mktemp("corpus")
+    _write_fixture_tree(root)
+    return root
+
+
+# ── Parallel execution ────────────────────────────────────────────────────────
+
+class TestParallelScan:
+    def test_parallel_matches_serial_byte_for_byte(self, fixture_tree):
+        serial = StaticScanner(jobs=1).scan_project(str(fixture_tree))
+        parallel = StaticScanner(jobs=4).scan_project(str(fixture_tree))
+        assert serial.violations, "fixture tree should produce findings"
+        assert parallel.model_dump_json() == serial.model_dump_json()
+
+    def test_skip_dirs_honored_in_parallel(self, fixture_tree):
+        result = StaticScanner(jobs=2).scan_project(str(fixture_tree))
+        assert not any("node_modules" in v.file_path for v in result.violations)
+
+    def test_jobs_zero_uses_cpu_count(self):
+        assert StaticScanner(jobs=0).jobs >= 1
+
+
+# ── Incremental scan cache ────────────────────────────────────────────────────
+
+class TestScanCache:
+    def test_warm_cache_reproduces_cold_result(self, fixture_tree, tmp_path_factory):
+        cache_dir = str(tmp_path_factory.mktemp("cache"))
+        cold = StaticScanner(cache_dir=cache_dir).scan_project(str(fixture_tree))
+        warm = StaticScanner(cache_dir=cache_dir).scan_project(str(fixture_tree))
+        assert cold.meta["cache"]["hits"] == 0
+        assert warm.meta["cache"]["misses"] == 0
+        assert warm.meta["cache"]["hit_ratio"] == 1.0
+        cold.meta.pop("cache")
+        warm.meta.pop("cache")
+        assert warm.model_dump_json() == cold.model_dump_json()
+        uncached = StaticScanner().scan_project(str(fixture_tree))
+        assert "cache" not in uncached.meta
+        assert uncached.model_dump_json() == warm.model_dump_json()
+
+    def test_only_changed_file_is_reanalyzed(self, tmp_path_factory):
+        root = tmp_path_factory.mktemp("incremental")
+        _write_fixture_tree(root, n_packages=3)
+        cache_dir = str(tmp_path_factory.mktemp("cache"))
+        StaticScanner(cache_dir=cache_dir).scan_project(str(root))
+
+        target = root / "pkg_01" / "agents" / "tools.js"
+        target.write_text("function ok() { return 1; }\n", encoding="utf-8")
+        result = StaticScanner(cache_dir=cache_dir).scan_project(str(root))
+
+        assert result.meta["cache"]["misses"] == 1
+        assert not any(v.file_path == str(target) for v in result.violations)
+
+    def test_rule_change_invalidates_cache(self, fixture_tree, tmp_path_factory):
+        cache_dir = str(tmp_path_factory.mktemp("cache"))
+        StaticScanner(cache_dir=cache_dir).scan_project(str(fixture_tree))
+        scanner = StaticScanner(cache_dir=cache_dir)
+        scanner.rules = scanner.rules[:-1]
+        result = scanner.scan_project(str(fixture_tree))
+        assert result.meta["cache"]["hits"] == 0
+
+    def test_unwritable_cache_dir_degrades_gracefully(self, fixture_tree, tmp_path_factory):
+        blocker = tmp_path_factory.mktemp("blocked") / "not-a-dir"
+        blocker.write_text("", encoding="utf-8")
+        result = StaticScanner(cache_dir=str(blocker)).scan_project(str(fixture_tree))
+        assert result.meta["cache"]["enabled"] is False
+        assert result.violations
+
+    def test_fingerprint_stable_across_hash_seeds(self):
+        import subprocess
+        code = (
+            "from scanner.scanner import SCANNER_VERSION, StaticScanner;"
+            "from scanner.cache import rules_fingerprint;"
+            "print(rules_fingerprint(StaticScanner().rules, SCANNER_VERSION))"
+        )
+        root = str(Path(__file__).parent.parent.parent)
+        digests = {
+            subprocess.run(
+                [sys.executable, "-c", code], cwd=root, capture_output=True, text=True,
+                env={**os.environ, "PYTHONHASHSEED": seed},
+            ).stdout.strip()
+            for seed in ("1", "2", "3")
+        }
+        assert len(digests) == 1 and "" not in digests
+
+
+# ── Rule dispatch table ───────────────────────────────────────────────────────
+
+class TestRuleDispatch:
+    def test_required_literals_examples(self):
+        assert required_literals(r"shell\s*=\s*True") == ("shell",)
+        assert required_literals(r"0\.0\.0\.0") == ("0.0.0.0",)
+        assert required_literals(r"(?i)(rto|rpo|recovery_time)") == ("recovery_time", "rpo", "rto")
+        assert required_literals(r"\b(?:\d[ -]?){15,16}\d\b") == ()
+
+    def test_prefilter_never_rejects_a_matching_line(self):
+        # Corpus: every line of the scanner's own source plus the fixture files
+        root = Path(__file__).parent.parent
+        lines = [
+            line for path in root.rglob("*.py")
+            for line in path.read_text(encoding="utf-8").split("\n")
+        ]
+        lines += (AGENT_PY + CONFIG_YAML + TOOLS_JS).split("\n")
+        lines += ["SHELL = TRUE", "Shell=true", "x = EVAL (y)", "ſhell=True"]
+        for compiled in RuleTable(StaticScanner().rules)._line_rules:
+            for line in lines:
+                lower_line = line.lower() if line.isascii() else None
+                expected = compiled.regex.search(line) is not None
+                assert (compiled.search(line, lower_line) is not None) == expected, (
+                    compiled.rule.pattern, line)
+
+    def test_dispatch_respects_file_exts(self):
+        table = RuleTable(StaticScanner().rules)
+        line_rules, check_rules = table.for_file("/src/app/requirements.txt")
+        for rule in [cr.rule for cr in line_rules] + check_rules:
+            assert not rule.file_exts or any(
+                "/src/app/requirements.txt".endswith(e) for e in rule.file_exts)
+
+    def test_prefilter_does_not_change_findings(self, fixture_tree):
+        rules = StaticScanner().rules
+        plain, filtered = RuleTable(rules, prefilter=False), RuleTable(rules)
+        for path in sorted(fixture_tree.rglob("*.*")):
+            assert _scan_file(str(path), plain) == _scan_file(str(path), filtered)
+
+
+# ── Entropy detection ─────────────────────────────────────────────────────────
+
+def _reference_entropy(text):
+    """The original 256-pass text.count() implementation, kept as the oracle."""
+    if not text:
+        return 0.0
+    entropy = 0.0
+    for x in range(256):
+        p_x = float(text.count(chr(x))) / len(text)
+        if p_x > 0:
+            entropy -= p_x * math.log2(p_x)
+    return entropy
+
+
+def _reference_check_entropy(word, line):
+    if len(word) < 20:
+        return False
+    if _ENTROPY_FALSE_POSITIVE_PATTERNS.search(word):
+        return False
+    if "/" in word or "." in word or "\\" in word:
+        return False
+    if re.fullmatch(r"[a-fA-F0-9]+", word):
+        return False
+    if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]{19,}", word):
+        return len(set(word)) > 10
+    return _reference_entropy(word) > 4.5
+
+
+def _random_tokens(n, seed=1234):
+    rng = random.Random(seed)
+    alphabets = [
+        string.ascii_letters + string.digits,
+        string.ascii_letters + string.digits + "+/=",
+        "0123456789abcdef",
+        string.printable.strip(),
+        string.ascii_lowercase[:8] + "_",
+        "abcdé€ßΩ中文🙂" + string.ascii_letters,
+    ]
+    for _ in range(n):
+        alphabet = rng.choice(alphabets)
+        yield "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 64)))
+
+
+class TestEntropy:
+    @pytest.mark.parametrize("text, expected", [
+        ("", 0.0),
+        ("aaaa", 0.0),
+        ("ab", 1.0),
+        ("abcd", 2.0),
+        ("sk-proj-4fQx9ZkT2mVbR7nL0wYcH8sJdE3uPa6G", 5.1719280949),
+        ("Zx9Qw8Er7Ty6Ui5Op4As3Df2Gh1Jk0Lm1", 4.9837880588),
+    ])
+    def test_pinned_values(self, text, expected):
+        assert _shannon_entropy(text) == pytest.approx(expected, abs=1e-9)
+        assert _shannon_entropy(text) == _reference_entropy(text)
+
+    def test_matches_reference_bit_for_bit(self):
+        for token in _random_tokens(5000):
+            assert _shannon_entropy(token) == _reference_entropy(token), token
+
+    def test_check_entropy_matches_reference(self):
+        tokens = list(_random_tokens(5000, seed=99))
+        tokens += ["OPENAI_API_KEY_PLACEHOLDER_VALUE", "a" * 40, "deadbeef" * 8,
+                   "https://example.com/aaaaaaaaaaaaaaaaaaaa", "abcdefghijklmnopqrstuvwxyzABCDEFG"]
+        for token in tokens:
+            assert _check_entropy(token, token) == _reference_check_entropy(token, token), token
+
+
+# ── Streaming findings ────────────────────────────────────────────────────────
+
+class TestStreaming:
+    def test_iter_findings_matches_scan_project(self, fixture_tree):
+        scanner = StaticScanner()
+        result = scanner.scan_project(str(fixture_tree))
+        aggregator = ScanAggregator()
+        streamed = list(scanner.iter_findings(str(fixture_tree), aggregator))
+
+        assert [(f.control_id, f.file_path, f.line_number) for f in streamed] == \
+            [(v.control_id, v.file_path, v.line_number) for v in result.violations]
+        summary = aggregator.summary(str(fixture_tree), scanner.controls.loaded)
+        assert summary["score"] == result.score
+        assert summary["verdict"] == result.verdict
+        assert summary["controls_failed"] == result.controls_failed
+        assert summary["meta"] == result.meta
+        assert summary["act_estimate"] == result.act_estimate
+        assert summary["risk_formula_components"] == result.risk_formula_components
+        assert summary["governance_gaps"] == result.governance_gaps
+
+    def test_findings_are_yielded_before_the_scan_completes(self, fixture_tree):
+        aggregator = ScanAggregator()
+        stream = StaticScanner().iter_findings(str(fixture_tree), aggregator)
+        next(stream)
+        assert aggregator.files_scanned == 1
+        # Only the current file's dedupe keys are retained
+        remaining = sum(1 for _ in stream)
+        assert remaining > 0
+        assert len(aggregator._seen) < aggregator.total_findings
+
+    def test_cli_ndjson_report(self, fixture_tree):
+        from click.testing import CliRunner
+        from scanner.cli import cli
+
+        runner = CliRunner()
+        out = runner.invoke(cli, ["scan", str(fixture_tree), "--report", "ndjson", "--quiet"])
+        records = [json.loads(line) for line in out.stdout.splitlines()]
+        assert out.exit_code == 1  # fixture tree scores 0
+        assert all(r["type"] == "finding" for r in records[:-1])
+        assert records[-1]["type"] == "summary"
+        assert records[-1]["total_violations"] == len(records) - 1
+
+
+# ── Shared per-file context ───────────────────────────────────────────────────
+
+class TestFileContext:
+    def test_ast_parse_called_once_per_python_file(self, fixture_tree, monkeypatch):
+        calls = []
+        real_parse = ast.parse
+
+        def counting_parse(source, *args, **kwargs):
+            calls.append(source)
+            return real_parse(source, *args, **kwargs)
+
+        monkeypatch.setattr(ast, "parse", counting_parse)
+        result = StaticScanner().scan_project(str(fixture_tree))
+        py_files = list(fixture_tree.rglob("*.py"))
+        py_files = [p for p in py_files if "node_modules" not in p.parts]
+
+        assert result.act_estimate  # AST analysis and ACT estimation both ran
+        assert len(calls) == len(py_files) == 12
+
+    def test_views_are_computed_once(self):
+        ctx = FileContext("agents/app.py", "# header\nX = 1\n\nY = 'Two'\n")
+        assert ctx.lines is ctx.lines
+        assert ctx.lower_lines == ["# header", "x = 1", "", "y = 'two'", ""]
+        assert ctx.comment_mask == [True, False, True, False, True]
+        assert ctx.tree is ctx.tree
+        assert not ctx.is_test
+
+    def test_invalid_python_has_no_tree(self):
+        assert FileContext("broken.py", "def (:\n").tree is None
+
+    def test_act_estimate_accepts_context_or_text(self):
+        text = AGENT_PY.replace("{n}", "0")
+        assert estimate_act_tier(FileContext("agent.py", text)) == estimate_act_tier(text)
+
+
+# ── AST visitor ───────────────────────────────────────────────────────────────
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+
+TRICKY_CALLS = '''\
+import asyncio, threading, time
+asyncio.run(agent.run(task))
+outer(inner(spawn_agent))
+log("about to call completions.create")
+log("\\throttled")
+register(callback=lambda sleep: sleep)
+schedule(rate_limit=5)
+pool.submit(fn, *args, **kwargs)
+(factory())(x).generate(prompt)
+threading.Thread(target=worker).start()
+f"{client.messages.create(model='m')}"
+getattr(obj, "upsert")(rows)
+time.sleep(1)
+'''
+
+
+class _UnparseEveryCall(AgentStructureVisitor):
+    """Reference: the original visitor, which ran ast.unparse on every call."""
+
+    def visit_Call(self, node):
+        self._match_call(node, (len(self.spawn_calls), len(self.llm_calls), len(self.memory_writes)))
+        self.generic_visit(node)
+        return True
+
+
+def _visitor_signals(visitor_cls, tree) -> tuple:
+    visitor = visitor_cls()
+    visitor.visit(tree)
+    return (visitor.tool_definitions, visitor.spawn_calls, visitor.llm_calls,
+            visitor.memory_writes, visitor.has_rate_limit, visitor.has_error_handling)
+
+
+class TestAgentStructureVisitor:
+    def test_tricky_calls_match_reference(self):
+        tree = ast.parse(TRICKY_CALLS)
+        signals = _visitor_signals(AgentStructureVisitor, tree)
+        assert signals == _visitor_signals(_UnparseEveryCall, tree)
+        assert signals[2][0] == (2, "asyncio.run(agent.run(task))")  # outer call listed first
+
+    def test_example_runtimes_match_reference(self):
+        files = sorted(REPO_ROOT.glob("examples/*-sovereign-runtime/**/*.py"))
+        assert files
+        for path in files:
+            try:
+                tree = ast.parse(path.read_text(encoding="utf-8", errors="ignore"))
+            except SyntaxError:
+                continue
+            assert _visitor_signals(AgentStructureVisitor, tree) == \
+                _visitor_signals(_UnparseEveryCall, tree), path
+
+    def test_plain_calls_are_not_unparsed(self, monkeypatch):
+        tree = ast.parse("a.b(c)\nd(e, f=g)\nclient.chat.completions.create(model=m)\n")
+        calls = []
+        real_unparse = ast.unparse
+        monkeypatch.setattr(ast, "unparse", lambda node: calls.append(node) or real_unparse(node))
+        visitor = AgentStructureVisitor()
+        visitor.visit(tree)
+        assert visitor.llm_calls == [(3, "client.chat.completions.create(model=m)")]
+        assert len(calls) == 1  # only for the evidence of the matching call
+
+
+# ── Git changed-files mode ────────────────────────────────────────────────────
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=ci", "-c", "user.email=ci@example.invalid", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+
+@pytest.fixture
+def git_tree(tmp_path_factory):
+    if shutil.which("git") is None:
+        pytest.skip("git not installed")
+    root = tmp_path_factory.mktemp("repo")
+    _write_fixture_tree(root, n_packages=3)
+    _git(root, "init", "-q")
+    _git(root, "add", "-A", "-f")
+    _git(root, "commit", "-q", "-m", "base")
+    return root
+
+
+class TestGitChangedFiles:
+    def test_changed_since_lists_only_modified_files(self, git_tree):
+        (git_tree / "pkg_01" / "agents" / "agent.py").write_text(AGENT_PY + "# edit\n", encoding="utf-8")
+        (git_tree / "pkg_02" / "new.py").write_text("x = 1\n", encoding="utf-8")
+        _git(git_tree, "add", "pkg_02/new.py")
+        assert changed_files(str(git_tree), since="HEAD") == [
+            str(git_tree / "pkg_01" / "agents" / "agent.py"),
+            str(git_tree / "pkg_02" / "new.py"),
+        ]
+
+    def test_staged_ignores_unstaged_edits(self, git_tree):
+        (git_tree / "pkg_00" / "agents" / "tools.js").write_text("// unstaged\n", encoding="utf-8")
+        (git_tree / "pkg_01" / "agents" / "config.yaml").write_text("agent: {}\n", encoding="utf-8")
+        _git(git_tree, "add", "pkg_01/agents/config.yaml")
+        assert changed_files(str(git_tree), staged=True) == [
+            str(git_tree / "pkg_01" / "agents" / "config.yaml"),
+        ]
+
+    def test_deleted_files_and_paths_outside_root_are_dropped(self, git_tree):
+        (git_tree / "pkg_00" / "agents" / "agent.py").unlink()
+        (git_tree / "pkg_01" / "agents" / "agent.py").write_text("y = 2\n", encoding="utf-8")
+        (git_tree / "pkg_02" / "agents" / "agent.py").write_text("z = 3\n", encoding="utf-8")
+        sub = git_tree / "pkg_02"
+        assert changed_files(str(sub), since="HEAD") == [str(sub / "agents" / "agent.py")]
+
+    def test_scan_respects_skip_dirs_and_extensions(self, git_tree):
+        for rel in ("pkg_00/agents/agent.py", "node_modules/dep/index.js"):
+            (git_tree / rel).write_text(AGENT_PY + "# edit\n", encoding="utf-8")
+        (git_tree / "notes.bin").write_bytes(b"\0")
+        _git(git_tree, "add", "-A", "-f")
+        files = changed_files(str(git_tree), staged=True)
+        assert len(files) == 3
+
+        result = StaticScanner().scan_project(str(git_tree), files)
+        scanned = {v.file_path for v in result.violations}
+        assert scanned == {str(git_tree / "pkg_00" / "agents" / "agent.py")}
+
+    def test_changed_scan_matches_full_scan_for_those_files(self, git_tree):
+        target = str(git_tree / "pkg_01" / "agents" / "agent.py")
+        full = StaticScanner().scan_project(str(git_tree))
+        partial = StaticScanner().scan_project(str(git_tree), [target])
+        expected = [v for v in full.violations if v.file_path == target]
+        assert [v.model_dump() for v in partial.violations] == [v.model_dump() for v in expected]
+
+    def test_invalid_ref_raises(self, git_tree):
+        with pytest.raises(GitDiffError):
+            changed_files(str(git_tree), since="no-such-ref")
+
+    def test_cli_staged_with_nothing_staged_passes(self, git_tree):
+        from click.testing import CliRunner
+        from scanner.cli import cli
+
+        out = CliRunner().invoke(cli, ["scan", str(git_tree), "--staged"])
+        assert out.exit_code == 0
+        assert "Changed files: 0" in out.output
+
+    def test_cli_bad_ref_is_a_usage_error(self, git_tree):
+        from click.testing import CliRunner
+        from scanner.cli import cli
+
+        out = CliRunner().invoke(cli, ["scan", str(git_tree), "--changed-since", "no-such-ref"])
+        assert out.exit_code == 2
@@ -0,0 +1,75 @@
+"""
+AI SAFE2 MCP Server — Output Sanitization Benchmark
+Times lookup_control-style tool calls (control_lookup + sanitize_output),
+comparing per-call sanitization of an unsanitized corpus with the corpus
+pre-sanitized once at load, and checks both produce identical JSON.
+
+Run: python skills/mcp/benchmarks/bench_sanitize.py [--calls 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+import structlog
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcp_server.controls_db import ControlsDB
+from mcp_server.sanitize import sanitize_output
+from mcp_server.tools import control_lookup as control_lookup_module
+
+
+def random_calls(n: int, seed: int = 17) -> list[dict]:
+    rng = random.Random(seed)
+    queries = ["", "", "memory", "injection", "agent", "governance", "audit", "jailbreak"]
+    calls = []
+    for _ in range(n):
+        kwargs: dict = {"tier": rng.choice(["free", "pro"])}
+        roll = rng.random()
+        if roll < 0.2:
+            kwargs["control_id"] = rng.choice(["S1.5", "CP.10", "F3.2", "P1.T1.10", "M4.7"])
+        else:
+            kwargs["query"] = rng.choice(queries)
+            if rng.random() < 0.4:
+                kwargs["pillar"] = rng.choice(["P1", "P2", "P3", "P4", "P5", "CP"])
+        calls.append(kwargs)
+    return calls
+
+
+def run(db: ControlsDB, calls: list[dict]) -> tuple[list[dict], float]:
+    control_lookup_module.get_db = lambda: db
+    start = time.perf_counter()
+    out = [sanitize_output(control_lookup_module.control_lookup(**kw), "lookup_control") for kw in calls]
+    return out, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2_000)
+    args = parser.parse_args()
+
+    # Corpus redactions log once per call on the legacy path; keep the timing clean
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+    calls = random_calls(args.calls)
+    legacy, legacy_time = run(ControlsDB(sanitize=False), calls)
+    current, current_time = run(ControlsDB(), calls)
+    for kw, old, new in zip(calls, legacy, current):
+        assert json.dumps(old) == json.dumps(new), f"output differs for {kw}"
+    controls = sum(len(r["controls"]) for r in current)
+
+    per_call = lambda t: t / len(calls) * 1e3  # noqa: E731
+    print(f"Calls:              {len(calls):,} ({controls:,} controls returned, identical JSON)")
+    print(f"Sanitize per call:  {legacy_time:8.3f}s  {per_call(legacy_time):8.3f} ms/call")
+    print(f"Pre-sanitized:      {current_time:8.3f}s  {per_call(current_time):8.3f} ms/call"
+          f"  ({legacy_time / max(current_time, 1e-9):.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
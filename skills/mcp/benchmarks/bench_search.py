@@ -0,0 +1,105 @@
+"""
+AI SAFE2 MCP Server — ControlsDB Search Benchmark
+Times 10k random keyword/filter queries against ControlsDB.search, comparing
+the original per-query linear scan with the inverted index, and checks that
+both return the same set of controls for every query.
+
+Run: python skills/mcp/benchmarks/bench_search.py [--queries 10000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcp_server.controls_db import ControlsDB
+
+
+def legacy_search(db: ControlsDB, query: str = "", pillar: str = "", priority: str = "",
+                  framework: str = "", version: str = "", act_tier: str = "",
+                  include_cp: bool = True, limit: int = 50) -> list[dict]:
+    """The original ControlsDB.search: rebuild and substring-match every control."""
+    q = query.lower()
+    results = []
+    pool = db._all if include_cp else db._pillar_controls
+    for c in pool:
+        if q:
+            searchable = " ".join([
+                c.get("id", ""), c.get("name", ""), c.get("description", ""),
+                c.get("builder_problem", ""), " ".join(c.get("tags", [])),
+            ]).lower()
+            if q not in searchable:
+                continue
+        if pillar and c.get("pillar_id", "").upper() != pillar.upper():
+            continue
+        if priority and c.get("priority", "").upper() != priority.upper():
+            continue
+        if framework:
+            if not any(framework.upper() in fw.upper() for fw in c.get("compliance_frameworks", [])):
+                continue
+        if version and c.get("version_added", "") != version:
+            continue
+        if act_tier and act_tier not in c.get("act_minimum", []):
+            continue
+        results.append(c)
+    return results[:limit]
+
+
+def random_queries(db: ControlsDB, n: int, seed: int = 11) -> list[dict]:
+    rng = random.Random(seed)
+    words = sorted({w for c in db._all for w in re.findall(r"[a-z]{4,}", c["name"].lower())})
+    frameworks = sorted({fw.split(":")[0] for c in db._all for fw in c.get("compliance_frameworks", [])})
+    queries = []
+    for _ in range(n):
+        kwargs: dict = {"limit": 500}
+        roll = rng.random()
+        if roll < 0.5:
+            kwargs["query"] = rng.choice(words)
+        elif roll < 0.7:
+            kwargs["query"] = " ".join(rng.sample(words, 2))
+        elif roll < 0.8:
+            kwargs["query"] = rng.choice(words)[1:-1]  # partial word
+        if rng.random() < 0.3:
+            kwargs["framework"] = rng.choice(frameworks)
+        if rng.random() < 0.2:
+            kwargs["pillar"] = rng.choice(["P1", "P2", "P3", "P4", "P5", "CP"])
+        if rng.random() < 0.2:
+            kwargs["priority"] = rng.choice(["CRITICAL", "HIGH", "MEDIUM", "LOW"])
+        queries.append(kwargs)
+    return queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=10_000)
+    args = parser.parse_args()
+
+    db = ControlsDB(sanitize=False)  # legacy_search matches the text as written
+    queries = random_queries(db, args.queries)
+
+    start = time.perf_counter()
+    legacy = [legacy_search(db, **kw) for kw in queries]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [db.search(**kw) for kw in queries]
+    indexed_time = time.perf_counter() - start
+
+    for kw, old, new in zip(queries, legacy, indexed):
+        assert {c["id"] for c in old} == {c["id"] for c in new}, f"result set differs for {kw}"
+    hits = sum(len(r) for r in indexed)
+
+    per_query = lambda t: t / len(queries) * 1e6  # noqa: E731
+    print(f"Queries:            {len(queries):,} ({hits:,} results, identical sets)")
+    print(f"Linear scan:        {legacy_time:8.3f}s  {per_query(legacy_time):8.1f} us/query")
+    print(f"Inverted index:     {indexed_time:8.3f}s  {per_query(indexed_time):8.1f} us/query"
+          f"  ({legacy_time / max(indexed_time, 1e-9):.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+AI SAFE2 MCP Server — Startup Benchmark
+Times the per-process startup work of a stdio server, building the ControlsDB
+and computing the source-integrity hash, cold (no cache) against warm
+(snapshot + hash manifest from an earlier startup). Each warm round reloads
+the manifest from disk, as a freshly spawned process would. The integrity
+hash reads every file in both cases; only the ControlsDB build is served
+from the cache.
+
+Run: python skills/mcp/benchmarks/bench_startup.py [--rounds 50]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import structlog
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+os.environ.setdefault("MCP_CACHE_KEY", "bench-startup")  # don't create a key file in ~/.config
+
+from mcp_server.auth import _compute_source_hash
+from mcp_server.controls_db import ControlsDB
+from mcp_server.snapshot import HashManifest
+
+
+def startup(manifest: HashManifest | None) -> tuple[ControlsDB, str, float]:
+    start = time.perf_counter()
+    source_hash = _compute_source_hash()
+    db = ControlsDB.load(manifest=manifest)
+    return db, source_hash, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    # Corpus redactions are logged on every cold build; keep the timing clean
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        manifest_path = Path(cache_dir) / "manifest.json"
+        cold_db, cold_hash, _ = startup(None)
+        startup(HashManifest(manifest_path))  # first cached startup populates the cache
+
+        cold = warm = 0.0
+        rehashed = 0
+        for _ in range(args.rounds):
+            cold += startup(None)[2]
+            manifest = HashManifest(manifest_path)
+            db, source_hash, elapsed = startup(manifest)
+            warm += elapsed
+            rehashed += len(manifest.rehashed)  # ControlsDB inputs only
+            assert source_hash == cold_hash, "source hash differs from a full rehash"
+            assert db.count() == cold_db.count()
+
+    per_round = lambda t: t / args.rounds * 1e3  # noqa: E731
+    print(f"Rounds:             {args.rounds} ({rehashed} files rehashed on warm startups)")
+    print(f"Cold startup:       {per_round(cold):8.2f} ms")
+    print(f"Snapshot startup:   {per_round(warm):8.2f} ms  ({cold / max(warm, 1e-9):.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,127 +1,325 @@
-"""
-AI SAFE2 MCP Server — Controls Database
-Loads ai-safe2-controls-v3.0.json at startup and provides
-fast lookup by ID, keyword, pillar, priority, framework, and version.
-"""
-from __future__ import annotations
-
-import json
-from functools import lru_cache
-from pathlib import Path
-from typing import Any
-
-from mcp_server.config import CONTROLS_JSON
-
-
-class ControlsDB:
-    """In-memory index of all 161 AI SAFE2 v3.0 controls."""
-
-    def __init__(self, path: Path = CONTROLS_JSON) -> None:
-        with open(path, encoding="utf-8") as f:
-            raw = json.load(f)
-
-        self.metadata: dict = raw["metadata"]
-        self.risk_formula: dict = raw["risk_formula"]
-        self.tier_requirements: dict = raw["tier_requirements"]
-        self.frameworks: dict = raw["frameworks"]
-
-        # Flat list of all controls (pillar + cross-pillar)
-        self._pillar_controls: list[dict] = raw["pillar_controls"]
-        self._cp_controls: list[dict] = raw["cross_pillar_controls"]
-        self._all: list[dict] = self._pillar_controls + self._cp_controls
-
-        # Indexes
-        self._by_id: dict[str, dict] = {c["id"]: c for c in self._all}
-        self._by_pillar: dict[str, list[dict]] = {}
-        for c in self._all:
-            pid = c["pillar_id"]
-            self._by_pillar.setdefault(pid, []).append(c)
-
-    # ── Lookups ────────────────────────────────────────────────────────────────
-
-    def get_by_id(self, control_id: str) -> dict | None:
-        return self._by_id.get(control_id)
-
-    def get_by_pillar(self, pillar_id: str) -> list[dict]:
-        return self._by_pillar.get(pillar_id.upper(), [])
-
-    def search(
-        self,
-        query: str = "",
-        pillar: str = "",
-        priority: str = "",
-        framework: str = "",
-        version: str = "",
-        act_tier: str = "",
-        include_cp: bool = True,
-        limit: int = 50,
-    ) -> list[dict]:
-        """
-        Full-text search across id, name, description, builder_problem, and tags.
-        Filters are ANDed together.
-        """
-        q = query.lower()
-        results: list[dict] = []
-
-        pool = self._all if include_cp else self._pillar_controls
-
-        for c in pool:
-            # Keyword filter
-            if q:
-                searchable = " ".join([
-                    c.get("id", ""),
-                    c.get("name", ""),
-                    c.get("description", ""),
-                    c.get("builder_problem", ""),
-                    " ".join(c.get("tags", [])),
-                ]).lower()
-                if q not in searchable:
-                    continue
-
-            # Pillar filter
-            if pillar and c.get("pillar_id", "").upper() != pillar.upper():
-                continue
-
-            # Priority filter
-            if priority and c.get("priority", "").upper() != priority.upper():
-                continue
-
-            # Framework filter
-            if framework:
-                fw_list = c.get("compliance_frameworks", [])
-                if not any(framework.upper() in fw.upper() for fw in fw_list):
-                    continue
-
-            # Version filter
-            if version and c.get("version_added", "") != version:
-                continue
-
-            # ACT tier filter
-            if act_tier:
-                act_reqs = c.get("act_minimum", [])
-                if act_tier not in act_reqs:
-                    continue
-
-            results.append(c)
-
-        return results[:limit]
-
-    def get_cross_pillar(self) -> list[dict]:
-        return self._cp_controls
-
-    def get_act_requirements(self, tier: str) -> dict | None:
-        return self.tier_requirements.get(tier)
-
-    def count(self) -> dict:
-        return {
-            "total": len(self._all),
-            "pillar_controls": len(self._pillar_controls),
-            "cross_pillar_controls": len(self._cp_controls),
-            "frameworks": len(self.frameworks),
-        }
-
-
-@lru_cache(maxsize=1)
-def get_db() -> ControlsDB:
-    """Singleton — loaded once at startup."""
-    return ControlsDB()
+"""
+AI SAFE2 MCP Server — Controls Database
+Loads ai-safe2-controls-v3.0.json at startup and provides
+fast lookup by ID, keyword, pillar, priority, framework, and version.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from mcp_server import sanitize as _sanitize_module
+from mcp_server.config import CONTROLS_JSON
+from mcp_server.sanitize import presanitize
+from mcp_server.snapshot import (
+    HashManifest,
+    load_snapshot,
+    save_snapshot,
+    snapshot_key,
+    startup_manifest,
+)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# BM25 parameters (standard defaults)
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+# Bound on memoized query-term / framework expansions
+_EXPANSION_CACHE_MAX = 4096
+
+
+def _searchable_text(c: dict) -> str:
+    """Lowercased text that keyword search matches against."""
+    return " ".join([
+        c.get("id", ""),
+        c.get("name", ""),
+        c.get("description", ""),
+        c.get("builder_problem", ""),
+        " ".join(c.get("tags", [])),
+    ]).lower()
+
+
+class ControlsDB:
+    """In-memory index of all 161 AI SAFE2 v3.0 controls."""
+
+    def __init__(self, path: Path = CONTROLS_JSON, sanitize: bool = True) -> None:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+
+        # Search indexes the text as written; everything handed out is the
+        # pre-sanitized copy (RISK-1), so tools never return unscanned corpus text.
+        source = raw["pillar_controls"] + raw["cross_pillar_controls"]
+        if sanitize:
+            raw = presanitize(raw, "controls_db")
+
+        self.metadata: dict = raw["metadata"]
+        self.risk_formula: dict = raw["risk_formula"]
+        self.tier_requirements: dict = raw["tier_requirements"]
+        self.frameworks: dict = raw["frameworks"]
+
+        # Flat list of all controls (pillar + cross-pillar)
+        self._pillar_controls: list[dict] = raw["pillar_controls"]
+        self._cp_controls: list[dict] = raw["cross_pillar_controls"]
+        self._all: list[dict] = self._pillar_controls + self._cp_controls
+
+        # Indexes
+        self._by_id: dict[str, dict] = {c["id"]: c for c in self._all}
+        self._by_pillar: dict[str, list[dict]] = {}
+        for c in self._all:
+            pid = c["pillar_id"]
+            self._by_pillar.setdefault(pid, []).append(c)
+
+        self._build_search_index(source)
+
+    @classmethod
+    def load(cls, path: Path = CONTROLS_JSON, manifest: HashManifest | None = None) -> ControlsDB:
+        """
+        Build the database, or load the prebuilt snapshot cached next to
+        manifest. The snapshot is keyed by the digests of the controls JSON
+        and of the modules that shape the index; any change rebuilds it.
+        """
+        if manifest is None or manifest.path is None:
+            return cls(path)
+        key = snapshot_key(
+            manifest.digest(Path(path)),
+            manifest.digest(Path(__file__)),
+            manifest.digest(Path(_sanitize_module.__file__)),
+        )
+        cache_dir = manifest.path.parent
+        db = load_snapshot(cache_dir, "controls_db", key)
+        if not isinstance(db, cls):
+            db = cls(path)
+            save_snapshot(cache_dir, "controls_db", key, db)
+        manifest.save()
+        return db
+
+    def _build_search_index(self, source: list[dict]) -> None:
+        """
+        Build the keyword and framework indexes used by search().
+
+        Each control's searchable text is tokenized into word-character runs.
+        A query matches when it is a substring of that text, so every query
+        token must occur inside some document token: posting lists for the
+        vocabulary terms containing each query token give a small candidate
+        set, and only candidates get the exact substring check. Candidates
+        are ranked with BM25 over the same expanded terms.
+
+        source is the controls as loaded, in the same order as self._all, so
+        queries match the original text even where sanitization redacted it.
+        """
+        self._searchable: list[str] = [_searchable_text(c) for c in source]
+        self._topic_text: dict[str, str] = {
+            c["id"]: " ".join([
+                c.get("name", ""), c.get("description", ""), c.get("builder_problem", ""),
+                " ".join(c.get("tags", [])),
+            ]).lower()
+            for c in source
+        }
+        self._postings: dict[str, dict[int, int]] = {}  # term -> {control index: term frequency}
+        self._doc_len: list[int] = []
+        for i, text in enumerate(self._searchable):
+            counts = Counter(_TOKEN_RE.findall(text))
+            self._doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[i] = tf
+        self._avg_doc_len = sum(self._doc_len) / max(len(self._doc_len), 1)
+        self._term_expansions: dict[str, tuple[str, ...]] = {}
+
+        # Framework mapping (as written in the data) -> control indexes, in corpus order
+        self._by_framework: dict[str, list[int]] = {}
+        for i, c in enumerate(source):
+            for fw in c.get("compliance_frameworks", []):
+                ids = self._by_framework.setdefault(fw, [])
+                if not ids or ids[-1] != i:
+                    ids.append(i)
+        self._framework_matches: dict[str, frozenset[int]] = {}
+
+        # Catalogue framework ID -> mapped controls (same matching as search()), corpus order
+        self._framework_controls: dict[str, list[dict]] = {
+            fw: [self._all[i] for i in sorted(self._framework_indexes(fw))] for fw in self.frameworks
+        }
+
+    def _expand_term(self, token: str) -> tuple[str, ...]:
+        """Vocabulary terms that contain token (memoized)."""
+        terms = self._term_expansions.get(token)
+        if terms is None:
+            terms = tuple(t for t in self._postings if token in t)
+            if len(self._term_expansions) >= _EXPANSION_CACHE_MAX:
+                self._term_expansions.clear()
+            self._term_expansions[token] = terms
+        return terms
+
+    def _framework_indexes(self, framework: str) -> frozenset[int]:
+        """Controls with a framework mapping containing `framework` (case-insensitive)."""
+        key = framework.upper()
+        matches = self._framework_matches.get(key)
+        if matches is None:
+            matches = frozenset(
+                i for fw, ids in self._by_framework.items() if key in fw.upper() for i in ids
+            )
+            if len(self._framework_matches) >= _EXPANSION_CACHE_MAX:
+                self._framework_matches.clear()
+            self._framework_matches[key] = matches
+        return matches
+
+    def _keyword_matches(self, q: str) -> list[tuple[float, int]] | None:
+        """
+        (BM25 score, control index) for every control whose searchable text
+        contains q. None when q has no word characters to look up (caller scans).
+        """
+        tokens = _TOKEN_RE.findall(q)
+        if not tokens:
+            return None
+        n_docs = len(self._all)
+        candidates: set[int] | None = None
+        term_stats = []
+        for token in dict.fromkeys(tokens):
+            tf_by_doc: Counter[int] = Counter()
+            for term in self._expand_term(token):
+                tf_by_doc.update(self._postings[term])
+            docs = tf_by_doc.keys()
+            candidates = set(docs) if candidates is None else candidates & docs
+            if not candidates:
+                return []
+            df = len(tf_by_doc)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            term_stats.append((idf, tf_by_doc))
+
+        scored = []
+        for i in candidates:
+            if q not in self._searchable[i]:
+                continue
+            norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * self._doc_len[i] / self._avg_doc_len)
+            score = 0.0
+            for idf, tf_by_doc in term_stats:
+                tf = tf_by_doc[i]
+                score += idf * tf * (_BM25_K1 + 1) / (tf + norm)
+            scored.append((score, i))
+        return scored
+
+    # ── Lookups ────────────────────────────────────────────────────────────────
+
+    def get_by_id(self, control_id: str) -> dict | None:
+        return self._by_id.get(control_id)
+
+    def get_by_pillar(self, pillar_id: str) -> list[dict]:
+        return self._by_pillar.get(pillar_id.upper(), [])
+
+    def get_by_framework(self, framework: str) -> list[dict]:
+        """Controls mapped to framework (case-insensitive substring), in catalogue order."""
+        controls = self._framework_controls.get(framework)
+        if controls is None:
+            controls = [self._all[i] for i in sorted(self._framework_indexes(framework))]
+        return controls
+
+    def topic_ids(self, q: str) -> frozenset[str]:
+        """
+        IDs of controls whose topic_text() contains q (already lowercased).
+        Posting lists narrow the candidates; each is then checked exactly.
+        """
+        candidates: set[int] | None = None
+        for token in dict.fromkeys(_TOKEN_RE.findall(q)):
+            docs: set[int] = set()
+            for term in self._expand_term(token):
+                docs.update(self._postings[term])
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                return frozenset()
+        pool = range(len(self._all)) if candidates is None else candidates
+        ids = (self._all[i]["id"] for i in pool)
+        return frozenset(cid for cid in ids if q in self._topic_text[cid])
+
+    def topic_text(self, control_id: str) -> str:
+        """
+        Lowercased name, description, builder_problem, and tags of a control as
+        written in the data, before redaction. For matching only, never output.
+        """
+        return self._topic_text.get(control_id, "")
+
+    def search(
+        self,
+        query: str = "",
+        pillar: str = "",
+        priority: str = "",
+        framework: str = "",
+        version: str = "",
+        act_tier: str = "",
+        include_cp: bool = True,
+        limit: int = 50,
+    ) -> list[dict]:
+        """
+        Full-text search across id, name, description, builder_problem, and tags.
+        Filters are ANDed together.
+
+        A control matches the keyword query when the query is a substring of
+        that text. Keyword results are ranked by BM25 relevance (ties keep
+        catalogue order); filter-only searches return catalogue order.
+        """
+        q = query.lower()
+        results: list[dict] = []
+
+        pool_size = len(self._all) if include_cp else len(self._pillar_controls)
+        if q:
+            scored = self._keyword_matches(q)
+            if scored is None:
+                order = [i for i in range(len(self._all)) if q in self._searchable[i]]
+            else:
+                order = [i for _, i in sorted(scored, key=lambda s: (-s[0], s[1]))]
+        else:
+            order = range(len(self._all))
+        fw_matches = self._framework_indexes(framework) if framework else None
+
+        for i in order:
+            if i >= pool_size:
+                continue
+            if fw_matches is not None and i not in fw_matches:
+                continue
+            c = self._all[i]
+
+            # Pillar filter
+            if pillar and c.get("pillar_id", "").upper() != pillar.upper():
+                continue
+
+            # Priority filter
+            if priority and c.get("priority", "").upper() != priority.upper():
+                continue
+
+            # Version filter
+            if version and c.get("version_added", "") != version:
+                continue
+
+            # ACT tier filter
+            if act_tier:
+                act_reqs = c.get("act_minimum", [])
+                if act_tier not in act_reqs:
+                    continue
+
+            results.append(c)
+
+        return results[:limit]
+
+    def get_cross_pillar(self) -> list[dict]:
+        return self._cp_controls
+
+    def get_act_requirements(self, tier: str) -> dict | None:
+        return self.tier_requirements.get(tier)
+
+    def count(self) -> dict:
+        return {
+            "total": len(self._all),
+            "pillar_controls": len(self._pillar_controls),
+            "cross_pillar_controls": len(self._cp_controls),
+            "frameworks": len(self.frameworks),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_db() -> ControlsDB:
+    """Singleton — loaded and sanitized once at startup (or from the snapshot cache)."""
+    return ControlsDB.load(manifest=startup_manifest())
@@ -0,0 +1,264 @@
+"""
+AI SAFE2 MCP Server — Startup Snapshot Cache
+
+A stdio server is spawned fresh by every client session, so each startup
+used to re-parse the controls JSON and rebuild the ControlsDB indexes.
+This module lets later startups skip that work:
+
+  HashManifest   — SHA-256 per file, reused while the file's stat tuple
+                   (size, mtime_ns, ctime_ns, inode) is unchanged. Only files
+                   whose stat tuple changed are read and rehashed.
+  load_snapshot  — a pickled prebuilt object (the ControlsDB index), used only
+  save_snapshot    when its key matches the digests of the inputs it was
+                   built from.
+
+Anything unreadable, corrupt, or mismatched is a cache miss and falls back to
+a full rebuild. Write failures are logged and ignored; the cache is never
+required for the server to start.
+
+Trust: snapshots are pickles and the manifest vouches for file contents, so
+nothing in the cache is read unless
+  - the cache directory is a real directory owned by the current user with
+    mode 0700 (checked before any file in it is opened), and
+  - the manifest and each snapshot carry a valid HMAC-SHA256 under a key
+    that lives outside the cache directory (MCP_CACHE_KEY, or a random key
+    generated once into MCP_CACHE_KEY_FILE).
+A snapshot is unpickled only after its MAC verifies. The RISK-2 source hash
+(auth._compute_source_hash) never uses the cache. Set MCP_STARTUP_CACHE=0 to
+disable it.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import os
+import pickle
+import secrets
+import stat
+import sys
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from mcp_server.config import CACHE_DIR, CACHE_KEY, CACHE_KEY_FILE, STARTUP_CACHE
+
+log = structlog.get_logger()
+
+_MANIFEST_FORMAT = 2
+_SNAPSHOT_FORMAT = 2
+_MANIFEST_NAME = "manifest.json"
+_KEY_BYTES = 32
+
+
+def _stat_key(path: Path) -> list[int]:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino]
+
+
+def _owned_by_user(st: os.stat_result) -> bool:
+    return not hasattr(os, "getuid") or st.st_uid == os.getuid()
+
+
+def secure_dir(path: Path, create: bool = False) -> bool:
+    """
+    True if path is a directory (not a symlink) owned by the current user
+    with mode 0700. create=True makes it first if missing. mkdir(mode=...)
+    does not change an existing directory, so this is checked every time.
+    """
+    try:
+        if create:
+            path.mkdir(mode=0o700, parents=True, exist_ok=True)
+        st = path.lstat()
+    except OSError as exc:
+        reason = str(exc)
+    else:
+        if not stat.S_ISDIR(st.st_mode):
+            reason = "not a directory"
+        elif not _owned_by_user(st):
+            reason = f"owned by uid {st.st_uid}"
+        elif hasattr(os, "getuid") and stat.S_IMODE(st.st_mode) != 0o700:
+            reason = f"mode {stat.S_IMODE(st.st_mode):o}, expected 700"
+        else:
+            return True
+    log.warning("snapshot.cache_dir_rejected", path=str(path), reason=reason)
+    return False
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write via a temp file + os.replace so readers never see a partial file."""
+    if not secure_dir(path.parent, create=True):
+        raise PermissionError(f"insecure cache directory: {path.parent}")
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _read_key_file(path: Path) -> bytes:
+    with open(path, "rb", opener=lambda p, flags: os.open(p, flags | getattr(os, "O_NOFOLLOW", 0))) as f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode) or not _owned_by_user(st) or (
+            hasattr(os, "getuid") and st.st_mode & 0o077
+        ):
+            raise PermissionError(f"key file must be a 0600 regular file owned by this user: {path}")
+        key = f.read()
+    if len(key) < _KEY_BYTES:
+        raise ValueError(f"key file is truncated: {path}")
+    return key
+
+
+@lru_cache(maxsize=1)
+def _cache_secret() -> bytes | None:
+    """
+    HMAC key for the cache: MCP_CACHE_KEY, else MCP_CACHE_KEY_FILE, created
+    with a random key on first use. None (cache disabled) if neither is usable.
+    """
+    if CACHE_KEY:
+        return CACHE_KEY.encode("utf-8")
+    path = CACHE_KEY_FILE
+    try:
+        if not secure_dir(path.parent, create=True):
+            return None
+        if not path.exists():
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(secrets.token_bytes(_KEY_BYTES))
+                os.link(tmp, path)  # fails if a concurrent startup won the race
+            except FileExistsError:
+                pass
+            finally:
+                Path(tmp).unlink(missing_ok=True)
+        return _read_key_file(path)
+    except (OSError, ValueError) as exc:
+        log.warning("snapshot.cache_key_unavailable", path=str(path), error=str(exc))
+        return None
+
+
+def _mac(secret: bytes, data: bytes) -> str:
+    return hmac.new(secret, data, hashlib.sha256).hexdigest()
+
+
+def _manifest_body(files: dict) -> bytes:
+    return json.dumps(files, sort_keys=True).encode("utf-8")
+
+
+class HashManifest:
+    """
+    Per-file SHA-256 digests keyed by resolved path and stat tuple.
+
+    path=None keeps the manifest in memory only, so every file is hashed
+    (the behavior without a cache). `rehashed` lists the files actually read.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path
+        self.rehashed: list[Path] = []
+        self._files: dict[str, list] = {}
+        self._dirty = False
+        if path is None:
+            return
+        self._secret = _cache_secret()
+        if self._secret is None or not secure_dir(path.parent, create=True):
+            self.path = None
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            files = data["files"]
+            if data["format"] != _MANIFEST_FORMAT or not isinstance(files, dict):
+                return
+            if not hmac.compare_digest(data["mac"], _mac(self._secret, _manifest_body(files))):
+                log.warning("snapshot.manifest_mac_mismatch", path=str(path))
+                return
+            self._files = files
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            log.info("snapshot.manifest_discarded", path=str(path), error=str(exc))
+
+    def digest(self, path: Path) -> str:
+        """Hex SHA-256 of path, read from disk only if its stat tuple changed."""
+        key = str(path.resolve())
+        st = _stat_key(path)
+        entry = self._files.get(key)
+        if isinstance(entry, list) and entry[:-1] == st:
+            return entry[-1]
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        self._files[key] = [*st, digest]
+        self._dirty = True
+        self.rehashed.append(path)
+        return digest
+
+    def save(self) -> None:
+        """Persist new digests. No-op for in-memory manifests or when nothing changed."""
+        if self.path is None or not self._dirty:
+            return
+        mac = _mac(self._secret, _manifest_body(self._files))
+        data = json.dumps({"format": _MANIFEST_FORMAT, "files": self._files, "mac": mac}, sort_keys=True)
+        try:
+            _atomic_write(self.path, data.encode("utf-8"))
+        except OSError as exc:
+            log.warning("snapshot.manifest_write_failed", path=str(self.path), error=str(exc))
+            return
+        self._dirty = False
+
+
+def snapshot_key(*digests: str) -> str:
+    """Key for a snapshot built from inputs with these digests (and this Python)."""
+    h = hashlib.sha256(f"{_SNAPSHOT_FORMAT}:{sys.version_info[:2]}".encode("ascii"))
+    for d in digests:
+        h.update(d.encode("ascii"))
+    return h.hexdigest()
+
+
+def load_snapshot(cache_dir: Path, name: str, key: str) -> Any | None:
+    """
+    The object saved under name, or None if missing, stale, or unreadable.
+    The directory, key header and HMAC are all checked before anything is
+    unpickled.
+    """
+    path = cache_dir / f"{name}.pickle"
+    secret = _cache_secret()
+    if secret is None or not secure_dir(cache_dir):
+        return None
+    try:
+        header, _, body = path.read_bytes().partition(b"\n")
+        stored_key, _, mac = header.partition(b" ")
+        if stored_key != key.encode("ascii"):
+            return None
+        if not hmac.compare_digest(mac, _mac(secret, stored_key + b"\n" + body).encode("ascii")):
+            log.warning("snapshot.mac_mismatch", path=str(path))
+            return None
+        return pickle.loads(body)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:  # noqa: BLE001 — any corrupt snapshot is just a miss
+        log.info("snapshot.discarded", path=str(path), error=str(exc))
+        return None
+
+
+def save_snapshot(cache_dir: Path, name: str, key: str, obj: Any) -> None:
+    path = cache_dir / f"{name}.pickle"
+    secret = _cache_secret()
+    if secret is None:
+        return
+    try:
+        body = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        mac = _mac(secret, key.encode("ascii") + b"\n" + body)
+        _atomic_write(path, f"{key} {mac}\n".encode("ascii") + body)
+    except (OSError, pickle.PicklingError) as exc:
+        log.warning("snapshot.write_failed", path=str(path), error=str(exc))
+
+
+@lru_cache(maxsize=1)
+def startup_manifest() -> HashManifest:
+    """Process-wide manifest in CACHE_DIR, or in-memory when the cache is disabled."""
+    return HashManifest(CACHE_DIR / _MANIFEST_NAME if STARTUP_CACHE else None)